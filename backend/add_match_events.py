@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Database migration script for the match event log.
+Creates the matchevent table (through init_db) and adds the assists,
+yellowcards and redcards counters to tournamentplayerstats. Existing rows
+start at zero, which is right: nothing recorded assists or cards before.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import inspect, text
+from database import engine, init_db
+
+COUNTERS = ["assists", "yellowcards", "redcards"]
+
+def add_match_events():
+    """Add the event counters to tournamentplayerstats and create matchevent"""
+    try:
+        if inspect(engine).has_table("tournamentplayerstats"):
+            existing = {column["name"] for column in inspect(engine).get_columns("tournamentplayerstats")}
+            with engine.begin() as connection:
+                for column in COUNTERS:
+                    if column in existing:
+                        print(f"✓ {column} column already exists")
+                        continue
+                    print(f"Adding tournamentplayerstats.{column} column...")
+                    connection.execute(text(f"ALTER TABLE tournamentplayerstats ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"))
+                    print(f"✓ Added {column} column")
+        init_db()
+        print("✓ matchevent table and its indexes are in place")
+
+        print("\n🎉 Match event migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Error during migration: {e}")
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    print("Starting match event migration...")
+    success = add_match_events()
+    if success:
+        print("Migration completed successfully!")
+    else:
+        print("Migration failed!")
+        sys.exit(1)
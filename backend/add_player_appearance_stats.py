@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Database migration script for the per-tournament / career player statistics split.
+Adds the matchesplayed and teamid columns to tournamentplayerstats (the
+matchappearance table is created by init_db), then backfills from history:
+appearances for results recorded before they were stored (taken from the
+current rosters), every tournament's player counters, and the career totals
+in playerstats.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import inspect, text
+from database import SessionLocal, engine, init_db
+from services.stats import backfill_player_stats
+
+def add_columns():
+    """Add tournamentplayerstats.matchesplayed and .teamid if they are missing"""
+    existing = {column["name"] for column in inspect(engine).get_columns("tournamentplayerstats")}
+    with engine.begin() as connection:
+        if "matchesplayed" not in existing:
+            print("Adding tournamentplayerstats.matchesplayed column...")
+            connection.execute(text("ALTER TABLE tournamentplayerstats ADD COLUMN matchesplayed INTEGER NOT NULL DEFAULT 0"))
+            print("✓ Added matchesplayed column")
+        else:
+            print("✓ matchesplayed column already exists")
+        if "teamid" not in existing:
+            print("Adding tournamentplayerstats.teamid column...")
+            connection.execute(text("ALTER TABLE tournamentplayerstats ADD COLUMN teamid INTEGER REFERENCES team (teamid) ON DELETE SET NULL"))
+            print("✓ Added teamid column")
+        else:
+            print("✓ teamid column already exists")
+
+def add_player_appearance_stats():
+    try:
+        if inspect(engine).has_table("tournamentplayerstats"):
+            add_columns()
+        # Creates matchappearance (and tournamentplayerstats on a fresh database) and their indexes
+        init_db()
+    except Exception as e:
+        print(f"❌ Error during migration: {e}")
+        return False
+
+    db = SessionLocal()
+    try:
+        counts = backfill_player_stats(db)
+        db.commit()
+        print(f"✓ Backfilled {counts['appearances']} appearances")
+        print(f"✓ Wrote {counts['tournament_rows']} tournament player rows")
+        print(f"✓ Recounted career totals for {counts['players']} players")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Backfill failed: {e}")
+        return False
+    finally:
+        db.close()
+
+    print("\n🎉 Player statistics migration completed successfully!")
+    return True
+
+if __name__ == "__main__":
+    print("Starting player statistics migration...")
+    success = add_player_appearance_stats()
+    if success:
+        print("Migration completed successfully!")
+    else:
+        print("Migration failed!")
+        sys.exit(1)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add the unique (groupid, teamid) index on standings.
+Result posting upserts standings rows on this index. Any duplicate rows left by
+the old get-or-create code are merged first (their counters are summed into the
+oldest row) so the index can be built.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import text
+from database import engine
+
+COUNTERS = ["matchesplayed", "wins", "draws", "losses", "goalsfor", "goalsagainst", "points"]
+
+def add_standings_unique_index():
+    """Merge duplicate standings rows and create uq_standings_group_team"""
+    try:
+        with engine.begin() as connection:
+            duplicates = connection.execute(text("""
+                SELECT groupid, teamid, MIN(standingid) AS keepid
+                FROM standings
+                WHERE groupid IS NOT NULL AND teamid IS NOT NULL
+                GROUP BY groupid, teamid
+                HAVING COUNT(*) > 1
+            """)).fetchall()
+
+            if duplicates:
+                print(f"Merging {len(duplicates)} duplicated standings rows...")
+            sums = ", ".join(f"{column} = (SELECT SUM({column}) FROM standings s WHERE s.groupid = :groupid AND s.teamid = :teamid)" for column in COUNTERS)
+            for row in duplicates:
+                params = {"groupid": row.groupid, "teamid": row.teamid, "keepid": row.keepid}
+                connection.execute(text(f"UPDATE standings SET {sums} WHERE standingid = :keepid"), params)
+                connection.execute(text("""
+                    DELETE FROM standings
+                    WHERE groupid = :groupid AND teamid = :teamid AND standingid <> :keepid
+                """), params)
+            print("✓ No duplicate standings rows remain")
+
+            print("Creating uq_standings_group_team index...")
+            connection.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_standings_group_team
+                ON standings (groupid, teamid)
+            """))
+            print("✓ uq_standings_group_team index is in place")
+
+        print("\n🎉 Standings unique index migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Error during migration: {e}")
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    print("Starting standings unique index migration...")
+    success = add_standings_unique_index()
+    if success:
+        print("Migration completed successfully!")
+    else:
+        print("Migration failed!")
+        sys.exit(1)
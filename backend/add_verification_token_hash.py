@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Database migration script for hashed email verification tokens.
+Adds users.email_verification_token_hash with its unique index, stores the
+sha256 digest of every outstanding plaintext token there (links already sent
+keep working), then drops the plaintext email_verification_token column.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import inspect, text
+from auth import hash_verification_token
+from database import engine, init_db
+
+BATCH_SIZE = 500
+
+def add_verification_token_hash():
+    try:
+        existing = {column["name"] for column in inspect(engine).get_columns("users")}
+        with engine.begin() as connection:
+            if "email_verification_token_hash" not in existing:
+                print("Adding users.email_verification_token_hash column...")
+                connection.execute(text("ALTER TABLE users ADD COLUMN email_verification_token_hash VARCHAR(64)"))
+                print("✓ Added email_verification_token_hash column")
+            else:
+                print("✓ email_verification_token_hash column already exists")
+
+        if "email_verification_token" in existing:
+            hashed = 0
+            while True:
+                # Short transactions: hash a batch, clear its plaintext, commit
+                with engine.begin() as connection:
+                    rows = connection.execute(text("""
+                        SELECT userid, email_verification_token FROM users
+                        WHERE email_verification_token IS NOT NULL
+                        LIMIT :limit
+                    """), {"limit": BATCH_SIZE}).fetchall()
+                    for row in rows:
+                        connection.execute(text("""
+                            UPDATE users
+                            SET email_verification_token_hash = :token_hash, email_verification_token = NULL
+                            WHERE userid = :userid
+                        """), {"token_hash": hash_verification_token(row.email_verification_token), "userid": row.userid})
+                hashed += len(rows)
+                if len(rows) < BATCH_SIZE:
+                    break
+            print(f"✓ Hashed {hashed} outstanding verification tokens")
+
+            print("Dropping users.email_verification_token column...")
+            with engine.begin() as connection:
+                connection.execute(text("ALTER TABLE users DROP COLUMN email_verification_token"))
+            print("✓ Dropped email_verification_token column")
+        else:
+            print("✓ No plaintext token column left")
+
+        # Creates uq_users_verification_token_hash
+        init_db()
+        print("✓ uq_users_verification_token_hash index is in place")
+
+        print("\n🎉 Verification token hashing migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Error during migration: {e}")
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    print("Starting verification token hashing migration...")
+    success = add_verification_token_hash()
+    if success:
+        print("Migration completed successfully!")
+    else:
+        print("Migration failed!")
+        sys.exit(1)
@@ -1,3 +1,4 @@
+import asyncio
 import sys
 import os
 from contextlib import asynccontextmanager
@@ -10,8 +11,16 @@ sys.path.insert(0, os.path.dirname(__file__))
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from config import settings
-from database import init_db
+from database import init_db, SessionLocal
 from routers import api_router
+from responses import DefaultResponse
+from services.search_index import search_index
+from services.projections import shutdown_pool
+from services.live import live_hub
+from services.broker import broker
+from services.match_status import run_match_status_scheduler
+from services.jobs import scheduler
+from services.rate_limit import RateLimitMiddleware
 
 
 @asynccontextmanager
@@ -28,11 +37,37 @@ async def lifespan(app: FastAPI):
             print("DB: (sanitized)")
     else:
         print(f"DB: {db_url}")
+    # Receive other workers' invalidations and live updates (a no-op with a single worker)
+    broker.start()
+    # Warm the in-process search index so the first /search doesn't pay for the load
+    db = SessionLocal()
+    try:
+        search_index.load(db)
+    except Exception as e:
+        print(f"Warning: search index not loaded at startup: {e}")
+    finally:
+        db.close()
+    # Writes events pushed to live matches to the database every few seconds
+    live_flusher = asyncio.create_task(live_hub.run_flusher())
+    # Moves matches from Upcoming to Live to Finished by their kick-off time
+    status_scheduler = asyncio.create_task(run_match_status_scheduler())
+    # Periodic maintenance jobs (services/jobs.py); each due job runs on one worker only
+    job_scheduler = asyncio.create_task(scheduler.run_forever())
     yield
-    # Shutdown (add cleanup here if needed)
+    # Shutdown
+    scheduler.stop()
+    job_scheduler.cancel()
+    status_scheduler.cancel()
+    live_flusher.cancel()
+    live_hub.flush()
+    broker.close()
+    shutdown_pool()
 
 
-app = FastAPI(title="ZC League API", version="1.0.0", lifespan=lifespan)
+app = FastAPI(title="ZC League API", version="1.0.0", lifespan=lifespan, default_response_class=DefaultResponse)
+
+# Rate limits and load shedding (added first, so CORS headers still reach rejected requests)
+app.add_middleware(RateLimitMiddleware)
 
 # CORS: allow all origins (Bearer-token auth, no cookies → credentials=False is correct)
 app.add_middleware(
@@ -1,5 +1,10 @@
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
@@ -16,10 +21,20 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds
 SECRET_KEY = "your-secret-key-change-this-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Decoded tokens kept per worker, so a client's requests don't each re-verify its signature
+TOKEN_CACHE_SIZE = 4096
 
 # Security scheme
 security = HTTPBearer()
 
+def hash_verification_token(token: str) -> str:
+    """Fixed-length digest stored for an email verification token; tokens are random, so a plain sha256 is enough"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def verification_token_matches(token: str, token_hash: Optional[str]) -> bool:
+    """Constant-time check of a token against a stored digest"""
+    return token_hash is not None and hmac.compare_digest(hash_verification_token(token), token_hash)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     try:
@@ -73,8 +88,25 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# token -> (expiry as a unix time, decoded data); tokens are immutable, so only expiry can change the answer
+_verified_tokens: "OrderedDict[str, Tuple[float, TokenData]]" = OrderedDict()
+_verified_tokens_lock = threading.Lock()
+
 def verify_token(token: str) -> TokenData:
-    """Verify and decode a JWT token"""
+    """Verify and decode a JWT token (remembered until it expires)"""
+    with _verified_tokens_lock:
+        cached = _verified_tokens.get(token)
+        if cached is not None and cached[0] > time.time():
+            _verified_tokens.move_to_end(token)
+            return cached[1]
+    token_data, expires = _decode_token(token)
+    with _verified_tokens_lock:
+        _verified_tokens[token] = (expires, token_data)
+        while len(_verified_tokens) > TOKEN_CACHE_SIZE:
+            _verified_tokens.popitem(last=False)
+    return token_data
+
+def _decode_token(token: str) -> Tuple[TokenData, float]:
     print(f"=== VERIFY_TOKEN CALLED ===")
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -102,16 +134,46 @@ def verify_token(token: str) -> TokenData:
             
         token_data = TokenData(userid=userid, email=email)
         print(f"Token data created: {token_data}")
-        return token_data
+        return token_data, float(payload.get("exp") or 0)
     except JWTError as e:
         print(f"JWT Error: {str(e)}")
         raise credentials_exception
 
-def get_current_user(
+class Identity:
+    """
+    The caller with their player profile and team (None when they have none),
+    loaded together by get_identity. The rows belong to the request's session,
+    so routers can modify them like rows they queried themselves.
+    """
+
+    def __init__(self, user: models.User, player: Optional[models.Player], team: Optional[models.Team]):
+        self.user = user
+        self.player = player
+        self.team = team
+
+    @property
+    def is_staff(self) -> bool:
+        return self.user.role in ["Admin", "Organizer"]
+
+    @property
+    def is_captain(self) -> bool:
+        return self.player is not None and self.team is not None and self.team.teamcaptainid == self.player.playerid
+
+    def captain_team(self, detail: str) -> models.Team:
+        """The team the caller captains; 403 with detail if they captain none"""
+        if not self.is_captain:
+            raise HTTPException(403, detail)
+        return self.team
+
+def get_identity(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> models.User:
-    """Get the current authenticated user"""
+) -> Identity:
+    """
+    Get the current authenticated user, their player profile and team in one
+    joined query. FastAPI resolves it once per request, however many
+    dependencies use it.
+    """
     print(f"=== GET_CURRENT_USER CALLED ===")
     try:
         token = credentials.credentials
@@ -119,8 +181,12 @@ def get_current_user(
         token_data = verify_token(token)
         print(f"Token verified for user: {token_data.userid}")
         
-        user = db.query(models.User).filter(models.User.userid == token_data.userid).first()
-        if user is None:
+        row = db.query(models.User, models.Player, models.Team).outerjoin(
+            models.Player, models.Player.userid == models.User.userid
+        ).outerjoin(
+            models.Team, models.Team.teamid == models.Player.teamid
+        ).filter(models.User.userid == token_data.userid).order_by(models.Player.playerid).first()
+        if row is None:
             print(f"User {token_data.userid} not found in database")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -128,14 +194,16 @@ def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        user, player, team = row
         print(f"User found: {user.userid}, status: {user.status}")
-        return user
+        return Identity(user, player, team)
     except Exception as e:
         print(f"Error in get_current_user: {str(e)}")
         raise
 
-def get_current_active_user(current_user: models.User = Depends(get_current_user)) -> models.User:
-    """Get the current active user"""
+def get_active_identity(identity: Identity = Depends(get_identity)) -> Identity:
+    """Get the current active user's identity"""
+    current_user = identity.user
     print(f"Checking user status: user_id={current_user.userid}, status='{current_user.status}'")
     if current_user.status != "active":
         print(f"User {current_user.userid} is not active (status: '{current_user.status}')")
@@ -144,7 +212,15 @@ def get_current_active_user(current_user: models.User = Depends(get_current_user
             detail="Inactive user"
         )
     print(f"User {current_user.userid} is active, proceeding...")
-    return current_user
+    return identity
+
+def get_current_user(identity: Identity = Depends(get_identity)) -> models.User:
+    """Get the current authenticated user"""
+    return identity.user
+
+def get_current_active_user(identity: Identity = Depends(get_active_identity)) -> models.User:
+    """Get the current active user"""
+    return identity.user
 
 def require_role(allowed_roles: list[str]):
     """Dependency to require specific roles"""
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the full Elo replay in services/ratings.py.
+Synthesizes a result history in memory (no database), replays it with the
+wave-vectorized compute_ratings() and with a plain one-result-at-a-time loop,
+and checks both give the same ratings.
+
+Usage: python bench_ratings.py [results] [teams]
+"""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from services.ratings import INITIAL_RATING, compute_ratings, elo_delta
+
+def synthetic_history(results: int, teams: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    home = rng.integers(0, teams, results)
+    away = (home + rng.integers(1, teams, results)) % teams
+    return home, away, rng.poisson(1.5, results).astype(float), rng.poisson(1.2, results).astype(float)
+
+def sequential(home, away, home_score, away_score, teams: int):
+    ratings = [INITIAL_RATING] * teams
+    for h, a, hs, as_ in zip(home.tolist(), away.tolist(), home_score.tolist(), away_score.tolist()):
+        delta = float(elo_delta(ratings[h], ratings[a], hs, as_))
+        ratings[h] += delta
+        ratings[a] -= delta
+    return np.array(ratings)
+
+if __name__ == "__main__":
+    results = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    teams = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    history = synthetic_history(results, teams)
+
+    started = time.perf_counter()
+    _, ratings = compute_ratings(*history, teams)
+    vectorized = time.perf_counter() - started
+    print(f"compute_ratings: {results} results, {teams} teams in {vectorized:.2f}s")
+
+    started = time.perf_counter()
+    expected = sequential(*history, teams)
+    print(f"one at a time:   {time.perf_counter() - started:.2f}s")
+    print(f"max rating difference: {np.abs(ratings - expected).max():.2e}")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for list endpoint serialization.
+Compares the old path (build a model per row, then let FastAPI re-validate the
+list through response_model and encode it with the stdlib json module) against
+the fast path in responses.py (validate once with a cached TypeAdapter and dump
+straight to bytes). No database is needed; rows are synthesized in memory.
+
+Usage: python bench_serialization.py [rows] [repeats]
+"""
+
+import sys
+import os
+import timeit
+from datetime import datetime
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_model_field
+from schemas import PlayerWithUser
+from routers.standings import StandingsWithTeam
+from responses import serialize_rows, DefaultResponse
+
+def player_rows(n: int) -> List[dict]:
+    now = datetime(2025, 10, 1, 18, 30)
+    return [
+        {
+            "playerid": i,
+            "userid": i,
+            "teamid": i % 16,
+            "position": "Forward",
+            "jerseynumber": i % 99,
+            "statsid": i,
+            "preferredfoot": "Right",
+            "height": 180.5,
+            "weight": 75.0,
+            "registered_at": now,
+            "joined_team_at": now,
+            "firstname": f"First{i}",
+            "lastname": f"Last{i}",
+            "email": f"player{i}@zewailcity.edu.eg",
+            "profileimage": "https://res.cloudinary.com/demo/image/upload/player.png",
+            "status": "active",
+            "teamname": f"Team {i % 16}",
+            "teamlogo": None,
+        }
+        for i in range(n)
+    ]
+
+def standings_rows(n: int) -> List[dict]:
+    return [
+        {
+            "standingid": i,
+            "groupid": i % 8,
+            "teamid": i,
+            "matchesplayed": 3,
+            "wins": 2,
+            "draws": 1,
+            "losses": 0,
+            "goalsfor": 7,
+            "goalsagainst": 2,
+            "goaldifference": 5,
+            "points": 7,
+            "teamname": f"Team {i}",
+            "teamlogo": None,
+            "groupname": f"Group {i % 8}",
+        }
+        for i in range(n)
+    ]
+
+_response_fields = {}
+
+def response_field(model):
+    """FastAPI builds one response field per route at startup; mirror that"""
+    if model not in _response_fields:
+        _response_fields[model] = create_model_field(name="Response", type_=List[model], mode="serialization")
+    return _response_fields[model]
+
+def revalidate(model, objects):
+    """The synchronous core of fastapi.routing.serialize_response (minus the threadpool hop)"""
+    field = response_field(model)
+    value, errors = field.validate(objects, {}, loc=("response",))
+    assert not errors
+    return field.serialize(value)
+
+def old_path(model, rows) -> bytes:
+    """Model per row in the handler, then response_model validation and stdlib JSON"""
+    objects = [model(**row) for row in rows]
+    return JSONResponse(revalidate(model, objects)).body
+
+def old_path_orjson(model, rows) -> bytes:
+    """Same double validation, but with the new default response class"""
+    objects = [model(**row) for row in rows]
+    return DefaultResponse(revalidate(model, objects)).body
+
+def fast_path(model, rows) -> bytes:
+    return serialize_rows(model, rows)
+
+def run(name: str, model, rows, repeats: int) -> None:
+    print(f"\n{name} ({len(rows)} rows, best of {repeats})")
+    baseline = None
+    for label, fn in (("old (double validation + json)", old_path), ("old + orjson", old_path_orjson), ("fast path", fast_path)):
+        best = min(timeit.repeat(lambda: fn(model, rows), number=1, repeat=repeats))
+        baseline = baseline or best
+        print(f"  {label:<32} {best * 1000:8.2f} ms  x{baseline / best:.1f}")
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    run("GET /players", PlayerWithUser, player_rows(n), repeats)
+    run("GET /standings", StandingsWithTeam, standings_rows(n), repeats)
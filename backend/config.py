@@ -29,6 +29,13 @@ class Settings(BaseModel):
 	# URL settings
 	frontend_base_url: str = os.getenv("FRONTEND_BASE_URL", os.getenv("PUBLIC_BASE_URL", "http://localhost:5173"))
 	backend_base_url: str = os.getenv("BACKEND_BASE_URL", "http://localhost:8000/api")
+	# Pub/sub between workers (cache invalidation, live matches); unset runs a single in-process worker
+	redis_url: str = os.getenv("REDIS_URL", "")
+	# Load shedding: requests handled at once per worker before new ones get 503
+	max_in_flight: int = int(os.getenv("MAX_IN_FLIGHT", "200"))
+	# Proxies in front of the app that append the client address to X-Forwarded-For; 0 trusts the socket address.
+	# Defaults to 1 on Azure App Service (which sets WEBSITE_SITE_NAME), where every request comes through its front end
+	trusted_proxy_hops: int = int(os.getenv("TRUSTED_PROXY_HOPS", "1" if os.getenv("WEBSITE_SITE_NAME") else "0"))
 
 settings = Settings()
 
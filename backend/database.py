@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 from config import settings
 
@@ -17,4 +17,35 @@ Base = declarative_base()
 def init_db() -> None:
 	# Import models so metadata is populated
 	import models  # noqa: F401
+	if engine.dialect.name == "postgresql":
+		enable_extensions()
 	Base.metadata.create_all(bind=engine)
+	ensure_indexes()
+
+def enable_extensions() -> None:
+	"""Postgres extensions used by declared indexes (pg_trgm powers the player name search)"""
+	try:
+		with engine.begin() as conn:
+			conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+	except Exception as e:
+		print(f"Warning: could not enable pg_trgm extension: {e}")
+
+def ensure_indexes() -> None:
+	"""create_all only builds indexes for tables it creates; add any declared index missing from existing tables"""
+	for table in Base.metadata.tables.values():
+		for index in table.indexes:
+			try:
+				index.create(bind=engine, checkfirst=True)
+			except Exception as e:
+				print(f"Warning: could not create index {index.name}: {e}")
+
+def dialect_insert(db):
+	"""
+	Dialect-specific INSERT construct for the session's engine, so callers can use
+	ON CONFLICT upserts. PostgreSQL and SQLite share the same on_conflict_* API.
+	"""
+	if db.get_bind().dialect.name == "postgresql":
+		from sqlalchemy.dialects.postgresql import insert
+	else:
+		from sqlalchemy.dialects.sqlite import insert
+	return insert
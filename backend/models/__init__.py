@@ -15,6 +15,15 @@ from models.goal import Goal
 from models.event import Event
 from models.join_request import JoinRequest
 from models.notification import Notification
+from models.team_version import TeamVersion
+from models.idempotency_key import IdempotencyKey
+from models.knockout_match import KnockoutMatch
+from models.team_rating import TeamRating
+from models.rating_change import RatingChange
+from models.tournament_player_stats import TournamentPlayerStats
+from models.match_appearance import MatchAppearance
+from models.match_event import MatchEvent
+from models.job_state import JobState
 
 __all__ = [
 	"User",
@@ -34,4 +43,13 @@ __all__ = [
 	"Event",
 	"JoinRequest",
 	"Notification",
+	"TeamVersion",
+	"IdempotencyKey",
+	"KnockoutMatch",
+	"TeamRating",
+	"RatingChange",
+	"TournamentPlayerStats",
+	"MatchAppearance",
+	"MatchEvent",
+	"JobState",
 ]
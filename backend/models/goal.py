@@ -6,7 +6,7 @@ class Goal(Base):
     __tablename__ = "goal"
 
     goalid = Column(Integer, primary_key=True, index=True)
-    matchid = Column(Integer, ForeignKey("match.matchid", ondelete="CASCADE"), nullable=False)
+    matchid = Column(Integer, ForeignKey("match.matchid", ondelete="CASCADE"), nullable=False, index=True)
     playerid = Column(Integer, ForeignKey("player.playerid", ondelete="CASCADE"), nullable=False)
     teamid = Column(Integer, ForeignKey("team.teamid", ondelete="CASCADE"), nullable=False)
     minute = Column(Integer, nullable=True)  # Minute when goal was scored
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, PrimaryKeyConstraint
+from sqlalchemy import Column, Integer, ForeignKey, PrimaryKeyConstraint, Index
 from database import Base
 
 class GroupTeams(Base):
@@ -9,4 +9,6 @@ class GroupTeams(Base):
 
 	__table_args__ = (
 		PrimaryKeyConstraint("groupid", "teamid"),
+		# The primary key serves group -> teams; this serves team -> groups
+		Index("ix_groupteams_team_group", "teamid", "groupid"),
 	)
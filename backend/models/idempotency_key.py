@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, PrimaryKeyConstraint
+from database import Base
+
+class IdempotencyKey(Base):
+	__tablename__ = "idempotencykey"
+
+	# One row per (user, Idempotency-Key header). While the first request runs the
+	# row is a claim (statuscode is NULL); afterwards it holds the stored response.
+	userid = Column(Integer, ForeignKey("users.userid", ondelete="CASCADE"), nullable=False)
+	key = Column(String(255), nullable=False)
+	fingerprint = Column(String(64), nullable=False)  # sha256 of method, path and body
+	token = Column(String(32), nullable=False)  # identifies the request holding the claim
+	statuscode = Column(Integer, nullable=True)
+	response = Column(Text, nullable=True)
+	createdat = Column(DateTime(timezone=False), nullable=False)
+	expiresat = Column(DateTime(timezone=False), nullable=False, index=True)
+
+	__table_args__ = (
+		PrimaryKeyConstraint("userid", "key"),
+	)
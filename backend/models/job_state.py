@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Text, DateTime
+from database import Base
+
+class JobState(Base):
+	__tablename__ = "jobstate"
+
+	# One row per scheduled maintenance job, shared by all workers
+	name = Column(String(100), primary_key=True)
+	nextrunat = Column(DateTime(timezone=False), nullable=False)
+	# Where an interrupted run resumes; NULL when no run is in progress
+	cursor = Column(String(255), nullable=True)
+	# Lease for databases without advisory locks (SQLite): the worker running the job and until when
+	lockedby = Column(String(32), nullable=True)
+	lockeduntil = Column(DateTime(timezone=False), nullable=True)
+	# Metrics
+	runs = Column(Integer, nullable=False, default=0)
+	failures = Column(Integer, nullable=False, default=0)
+	chunks = Column(BigInteger, nullable=False, default=0)
+	rows = Column(BigInteger, nullable=False, default=0)
+	laststartedat = Column(DateTime(timezone=False), nullable=True)
+	lastfinishedat = Column(DateTime(timezone=False), nullable=True)
+	lastduration = Column(Float, nullable=True)  # seconds
+	lastrows = Column(BigInteger, nullable=True)
+	lasterror = Column(Text, nullable=True)
+	lasterrorat = Column(DateTime(timezone=False), nullable=True)
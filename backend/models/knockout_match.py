@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from database import Base
+
+class KnockoutMatch(Base):
+	__tablename__ = "knockoutmatch"
+
+	# A match's place in a tournament's knockout bracket and where its winner goes next
+	matchid = Column(Integer, ForeignKey("match.matchid", ondelete="CASCADE"), primary_key=True)
+	tournamentid = Column(Integer, ForeignKey("tournament.tournamentid", ondelete="CASCADE"), nullable=False, index=True)
+	round = Column(String(50), nullable=False)
+	position = Column(Integer, nullable=False)  # 0-based order within the round, top of the bracket first
+	nextmatchid = Column(Integer, ForeignKey("match.matchid", ondelete="SET NULL"), nullable=True)
+	nextslot = Column(String(4), nullable=True)  # "home" or "away" side of the next match
@@ -1,14 +1,26 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, text
 from database import Base
 
 class Match(Base):
 	__tablename__ = "match"
 
 	matchid = Column(Integer, primary_key=True, index=True)
-	tournamentid = Column(Integer, ForeignKey("tournament.tournamentid", ondelete="CASCADE"), nullable=True)
+	tournamentid = Column(Integer, ForeignKey("tournament.tournamentid", ondelete="CASCADE"), nullable=True, index=True)
 	hometeamid = Column(Integer, ForeignKey("team.teamid"), nullable=True)
 	awayteamid = Column(Integer, ForeignKey("team.teamid"), nullable=True)
 	stadiumid = Column(Integer, ForeignKey("stadium.stadiumid"), nullable=True)
 	matchdate = Column(DateTime(timezone=False), nullable=False)
 	round = Column(String(50), nullable=False, default="Group")
 	status = Column(String(20), nullable=False, default="Upcoming")
+
+	__table_args__ = (
+		# A team's matches in date order (form, head-to-head, team pages), one index per side
+		Index("ix_match_home_date", "hometeamid", "matchdate"),
+		Index("ix_match_away_date", "awayteamid", "matchdate"),
+		# Only the Upcoming matches, in date order (next match, status scheduler); finished history stays out of it
+		Index(
+			"ix_match_upcoming_date", "matchdate",
+			postgresql_where=text("status = 'Upcoming'"),
+			sqlite_where=text("status = 'Upcoming'"),
+		),
+	)
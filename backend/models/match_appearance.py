@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from database import Base
+
+class MatchAppearance(Base):
+	__tablename__ = "matchappearance"
+
+	# Players credited with playing a match: the two rosters when its result was recorded
+	matchid = Column(Integer, ForeignKey("match.matchid", ondelete="CASCADE"), primary_key=True)
+	playerid = Column(Integer, ForeignKey("player.playerid", ondelete="CASCADE"), primary_key=True)
+	teamid = Column(Integer, ForeignKey("team.teamid", ondelete="SET NULL"), nullable=True)
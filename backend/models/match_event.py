@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from database import Base
+
+class MatchEvent(Base):
+	__tablename__ = "matchevent"
+
+	# Append-only log of what happened in a match. Rows are never updated or deleted
+	# by the API; a mistake is corrected by a "void" event pointing at the event it cancels.
+	eventid = Column(Integer, primary_key=True, index=True)
+	matchid = Column(Integer, ForeignKey("match.matchid", ondelete="CASCADE"), nullable=False)
+	eventtype = Column(String(20), nullable=False)  # goal, assist, yellow, red, substitution, mvp, void
+	playerid = Column(Integer, ForeignKey("player.playerid", ondelete="CASCADE"), nullable=True)
+	teamid = Column(Integer, ForeignKey("team.teamid", ondelete="SET NULL"), nullable=True)
+	minute = Column(Integer, nullable=True)
+	isowngoal = Column(Integer, nullable=False, default=0)
+	relatedplayerid = Column(Integer, ForeignKey("player.playerid", ondelete="SET NULL"), nullable=True)  # substitution: the player going off
+	relatedeventid = Column(Integer, ForeignKey("matchevent.eventid", ondelete="CASCADE"), nullable=True)  # void: the event it cancels
+	goalid = Column(Integer, ForeignKey("goal.goalid", ondelete="SET NULL"), nullable=True)  # goal: the goal row it recorded
+	createdby = Column(Integer, ForeignKey("users.userid", ondelete="SET NULL"), nullable=True)
+	createdat = Column(DateTime(timezone=True), server_default=func.now())
+
+	__table_args__ = (
+		# A match's timeline, in the order events were logged
+		Index("ix_matchevent_match", "matchid", "eventid"),
+		# An event can only be voided once
+		Index("uq_matchevent_related", "relatedeventid", unique=True),
+	)
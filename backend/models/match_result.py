@@ -5,7 +5,7 @@ class MatchResult(Base):
 	__tablename__ = "matchresult"
 
 	resultid = Column(Integer, primary_key=True, index=True)
-	matchid = Column(Integer, ForeignKey("match.matchid", ondelete="CASCADE"), nullable=True)
+	matchid = Column(Integer, ForeignKey("match.matchid", ondelete="CASCADE"), nullable=True, index=True)
 	homescore = Column(Integer, nullable=False, default=0)
 	awayscore = Column(Integer, nullable=False, default=0)
 	winnerteamid = Column(Integer, ForeignKey("team.teamid"), nullable=True)
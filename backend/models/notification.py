@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.sql import func
 from database import Base
 
@@ -15,4 +15,7 @@ class Notification(Base):
 	isread = Column(Boolean, nullable=False, default=False)
 	createdat = Column(DateTime(timezone=False), nullable=False, server_default=func.current_timestamp())
 
-
+	__table_args__ = (
+		# Lets the stale notification purge find old rows without scanning the table
+		Index("ix_notification_createdat", "createdat"),
+	)
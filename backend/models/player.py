@@ -6,9 +6,9 @@ class Player(Base):
 	__tablename__ = "player"
 
 	playerid = Column(Integer, primary_key=True, index=True)
-	userid = Column(Integer, ForeignKey("users.userid", ondelete="CASCADE"), nullable=True)
-	teamid = Column(Integer, ForeignKey("team.teamid", ondelete="SET NULL"), nullable=True)
-	position = Column(String(50), nullable=True)
+	userid = Column(Integer, ForeignKey("users.userid", ondelete="CASCADE"), nullable=True, index=True)
+	teamid = Column(Integer, ForeignKey("team.teamid", ondelete="SET NULL"), nullable=True, index=True)
+	position = Column(String(50), nullable=True, index=True)
 	jerseynumber = Column(Integer, nullable=True)
 	statsid = Column(Integer, ForeignKey("playerstats.statsid", ondelete="CASCADE"), nullable=True)
 	preferredfoot = Column(String(10), nullable=False, default="Right")
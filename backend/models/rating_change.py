@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey
+from database import Base
+
+class RatingChange(Base):
+	__tablename__ = "ratingchange"
+
+	# The rating points one result moved from the away team to the home team
+	# (negative if the away team gained), so the result can be taken back later
+	resultid = Column(Integer, ForeignKey("matchresult.resultid", ondelete="CASCADE"), primary_key=True)
+	matchid = Column(Integer, ForeignKey("match.matchid", ondelete="CASCADE"), nullable=True)
+	hometeamid = Column(Integer, ForeignKey("team.teamid", ondelete="CASCADE"), nullable=False)
+	awayteamid = Column(Integer, ForeignKey("team.teamid", ondelete="CASCADE"), nullable=False)
+	delta = Column(Float, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Computed
+from sqlalchemy import Column, Integer, ForeignKey, Computed, Index
 from database import Base
 
 class Standings(Base):
@@ -15,3 +15,8 @@ class Standings(Base):
 	goalsagainst = Column(Integer, nullable=False, default=0)
 	goaldifference = Column(Integer, Computed("goalsfor - goalsagainst"))
 	points = Column(Integer, nullable=False, default=0)
+
+	__table_args__ = (
+		# One row per team per group; result upserts conflict on this
+		Index("uq_standings_group_team", "groupid", "teamid", unique=True),
+	)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from database import Base
+
+class TeamRating(Base):
+	__tablename__ = "teamrating"
+
+	# Current Elo rating per team, kept up to date as results are posted
+	teamid = Column(Integer, ForeignKey("team.teamid", ondelete="CASCADE"), primary_key=True)
+	rating = Column(Float, nullable=False, default=1500.0, index=True)
+	matchesplayed = Column(Integer, nullable=False, default=0)
+	updatedat = Column(DateTime(timezone=False), nullable=False, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from database import Base
+
+class TeamVersion(Base):
+	__tablename__ = "teamversion"
+
+	# One row per team; version is bumped whenever the team's roster, matches or results change
+	teamid = Column(Integer, ForeignKey("team.teamid", ondelete="CASCADE"), primary_key=True)
+	version = Column(BigInteger, nullable=False, default=0)
+	updatedat = Column(DateTime(timezone=False), nullable=False, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from database import Base
 
 class TournamentGroup(Base):
@@ -7,3 +7,8 @@ class TournamentGroup(Base):
 	groupid = Column(Integer, primary_key=True, index=True)
 	tournamentid = Column(Integer, ForeignKey("tournament.tournamentid", ondelete="CASCADE"), nullable=True)
 	groupname = Column(String(50), nullable=False)
+
+	__table_args__ = (
+		# tournament -> groups, covering the group id for the team -> group index
+		Index("ix_tournamentgroup_tournament_group", "tournamentid", "groupid"),
+	)
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, ForeignKey, Index
+from database import Base
+
+class TournamentPlayerStats(Base):
+	__tablename__ = "tournamentplayerstats"
+
+	# Per-tournament player counters, kept up to date as results, goals and match events are recorded
+	tournamentid = Column(Integer, ForeignKey("tournament.tournamentid", ondelete="CASCADE"), primary_key=True)
+	playerid = Column(Integer, ForeignKey("player.playerid", ondelete="CASCADE"), primary_key=True)
+	teamid = Column(Integer, ForeignKey("team.teamid", ondelete="SET NULL"), nullable=True)  # team the player last appeared for in the tournament
+	matchesplayed = Column(Integer, nullable=False, default=0)
+	goals = Column(Integer, nullable=False, default=0)  # own goals not included
+	owngoals = Column(Integer, nullable=False, default=0)
+	mvpcount = Column(Integer, nullable=False, default=0)
+	assists = Column(Integer, nullable=False, default=0)
+	yellowcards = Column(Integer, nullable=False, default=0)
+	redcards = Column(Integer, nullable=False, default=0)
+
+	__table_args__ = (
+		# A player's tournaments for the profile page
+		Index("ix_tournamentplayerstats_player", "playerid", "tournamentid"),
+		# One index per leaderboard: a tournament's top N is a single backward range scan
+		Index("ix_tournamentplayerstats_goals", "tournamentid", "goals", "playerid"),
+		Index("ix_tournamentplayerstats_owngoals", "tournamentid", "owngoals", "playerid"),
+		Index("ix_tournamentplayerstats_mvpcount", "tournamentid", "mvpcount", "playerid"),
+	)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Index
 from sqlalchemy.sql import func
 from database import Base
 
@@ -16,6 +16,17 @@ class User(Base):
 	lastname = Column(String(50), nullable=True)
 	# Email verification fields
 	is_email_verified = Column(Boolean, nullable=False, default=False)
-	email_verification_token = Column(String(255), nullable=True)
+	# sha256 hex digest of the emailed token; the token itself is never stored
+	email_verification_token_hash = Column(String(64), nullable=True)
 	email_verification_expires = Column(DateTime(timezone=False), nullable=True)
 	last_verification_email_sent = Column(DateTime(timezone=False), nullable=True)
+
+	__table_args__ = (
+		# Pending registrations by verification expiry, for the reaper of abandoned accounts
+		Index("ix_users_status_verification_expires", "status", "email_verification_expires"),
+		# Verification links look their user up by digest
+		Index("uq_users_verification_token_hash", "email_verification_token_hash", unique=True),
+		# Trigram indexes for player name search (prefix ILIKE and fuzzy % matching); Postgres only
+		Index("ix_users_firstname_trgm", "firstname", postgresql_using="gin", postgresql_ops={"firstname": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+		Index("ix_users_lastname_trgm", "lastname", postgresql_using="gin", postgresql_ops={"lastname": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+	)
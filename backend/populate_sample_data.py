@@ -12,6 +12,7 @@ from sqlalchemy.orm import Session
 from database import SessionLocal
 import models
 from auth import get_password_hash
+from services.stats import apply_result_to_standings
 from datetime import datetime, timedelta
 import random
 
@@ -218,7 +219,7 @@ def create_sample_data():
                 db.add(result)
                 
                 # Update standings for this match result
-                update_standings_from_result(db, match, home_score, away_score)
+                apply_result_to_standings(db, match, home_score, away_score)
         
         db.commit()
         print(f"✅ Created match results for {len(completed_matches)} finished matches")
@@ -313,73 +314,5 @@ def create_sample_data():
     finally:
         db.close()
 
-def update_standings_from_result(db: Session, match: models.Match, home_score: int, away_score: int):
-    """Update standings for both teams based on match result"""
-    
-    # Find the group for this match (teams should be in the same group)
-    home_team_group = db.query(models.GroupTeams).filter(
-        models.GroupTeams.teamid == match.hometeamid
-    ).first()
-    
-    away_team_group = db.query(models.GroupTeams).filter(
-        models.GroupTeams.teamid == match.awayteamid
-    ).first()
-    
-    # Both teams should be in the same group
-    if not home_team_group or not away_team_group:
-        return  # Can't update standings if teams aren't in groups
-    
-    if home_team_group.groupid != away_team_group.groupid:
-        return  # Teams must be in the same group
-    
-    group_id = home_team_group.groupid
-    
-    # Get standings for home team
-    home_standing = db.query(models.Standings).filter(
-        models.Standings.groupid == group_id,
-        models.Standings.teamid == match.hometeamid
-    ).first()
-    
-    # Get standings for away team
-    away_standing = db.query(models.Standings).filter(
-        models.Standings.groupid == group_id,
-        models.Standings.teamid == match.awayteamid
-    ).first()
-    
-    if not home_standing or not away_standing:
-        return  # Standings should exist from initialization
-    
-    # Update home team standings
-    home_standing.matchesplayed += 1
-    home_standing.goalsfor += home_score
-    home_standing.goalsagainst += away_score
-    
-    # Update away team standings
-    away_standing.matchesplayed += 1
-    away_standing.goalsfor += away_score
-    away_standing.goalsagainst += home_score
-    
-    # Determine winner and update points
-    if home_score > away_score:
-        # Home team wins
-        home_standing.wins += 1
-        home_standing.points += 3
-        away_standing.losses += 1
-    elif away_score > home_score:
-        # Away team wins
-        away_standing.wins += 1
-        away_standing.points += 3
-        home_standing.losses += 1
-    else:
-        # Draw
-        home_standing.draws += 1
-        home_standing.points += 1
-        away_standing.draws += 1
-        away_standing.points += 1
-    
-    # Save changes
-    db.add(home_standing)
-    db.add(away_standing)
-
 if __name__ == "__main__":
     create_sample_data()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Rebuild the player statistics snapshots from the match records: the
+per-tournament counters (tournamentplayerstats) that back the leaderboards and
+profiles and, when run for all tournaments, the career totals in playerstats.
+Results, goals and match event batches keep both up to date as they are
+recorded; run this periodically (e.g. nightly from cron) to re-derive them from
+the event log, or after a manual data fix.
+
+Usage: python rebuild_tournament_player_stats.py [tournamentid]
+"""
+
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from database import SessionLocal, init_db
+from services.stats import backfill_player_stats, rebuild_tournament_player_stats
+
+def rebuild(tournamentid=None):
+    """Recount one tournament, or every tournament and the career totals when tournamentid is None"""
+    init_db()
+    db = SessionLocal()
+    try:
+        if tournamentid is not None:
+            count = rebuild_tournament_player_stats(db, tournamentid)
+            db.commit()
+            print(f"✓ Wrote {count} tournament player rows")
+            return True
+        counts = backfill_player_stats(db)
+        db.commit()
+        print(f"✓ Backfilled {counts['appearances']} appearances")
+        print(f"✓ Wrote {counts['tournament_rows']} tournament player rows")
+        print(f"✓ Recounted career totals for {counts['players']} players")
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Rebuild failed: {e}")
+        return False
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    tournamentid = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    print("🔄 Rebuilding player stats...")
+    success = rebuild(tournamentid)
+    sys.exit(0 if success else 1)
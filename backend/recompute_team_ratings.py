@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Rebuild the team Elo ratings (teamrating) and their history (ratingchange)
+from every match result, in match date order.
+Run once after deploying ratings to rate the existing results, and whenever
+results were corrected out of order and the exact history is wanted.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from database import SessionLocal, init_db
+from services.ratings import replay_ratings
+
+def recompute_team_ratings():
+    """Replay all results into fresh ratings"""
+    init_db()
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        count = replay_ratings(db)
+        db.commit()
+        print(f"✓ Rated {count} results in {time.perf_counter() - started:.2f}s")
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Rating replay failed: {e}")
+        return False
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print("🔄 Recomputing team ratings...")
+    success = recompute_team_ratings()
+    sys.exit(0 if success else 1)
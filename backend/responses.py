@@ -0,0 +1,44 @@
+from typing import Any, Dict, Iterable, List, Type
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+# Default response class for the app: orjson encodes several times faster than
+# the stdlib json module used by FastAPI's JSONResponse.
+DefaultResponse = ORJSONResponse
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+def type_adapter(tp: Any) -> TypeAdapter:
+	"""Return a cached TypeAdapter for tp. Building adapters is expensive, so do it once per type."""
+	adapter = _adapters.get(tp)
+	if adapter is None:
+		adapter = TypeAdapter(tp)
+		_adapters[tp] = adapter
+	return adapter
+
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+	return type_adapter(List[model])
+
+def serialize_rows(model: Type[BaseModel], rows: Iterable[Any]) -> bytes:
+	"""Validate rows (dicts, ORM objects or Row tuples with named columns) once and dump them straight to JSON bytes"""
+	adapter = list_adapter(model)
+	return adapter.dump_json(adapter.validate_python(list(rows), from_attributes=True))
+
+def serialize_object(model: Type[BaseModel], data: Any) -> bytes:
+	"""Validate a single object (usually a nested dict) once and dump it to JSON bytes"""
+	adapter = type_adapter(model)
+	return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+def json_response(content: bytes, status_code: int = 200) -> Response:
+	"""Wrap pre-serialized JSON bytes (e.g. from the cache) in a response"""
+	return Response(content=content, status_code=status_code, media_type="application/json")
+
+def rows_response(model: Type[BaseModel], rows: Iterable[Any], status_code: int = 200) -> Response:
+	"""
+	Build a JSON response for a list endpoint.
+	Returning a Response directly makes FastAPI skip its own response_model
+	validation, so each row is validated exactly once. Keep response_model on
+	the route for the OpenAPI schema.
+	"""
+	return json_response(serialize_rows(model, rows), status_code)
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from routers import users, admins, teams, playerstats, players, stadiums, tournaments, tournament_teams, tournament_groups, group_teams, standings, matches, match_results, goals, events, upload, auth, join_requests, notifications
+from routers import users, admins, teams, playerstats, players, stadiums, tournaments, tournament_teams, tournament_groups, group_teams, standings, matches, match_events, match_results, goals, events, upload, auth, join_requests, notifications, search, live, jobs
 
 api_router = APIRouter()
 
@@ -16,9 +16,13 @@ api_router.include_router(tournament_groups.router, prefix="/tournament-groups",
 api_router.include_router(group_teams.router, prefix="/group-teams", tags=["group-teams"])
 api_router.include_router(standings.router, prefix="/standings", tags=["standings"])
 api_router.include_router(matches.router, prefix="/matches", tags=["matches"])
+api_router.include_router(match_events.router, prefix="/matches", tags=["match-events"])
 api_router.include_router(match_results.router, prefix="/match-results", tags=["match-results"])
 api_router.include_router(goals.router)
 api_router.include_router(events.router, prefix="/events", tags=["events"])
 api_router.include_router(upload.router, prefix="/upload", tags=["upload"])
 api_router.include_router(join_requests.router, prefix="/join-requests", tags=["join-requests"])
 api_router.include_router(notifications.router, prefix="/notifications", tags=["notifications"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
+api_router.include_router(live.router, prefix="/live", tags=["live"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
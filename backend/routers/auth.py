@@ -1,5 +1,6 @@
 from datetime import timedelta, datetime
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import or_, update
 from sqlalchemy.orm import Session
 from deps import get_db
 import models
@@ -10,12 +11,20 @@ from auth import (
     get_password_hash, 
     create_access_token, 
     ACCESS_TOKEN_EXPIRE_MINUTES,
-    get_current_active_user
+    get_current_active_user,
+    hash_verification_token,
+    verification_token_matches
 )
 from services.email_service import email_service
+from services.team_version import bump_team_versions
+from services.player_search import invalidate_player_search
+from services.search_index import index_user
 
 router = APIRouter()
 
+# Minimum seconds between two verification emails to the same user
+RESEND_COOLDOWN_SECONDS = 60
+
 @router.post("/register", response_model=RegisterResponse)
 def register(request: RegisterRequest, db: Session = Depends(get_db)):
     """Register a new user"""
@@ -57,13 +66,14 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
         status="pending",  # Changed to pending until email verification
         profileimage="https://res.cloudinary.com/dns6zhmc2/image/upload/v1760475598/defaultPlayer_vnbpfb.png",  # Set default profile image from Cloudinary
         is_email_verified=False,
-        email_verification_token=verification_token,
+        email_verification_token_hash=hash_verification_token(verification_token),
         email_verification_expires=verification_expires
     )
     
     db.add(user)
     db.commit()
     db.refresh(user)
+    index_user(user)
 
     # Create Player record immediately with optional onboarding fields (once)
     existing_player = db.query(models.Player).filter(models.Player.userid == user.userid).first()
@@ -85,6 +95,7 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
             player.weight = request.weight
         db.add(player)
         db.commit()
+        invalidate_player_search()
     else:
         # If a player already exists, update fields only if provided in this registration
         player = existing_player
@@ -102,6 +113,7 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
         if updated:
             db.add(player)
             db.commit()
+            invalidate_player_search()
     
     # Send verification email
     email_sent = email_service.send_verification_email(
@@ -251,6 +263,8 @@ def update_current_user_profile(
     
     db.commit()
     db.refresh(current_user)
+    invalidate_player_search()
+    index_user(current_user)
     
     # Get user's team information if they are a player
     if current_user.role == "Player":
@@ -289,12 +303,12 @@ def update_current_user_profile(
 @router.post("/verify-email")
 def verify_email(token: str, db: Session = Depends(get_db)):
     """Verify user email with token"""
-    # Find user by verification token
+    # Find user by the token's digest (unique index); the stored digest is then compared in constant time
     user = db.query(models.User).filter(
-        models.User.email_verification_token == token
+        models.User.email_verification_token_hash == hash_verification_token(token)
     ).first()
     
-    if not user:
+    if not user or not verification_token_matches(token, user.email_verification_token_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid verification token"
@@ -317,7 +331,7 @@ def verify_email(token: str, db: Session = Depends(get_db)):
     # Update user status
     user.is_email_verified = True
     user.status = "active"
-    user.email_verification_token = None  # Clear the token
+    user.email_verification_token_hash = None  # Clear the token
     user.email_verification_expires = None  # Clear the expiration
     
     db.commit()
@@ -341,42 +355,50 @@ def verify_email(token: str, db: Session = Depends(get_db)):
 @router.post("/resend-verification")
 def resend_verification_email(email: str, db: Session = Depends(get_db)):
     """Resend verification email with 1-minute cooldown"""
-    # Find user by email
-    user = db.query(models.User).filter(models.User.email == email).first()
-    
-    if not user:
-        # Don't reveal if email exists or not for security
-        return {"message": "If the email exists and is not verified, a verification email has been sent."}
-    
-    # Check if already verified
-    if user.is_email_verified:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email address is already verified"
-        )
-    
-    # Check cooldown period (1 minute)
-    current_time = datetime.utcnow()
-    if user.last_verification_email_sent:
-        time_since_last_email = current_time - user.last_verification_email_sent
-        if time_since_last_email.total_seconds() < 60:  # 1 minute cooldown
-            remaining_seconds = 60 - int(time_since_last_email.total_seconds())
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail=f"Please wait {remaining_seconds} seconds before requesting another verification email."
-            )
-    
     # Generate new verification token and expiration
+    current_time = datetime.utcnow()
     verification_token = email_service.generate_verification_token()
     verification_expires = current_time + timedelta(hours=24)
     
-    # Update user with new token and timestamp
-    user.email_verification_token = verification_token
-    user.email_verification_expires = verification_expires
-    user.last_verification_email_sent = current_time
-    
+    # Claim the send with one conditional UPDATE of the user's row (found by the unique
+    # email index): it only succeeds for an unverified user past the cooldown, so
+    # concurrent requests can't both pass the check and send two emails
+    user = db.execute(
+        update(models.User).where(
+            models.User.email == email,
+            models.User.is_email_verified.is_(False),
+            or_(
+                models.User.last_verification_email_sent.is_(None),
+                models.User.last_verification_email_sent <= current_time - timedelta(seconds=RESEND_COOLDOWN_SECONDS),
+            ),
+        ).values(
+            email_verification_token_hash=hash_verification_token(verification_token),
+            email_verification_expires=verification_expires,
+            last_verification_email_sent=current_time,
+        ).returning(models.User.email, models.User.firstname)
+    ).first()
     db.commit()
     
+    if not user:
+        # Only now read why: unknown email, already verified or still cooling down
+        existing = db.query(models.User.is_email_verified, models.User.last_verification_email_sent).filter(
+            models.User.email == email
+        ).first()
+        if not existing:
+            # Don't reveal if email exists or not for security
+            return {"message": "If the email exists and is not verified, a verification email has been sent."}
+        if existing.is_email_verified:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email address is already verified"
+            )
+        time_since_last_email = current_time - existing.last_verification_email_sent
+        remaining_seconds = max(1, RESEND_COOLDOWN_SECONDS - int(time_since_last_email.total_seconds()))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Please wait {remaining_seconds} seconds before requesting another verification email."
+        )
+    
     # Send verification email
     email_sent = email_service.send_verification_email(
         recipient_email=user.email,
@@ -406,6 +428,7 @@ def delete_account(current_user: models.User = Depends(get_current_active_user),
                 if team and team.teamcaptainid == player.playerid:
                     raise HTTPException(status_code=400, detail="Disband or transfer captaincy before deleting your account.")
                 # Remove team membership
+                bump_team_versions(db, player.teamid)
                 player.teamid = None
                 db.add(player)
 
@@ -422,6 +445,8 @@ def delete_account(current_user: models.User = Depends(get_current_active_user),
         current_user.passwordhash = get_password_hash("deleted_account_placeholder_password")
         db.add(current_user)
         db.commit()
+        invalidate_player_search()
+        index_user(current_user)
     except Exception:
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to delete account")
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from deps import get_db
 import models
 from schemas import Event as EventSchema, EventCreate, EventUpdate
+from services.search_index import index_event, unindex
 
 router = APIRouter()
 
@@ -17,6 +18,7 @@ def create_event(payload: EventCreate, db: Session = Depends(get_db)):
 	db.add(event)
 	db.commit()
 	db.refresh(event)
+	index_event(event)
 	return event
 
 @router.get("/{eventid}", response_model=EventSchema)
@@ -36,6 +38,7 @@ def update_event(eventid: int, payload: EventUpdate, db: Session = Depends(get_d
 	db.add(event)
 	db.commit()
 	db.refresh(event)
+	index_event(event)
 	return event
 
 @router.delete("/{eventid}", status_code=204)
@@ -45,4 +48,5 @@ def delete_event(eventid: int, db: Session = Depends(get_db)):
 		raise HTTPException(404, "Event not found")
 	db.delete(event)
 	db.commit()
+	unindex("event", eventid)
 	return None
@@ -4,6 +4,11 @@ from typing import List
 from deps import get_db
 import models, schemas
 from auth import require_organizer_or_admin
+from services.cache import invalidate_tournament
+from services.team_version import bump_team_versions
+from services.stats import apply_player_goals
+from services.idempotency import IdempotentRequest, idempotent_request
+from services.live import live_hub
 
 router = APIRouter(prefix="/goals", tags=["goals"])
 
@@ -42,8 +47,11 @@ def get_match_goals(match_id: int, db: Session = Depends(get_db)):
     return goals_with_players
 
 @router.post("/", response_model=schemas.goal.Goal)
-def create_goal(goal: schemas.goal.GoalCreate, db: Session = Depends(get_db), current_user: models.User = Depends(require_organizer_or_admin)):
+def create_goal(goal: schemas.goal.GoalCreate, db: Session = Depends(get_db), current_user: models.User = Depends(require_organizer_or_admin), idempotency: IdempotentRequest = Depends(idempotent_request)):
     """Create a new goal record"""
+    # A retried request (same Idempotency-Key) gets the original response instead of counting the goal twice
+    if idempotency.replay is not None:
+        return idempotency.replay
     
     # Verify the match exists
     match = db.query(models.Match).filter(models.Match.matchid == goal.matchid).first()
@@ -61,11 +69,15 @@ def create_goal(goal: schemas.goal.GoalCreate, db: Session = Depends(get_db), cu
     # Create the goal
     db_goal = models.Goal(**goal.dict())
     db.add(db_goal)
+    # Update player stats in the same transaction
+    apply_player_goals(db, [db_goal], tournamentid=match.tournamentid)
+    bump_team_versions(db, match.hometeamid, match.awayteamid)
+    db.flush()
+    idempotency.save(db, schemas.goal.Goal, db_goal, 200)
     db.commit()
     db.refresh(db_goal)
-    
-    # Update player stats
-    update_player_goal_stats(db, goal.playerid, goal.isowngoal)
+    invalidate_tournament(match.tournamentid)
+    live_hub.mark_stale(match.matchid)
     
     return db_goal
 
@@ -76,47 +88,15 @@ def delete_goal(goal_id: int, db: Session = Depends(get_db), current_user: model
     if not goal:
         raise HTTPException(status_code=404, detail="Goal not found")
     
+    match = db.query(models.Match).filter(models.Match.matchid == goal.matchid).first()
     # Update player stats (subtract the goal)
-    update_player_goal_stats(db, goal.playerid, goal.isowngoal, subtract=True)
+    apply_player_goals(db, [goal], subtract=True, tournamentid=match.tournamentid if match else None)
     
     db.delete(goal)
+    if match:
+        bump_team_versions(db, match.hometeamid, match.awayteamid)
     db.commit()
+    invalidate_tournament(match.tournamentid if match else None)
+    live_hub.mark_stale(goal.matchid)
     
     return {"message": "Goal deleted successfully"}
-
-def update_player_goal_stats(db: Session, player_id: int, is_own_goal: int, subtract: bool = False):
-    """Update player goal statistics"""
-    player = db.query(models.Player).filter(models.Player.playerid == player_id).first()
-    if not player:
-        return
-    
-    # Get or create player stats
-    stats = db.query(models.PlayerStats).filter(models.PlayerStats.statsid == player.statsid).first()
-    if not stats:
-        # Create new stats record
-        stats = models.PlayerStats(
-            matchesplayed=0,
-            goals=0,
-            assists=0,
-            yellowcards=0,
-            redcards=0,
-            mvpcount=0,
-            ratingaverage=0
-        )
-        db.add(stats)
-        db.commit()
-        db.refresh(stats)
-        
-        # Update player with stats ID
-        player.statsid = stats.statsid
-        db.commit()
-    
-    # Update goal count
-    if is_own_goal == 0:  # Regular goal
-        if subtract:
-            stats.goals = max(0, stats.goals - 1)
-        else:
-            stats.goals += 1
-    # Note: Own goals don't count towards player's goal tally
-    
-    db.commit()
@@ -5,6 +5,8 @@ from deps import get_db
 import models
 from schemas import GroupTeams as GroupTeamsSchema, GroupTeamsCreate
 from auth import require_organizer_or_admin
+from services.cache import invalidate_group
+from services.stats import ensure_standings
 
 router = APIRouter()
 
@@ -16,11 +18,11 @@ def list_group_teams(db: Session = Depends(get_db)):
 def create_group_team(payload: GroupTeamsCreate, db: Session = Depends(get_db), current_user: models.User = Depends(require_organizer_or_admin)):
 	group_team = models.GroupTeams(**payload.model_dump())
 	db.add(group_team)
+	# Initialize standings for the team in this group
+	ensure_standings(db, payload.groupid, payload.teamid)
 	db.commit()
 	db.refresh(group_team)
-	
-	# Initialize standings for the team in this group
-	initialize_team_standings(db, payload.groupid, payload.teamid)
+	invalidate_group(payload.groupid)
 	
 	return group_team
 
@@ -34,29 +36,5 @@ def delete_group_team(groupid: int, teamid: int, db: Session = Depends(get_db),
 		raise HTTPException(404, "Group team not found")
 	db.delete(group_team)
 	db.commit()
+	invalidate_group(groupid)
 	return None
-
-def initialize_team_standings(db: Session, group_id: int, team_id: int):
-	"""Initialize standings record for a team when assigned to a group"""
-	
-	# Check if standings already exist
-	existing_standing = db.query(models.Standings).filter(
-		models.Standings.groupid == group_id,
-		models.Standings.teamid == team_id
-	).first()
-	
-	if not existing_standing:
-		# Create new standings record
-		standing = models.Standings(
-			groupid=group_id,
-			teamid=team_id,
-			matchesplayed=0,
-			wins=0,
-			draws=0,
-			losses=0,
-			goalsfor=0,
-			goalsagainst=0,
-			points=0
-		)
-		db.add(standing)
-		db.commit()
@@ -0,0 +1,45 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from deps import get_db
+import models
+from schemas import Job as JobSchema
+from auth import require_admin
+from services.jobs import scheduler
+
+router = APIRouter()
+
+@router.get("", response_model=List[JobSchema])
+def list_jobs(db: Session = Depends(get_db), current_user: models.User = Depends(require_admin)):
+	"""Maintenance jobs with their schedules and run metrics"""
+	states = {state.name: state for state in db.query(models.JobState).all()}
+	jobs = []
+	for job in scheduler.jobs.values():
+		state = states.get(job.name)
+		if state is None:
+			continue
+		jobs.append({
+			"name": job.name,
+			"description": job.description,
+			"schedule": job.schedule.expression,
+			"nextrunat": state.nextrunat,
+			"running": state.cursor is not None,
+			"runs": state.runs,
+			"failures": state.failures,
+			"chunks": state.chunks,
+			"rows": state.rows,
+			"laststartedat": state.laststartedat,
+			"lastfinishedat": state.lastfinishedat,
+			"lastduration": state.lastduration,
+			"lastrows": state.lastrows,
+			"lasterror": state.lasterror,
+			"lasterrorat": state.lasterrorat,
+		})
+	return jobs
+
+@router.post("/{name}/run", status_code=202)
+def run_job(name: str, db: Session = Depends(get_db), current_user: models.User = Depends(require_admin)):
+	"""Make a job due now; a worker picks it up at its next poll"""
+	if name not in scheduler.jobs or not scheduler.request_run(db, name):
+		raise HTTPException(404, "Job not found")
+	return {"message": f"Job {name} will run shortly"}
@@ -6,7 +6,9 @@ from sqlalchemy.orm import Session
 from deps import get_db
 import models
 from schemas.join_request import JoinRequest as JoinRequestSchema, JoinRequestCreate, JoinRequestRespond
-from auth import require_authenticated_user
+from auth import Identity, get_active_identity, require_authenticated_user
+from services.team_version import bump_team_versions
+from services.player_search import invalidate_player_search
 
 
 router = APIRouter()
@@ -92,15 +94,10 @@ def create_join_request(payload: JoinRequestCreate, db: Session = Depends(get_db
 
 
 @router.post("/invite/{userid}", response_model=JoinRequestSchema, status_code=201)
-def invite_player(userid: int, db: Session = Depends(get_db), current_user: models.User = Depends(require_authenticated_user)):
+def invite_player(userid: int, db: Session = Depends(get_db), identity: Identity = Depends(get_active_identity)):
 	"""Captain invites a user to his team -> creates a pending request with source='captain'."""
 	# Ensure current user is captain of some team
-	inviter_player = db.query(models.Player).filter(models.Player.userid == current_user.userid).first()
-	if not inviter_player or not inviter_player.teamid:
-		raise HTTPException(403, "Only team captains can invite players")
-	team = db.query(models.Team).filter(models.Team.teamid == inviter_player.teamid).first()
-	if not team or team.teamcaptainid != inviter_player.playerid:
-		raise HTTPException(403, "Only team captains can invite players")
+	team = identity.captain_team("Only team captains can invite players")
 
 	# Validate invitee user exists
 	invitee_user = db.query(models.User).filter(models.User.userid == userid).first()
@@ -155,17 +152,21 @@ def invite_player(userid: int, db: Session = Depends(get_db), current_user: mode
 
 
 @router.post("/{requestid}/respond", response_model=JoinRequestSchema)
-def respond_join_request(requestid: int, payload: JoinRequestRespond, db: Session = Depends(get_db), current_user: models.User = Depends(require_authenticated_user)):
+def respond_join_request(requestid: int, payload: JoinRequestRespond, db: Session = Depends(get_db), identity: Identity = Depends(get_active_identity)):
+	current_user = identity.user
 	jr = db.query(models.JoinRequest).filter(models.JoinRequest.requestid == requestid).first()
 	if not jr:
 		raise HTTPException(404, "Join request not found")
 
-	team = db.query(models.Team).filter(models.Team.teamid == jr.teamid).first()
+	# A captain responding to their own team's request already has the team loaded
+	team = identity.team
+	if team is None or team.teamid != jr.teamid:
+		team = db.query(models.Team).filter(models.Team.teamid == jr.teamid).first()
 	if not team:
 		raise HTTPException(404, "Team not found")
 	# Permission: if this is a player-originated request, only captain can respond.
 	# If this is a captain-originated invite (source='captain'), the invitee (requester_userid) can respond.
-	player = db.query(models.Player).filter(models.Player.userid == current_user.userid).first()
+	player = identity.player
 	is_captain = bool(player and team.teamcaptainid == player.playerid)
 	is_invitee = (jr.source == "captain" and jr.requester_userid == current_user.userid)
 	if not (is_captain or is_invitee):
@@ -196,6 +197,7 @@ def respond_join_request(requestid: int, payload: JoinRequestRespond, db: Sessio
 		if req_player.teamid:
 			raise HTTPException(400, "Requester is already in a team")
 		req_player.teamid = team.teamid
+		bump_team_versions(db, team.teamid)
 		jr.status = "approved"
 	elif action == "deny":
 		jr.status = "denied"
@@ -210,7 +212,9 @@ def respond_join_request(requestid: int, payload: JoinRequestRespond, db: Sessio
 
 	# Identify captain user for notifications
 	captain_userid = None
-	if team.teamcaptainid is not None:
+	if is_captain:
+		captain_userid = current_user.userid
+	elif team.teamcaptainid is not None:
 		captain_player = db.query(models.Player).filter(models.Player.playerid == team.teamcaptainid).first()
 		if captain_player:
 			captain_userid = captain_player.userid
@@ -254,7 +258,7 @@ def respond_join_request(requestid: int, payload: JoinRequestRespond, db: Sessio
 	# Additionally, notify captain when invitee responds to an invite (source='captain')
 	if jr.source == "captain" and captain_userid is not None:
 		# current_user is the invitee in this flow
-		actor_user = db.query(models.User).filter(models.User.userid == current_user.userid).first()
+		actor_user = current_user
 		actor_name = (actor_user.firstname or "").strip() if actor_user else "Player"
 		if actor_user and actor_user.lastname:
 			actor_name = (actor_name + " " + actor_user.lastname).strip()
@@ -278,6 +282,8 @@ def respond_join_request(requestid: int, payload: JoinRequestRespond, db: Sessio
 	db.add(jr)
 	db.commit()
 	db.refresh(jr)
+	if jr.status == "approved":
+		invalidate_player_search()
 	return jr
 
 
@@ -0,0 +1,94 @@
+import asyncio
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from deps import get_db
+import models
+from database import SessionLocal
+from schemas import LiveMatch, LiveUpdate
+from auth import require_organizer_or_admin
+from responses import rows_response, serialize_object, json_response
+from services.live import LiveError, live_hub, match_channel, tournament_channel
+
+router = APIRouter()
+
+@router.get("/matches", response_model=List[LiveMatch])
+def list_live_matches(tournamentid: Optional[int] = None, db: Session = Depends(get_db)):
+	"""Scores of every live match (optionally of one tournament), served from memory"""
+	return rows_response(LiveMatch, live_hub.snapshots(db, tournamentid))
+
+@router.get("/matches/{matchid}", response_model=LiveMatch)
+def get_live_match(matchid: int, db: Session = Depends(get_db)):
+	live = live_hub.state(db, matchid)
+	if live is None:
+		raise HTTPException(404, "Match is not live")
+	return json_response(serialize_object(LiveMatch, live.snapshot()))
+
+@router.post("/matches/{matchid}", response_model=LiveMatch)
+def push_live_update(matchid: int, payload: LiveUpdate, db: Session = Depends(get_db), current_user: models.User = Depends(require_organizer_or_admin)):
+	"""
+	Push the minute and/or new events of a live match. Spectators get them at
+	once; the events are written to the match log on the next flush.
+	"""
+	if live_hub.state(db, matchid) is None:
+		raise HTTPException(409, "Match is not live")
+	try:
+		snapshot = live_hub.push(db, matchid, payload.events, payload.minute, current_user.userid)
+	except LiveError as e:
+		raise HTTPException(400, str(e))
+	return json_response(serialize_object(LiveMatch, snapshot))
+
+def _initial_snapshots(matchid: Optional[int], tournamentid: Optional[int]) -> List[dict]:
+	db = SessionLocal()
+	try:
+		if matchid is not None:
+			live = live_hub.state(db, matchid)
+			return [live.snapshot()] if live is not None else []
+		return live_hub.snapshots(db, tournamentid)
+	finally:
+		db.close()
+
+@router.websocket("/ws")
+async def live_socket(websocket: WebSocket, matchid: Optional[int] = None, tournamentid: Optional[int] = None):
+	"""
+	Follow one match (?matchid=) or every live match of a tournament
+	(?tournamentid=). Sends a snapshot per match first, then every update as
+	it is pushed.
+	"""
+	await websocket.accept()
+	if matchid is None and tournamentid is None:
+		await websocket.close(code=1008, reason="matchid or tournamentid is required")
+		return
+	channel = match_channel(matchid) if matchid is not None else tournament_channel(tournamentid)
+	# Subscribe before taking the snapshot so nothing falls in between; clients skip messages with an older seq
+	subscription = live_hub.subscribe([channel])
+	receiver = asyncio.create_task(websocket.receive_text())
+	getter = None
+	try:
+		for snapshot in await run_in_threadpool(_initial_snapshots, matchid, tournamentid):
+			await websocket.send_json({"type": "snapshot", **snapshot})
+		while True:
+			if getter is None:
+				getter = asyncio.create_task(subscription.get())
+			done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+			if receiver in done:
+				if receiver.exception() is not None:
+					# The client went away
+					break
+				# Anything a client sends (keepalives) is ignored
+				receiver = asyncio.create_task(websocket.receive_text())
+			if getter in done:
+				message = getter.result()
+				getter = None
+				if message is None:
+					await websocket.close(code=1013, reason="Too far behind; reconnect for a fresh snapshot")
+					break
+				await websocket.send_text(message)
+	except WebSocketDisconnect:
+		pass
+	finally:
+		receiver.cancel()
+		if getter is not None:
+			getter.cancel()
+		live_hub.unsubscribe(subscription)
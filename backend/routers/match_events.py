@@ -0,0 +1,52 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from deps import get_db
+import models
+from schemas import MatchEvent as MatchEventSchema, MatchEventBatchCreate, MatchEventBatch
+from auth import require_organizer_or_admin
+from responses import rows_response
+from services.cache import invalidate_tournament, invalidate_team
+from services.team_version import bump_team_versions
+from services.idempotency import IdempotentRequest, idempotent_request
+from services.match_events import MatchEventError, match_timeline, record_match_events
+from services.live import live_hub
+
+router = APIRouter()
+
+@router.get("/{matchid}/events", response_model=List[MatchEventSchema])
+def list_match_events(matchid: int, db: Session = Depends(get_db)):
+	if not db.query(models.Match.matchid).filter(models.Match.matchid == matchid).first():
+		raise HTTPException(404, "Match not found")
+	return rows_response(MatchEventSchema, match_timeline(db, matchid))
+
+@router.post("/{matchid}/events", response_model=MatchEventBatch, status_code=201)
+def record_events(matchid: int, payload: MatchEventBatchCreate, db: Session = Depends(get_db), current_user: models.User = Depends(require_organizer_or_admin), idempotency: IdempotentRequest = Depends(idempotent_request)):
+	"""Append a batch of events to the match log; the whole batch is recorded or none of it"""
+	# A retried batch (same Idempotency-Key) gets the original response instead of being logged twice
+	if idempotency.replay is not None:
+		return idempotency.replay
+
+	match = db.query(models.Match).filter(models.Match.matchid == matchid).first()
+	if not match:
+		raise HTTPException(404, "Match not found")
+	try:
+		events = record_match_events(db, match, payload.events, current_user.userid)
+	except MatchEventError as e:
+		db.rollback()
+		raise HTTPException(400, str(e))
+	bump_team_versions(db, match.hometeamid, match.awayteamid)
+	db.flush()
+	response = {"matchid": matchid, "events": events}
+	idempotency.save(db, MatchEventBatch, response, 201)
+	try:
+		db.commit()
+	except IntegrityError:
+		# uq_matchevent_related: another request voided one of these events first
+		db.rollback()
+		raise HTTPException(409, "An event in this batch was voided by another request; reload the timeline and retry")
+	invalidate_tournament(match.tournamentid)
+	invalidate_team(match.hometeamid, match.awayteamid)
+	live_hub.mark_stale(matchid)
+	return response
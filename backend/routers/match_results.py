@@ -1,10 +1,19 @@
-from typing import List
+from collections import Counter
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from deps import get_db
 import models
 from schemas import MatchResult as MatchResultSchema, MatchResultCreate, MatchResultUpdate
+from schemas.match_result import GoalScorer
 from auth import require_organizer_or_admin, require_authenticated_user
+from services.cache import invalidate_tournament, invalidate_team
+from services.team_version import bump_team_versions
+from services.stats import apply_match_appearances, apply_mvp_award, apply_player_goals, apply_result_to_standings, remove_match_appearances
+from services.idempotency import IdempotentRequest, idempotent_request
+from services.bracket import advance_knockout_winner
+from services.ratings import apply_result_rating, revert_result_rating, update_result_rating
+from services.live import live_hub
 
 router = APIRouter()
 
@@ -13,54 +22,90 @@ def list_results(db: Session = Depends(get_db)):
 	return db.query(models.MatchResult).all()
 
 @router.post("", response_model=MatchResultSchema, status_code=201)
-def create_result(payload: MatchResultCreate, db: Session = Depends(get_db), current_user: models.User = Depends(require_organizer_or_admin)):
+def create_result(payload: MatchResultCreate, db: Session = Depends(get_db), current_user: models.User = Depends(require_organizer_or_admin), idempotency: IdempotentRequest = Depends(idempotent_request)):
+	# A retried request (same Idempotency-Key) gets the original response instead of counting the result twice
+	if idempotency.replay is not None:
+		return idempotency.replay
+	
 	# Get the match to find teams and group
 	match = db.query(models.Match).filter(models.Match.matchid == payload.matchid).first()
 	if not match:
 		raise HTTPException(404, "Match not found")
+	was_live = match.status == "Live"
+	if was_live:
+		# Events pushed live (on any worker) are written first, so their goals count before the result
+		live_hub.flush_everywhere(match.matchid)
+		# A final result ends the match: later pushes are refused instead of landing after it
+		match.status = "Finished"
 	
 	# Create the match result (excluding goal scorers from the main result)
 	result_data = payload.model_dump(exclude={'home_goal_scorers', 'away_goal_scorers'})
 	result = models.MatchResult(**result_data)
 	db.add(result)
-	db.commit()
-	db.refresh(result)
 	
-	# Create goal records for home team
-	if payload.home_goal_scorers:
-		for goal_scorer in payload.home_goal_scorers:
-			goal = models.Goal(
+	# Create goal records for both teams, skipping the ones already recorded
+	# (pushed live or through the goals endpoint): the result form always sends
+	# its full scorer lists, and adding those again would count them twice
+	goals = []
+	for team_id, scorers in ((match.hometeamid, payload.home_goal_scorers), (match.awayteamid, payload.away_goal_scorers)):
+		for goal_scorer in missing_scorers(db, match.matchid, team_id, scorers or []):
+			goals.append(models.Goal(
 				matchid=payload.matchid,
 				playerid=goal_scorer.playerid,
-				teamid=match.hometeamid,
+				teamid=team_id,
 				minute=goal_scorer.minute,
 				isowngoal=goal_scorer.isowngoal or 0
-			)
-			db.add(goal)
-			# Update player stats
-			update_player_goal_stats(db, goal_scorer.playerid, goal_scorer.isowngoal or 0)
-	
-	# Create goal records for away team
-	if payload.away_goal_scorers:
-		for goal_scorer in payload.away_goal_scorers:
-			goal = models.Goal(
-				matchid=payload.matchid,
-				playerid=goal_scorer.playerid,
-				teamid=match.awayteamid,
-				minute=goal_scorer.minute,
-				isowngoal=goal_scorer.isowngoal or 0
-			)
-			db.add(goal)
-			# Update player stats
-			update_player_goal_stats(db, goal_scorer.playerid, goal_scorer.isowngoal or 0)
-	
+			))
+	db.add_all(goals)
+	
+	# Player tallies and standings are updated atomically in the database, and
+	# everything commits together so a failed request leaves no partial counts
+	apply_player_goals(db, goals, tournamentid=match.tournamentid)
+	apply_mvp_award(db, match.tournamentid, result.mvpplayerid)
+	apply_result_to_standings(db, match, payload.homescore, payload.awayscore)
+	# Knockout matches send their winner on to the next round
+	advance_knockout_winner(db, match, result)
+	bump_team_versions(db, match.hometeamid, match.awayteamid)
+	db.flush()
+	apply_match_appearances(db, match)
+	apply_result_rating(db, match, result)
+	idempotency.save(db, MatchResultSchema, result, 201)
 	db.commit()
-	
-	# Update standings for both teams
-	update_standings_from_result(db, match, payload.homescore, payload.awayscore)
+	db.refresh(result)
+	invalidate_tournament(match.tournamentid)
+	invalidate_team(match.hometeamid, match.awayteamid)
+	if was_live:
+		# Drop it from memory and tell spectators it is over; it is no longer Live, so further pushes are refused
+		live_hub.end(match.matchid)
 	
 	return result
 
+def missing_scorers(db: Session, matchid: int, teamid: Optional[int], scorers: List[GoalScorer]) -> List[GoalScorer]:
+	"""
+	The scorers of one team that have no goal recorded for the match yet,
+	pairing each recorded goal with one scorer of the same player and kind.
+	409 if the team has recorded goals the list leaves out; an empty list
+	keeps whatever is recorded.
+	"""
+	if not scorers:
+		return []
+	recorded = Counter(
+		(row.playerid, row.isowngoal or 0)
+		for row in db.query(models.Goal.playerid, models.Goal.isowngoal).filter(
+			models.Goal.matchid == matchid, models.Goal.teamid == teamid
+		).all()
+	)
+	missing = []
+	for scorer in scorers:
+		key = (scorer.playerid, scorer.isowngoal or 0)
+		if recorded[key] > 0:
+			recorded[key] -= 1
+		else:
+			missing.append(scorer)
+	if any(count > 0 for count in recorded.values()):
+		raise HTTPException(409, "Goals already recorded for this match are missing from the scorers sent")
+	return missing
+
 @router.get("/{resultid}", response_model=MatchResultSchema)
 def get_result(resultid: int, db: Session = Depends(get_db)):
 	result = db.query(models.MatchResult).filter(models.MatchResult.resultid == resultid).first()
@@ -73,11 +118,25 @@ def update_result(resultid: int, payload: MatchResultUpdate, db: Session = Depen
 	result = db.query(models.MatchResult).filter(models.MatchResult.resultid == resultid).first()
 	if not result:
 		raise HTTPException(404, "Result not found")
+	previous_score = (result.homescore, result.awayscore)
+	previous_mvp = result.mvpplayerid
 	for field, value in payload.model_dump(exclude_unset=True).items():
 		setattr(result, field, value)
 	db.add(result)
+	match = db.query(models.Match).filter(models.Match.matchid == result.matchid).first()
+	if match:
+		advance_knockout_winner(db, match, result)
+		if (result.homescore, result.awayscore) != previous_score:
+			update_result_rating(db, match, result)
+		if result.mvpplayerid != previous_mvp:
+			apply_mvp_award(db, match.tournamentid, previous_mvp, subtract=True)
+			apply_mvp_award(db, match.tournamentid, result.mvpplayerid)
+		bump_team_versions(db, match.hometeamid, match.awayteamid)
 	db.commit()
 	db.refresh(result)
+	invalidate_tournament(match.tournamentid if match else None)
+	if match:
+		invalidate_team(match.hometeamid, match.awayteamid)
 	return result
 
 @router.delete("/{resultid}", status_code=204)
@@ -85,137 +144,16 @@ def delete_result(resultid: int, db: Session = Depends(get_db), current_user: mo
 	result = db.query(models.MatchResult).filter(models.MatchResult.resultid == resultid).first()
 	if not result:
 		raise HTTPException(404, "Result not found")
+	match = db.query(models.Match).filter(models.Match.matchid == result.matchid).first()
+	revert_result_rating(db, result.resultid)
 	db.delete(result)
+	if match:
+		apply_mvp_award(db, match.tournamentid, result.mvpplayerid, subtract=True)
+		remove_match_appearances(db, match)
+		advance_knockout_winner(db, match, None)
+		bump_team_versions(db, match.hometeamid, match.awayteamid)
 	db.commit()
+	invalidate_tournament(match.tournamentid if match else None)
+	if match:
+		invalidate_team(match.hometeamid, match.awayteamid)
 	return None
-
-def update_standings_from_result(db: Session, match: models.Match, home_score: int, away_score: int):
-	"""Update standings for both teams based on match result"""
-	
-	# Find the group for this match (teams should be in the same group)
-	home_team_group = db.query(models.GroupTeams).filter(
-		models.GroupTeams.teamid == match.hometeamid
-	).first()
-	
-	away_team_group = db.query(models.GroupTeams).filter(
-		models.GroupTeams.teamid == match.awayteamid
-	).first()
-	
-	# Both teams should be in the same group
-	if not home_team_group or not away_team_group:
-		return  # Can't update standings if teams aren't in groups
-	
-	if home_team_group.groupid != away_team_group.groupid:
-		return  # Teams must be in the same group
-	
-	group_id = home_team_group.groupid
-	
-	# Get or create standings for home team
-	home_standing = db.query(models.Standings).filter(
-		models.Standings.groupid == group_id,
-		models.Standings.teamid == match.hometeamid
-	).first()
-	
-	if not home_standing:
-		home_standing = models.Standings(
-			groupid=group_id,
-			teamid=match.hometeamid,
-			matchesplayed=0,
-			wins=0,
-			draws=0,
-			losses=0,
-			goalsfor=0,
-			goalsagainst=0,
-			points=0
-		)
-		db.add(home_standing)
-	
-	# Get or create standings for away team
-	away_standing = db.query(models.Standings).filter(
-		models.Standings.groupid == group_id,
-		models.Standings.teamid == match.awayteamid
-	).first()
-	
-	if not away_standing:
-		away_standing = models.Standings(
-			groupid=group_id,
-			teamid=match.awayteamid,
-			matchesplayed=0,
-			wins=0,
-			draws=0,
-			losses=0,
-			goalsfor=0,
-			goalsagainst=0,
-			points=0
-		)
-		db.add(away_standing)
-	
-	# Update home team standings
-	home_standing.matchesplayed += 1
-	home_standing.goalsfor += home_score
-	home_standing.goalsagainst += away_score
-	
-	# Update away team standings
-	away_standing.matchesplayed += 1
-	away_standing.goalsfor += away_score
-	away_standing.goalsagainst += home_score
-	
-	# Determine winner and update points
-	if home_score > away_score:
-		# Home team wins
-		home_standing.wins += 1
-		home_standing.points += 3
-		away_standing.losses += 1
-	elif away_score > home_score:
-		# Away team wins
-		away_standing.wins += 1
-		away_standing.points += 3
-		home_standing.losses += 1
-	else:
-		# Draw
-		home_standing.draws += 1
-		home_standing.points += 1
-		away_standing.draws += 1
-		away_standing.points += 1
-	
-	# Save changes
-	db.add(home_standing)
-	db.add(away_standing)
-	db.commit()
-
-def update_player_goal_stats(db: Session, player_id: int, is_own_goal: int, subtract: bool = False):
-	"""Update player goal statistics"""
-	player = db.query(models.Player).filter(models.Player.playerid == player_id).first()
-	if not player:
-		return
-	
-	# Get or create player stats
-	stats = db.query(models.PlayerStats).filter(models.PlayerStats.statsid == player.statsid).first()
-	if not stats:
-		# Create new stats record
-		stats = models.PlayerStats(
-			matchesplayed=0,
-			goals=0,
-			assists=0,
-			yellowcards=0,
-			redcards=0,
-			mvpcount=0,
-			ratingaverage=0
-		)
-		db.add(stats)
-		db.commit()
-		db.refresh(stats)
-		
-		# Update player with stats ID
-		player.statsid = stats.statsid
-		db.commit()
-	
-	# Update goal count
-	if is_own_goal == 0:  # Regular goal
-		if subtract:
-			stats.goals = max(0, stats.goals - 1)
-		else:
-			stats.goals += 1
-	# Note: Own goals don't count towards player's goal tally
-	
-	db.commit()
@@ -3,16 +3,58 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_
 from datetime import datetime
+from database import SessionLocal
 from deps import get_db
 import models
 from schemas import Match as MatchSchema, MatchCreate, MatchUpdate
 from auth import require_organizer_or_admin, require_authenticated_user
+from services.cache import cache, team_tag, ALL_TOURNAMENTS_TAG, invalidate_tournament, invalidate_team
+from services.ratings import revert_result_rating
+from services.stats import apply_player_changes, apply_tournament_player_stats, match_player_changes
+from services.team_version import bump_team_versions
+from services.idempotency import IdempotentRequest, idempotent_request
+from services.live import live_hub
 
 router = APIRouter()
 
+# Seconds the match list is served from the cache, and how much longer an expired copy is served while one refresh runs
+MATCH_LIST_TTL = 30.0
+MATCH_LIST_STALE_TTL = 30.0
+
 @router.get("")
-def list_matches(status: Optional[str] = None, round: Optional[str] = None, db: Session = Depends(get_db)):
+def list_matches(status: Optional[str] = None, round: Optional[str] = None):
 	"""List matches with team names and scores"""
+	# Identical requests share one query (see TaggedCache.get_or_compute); clients all reload this when a match ends
+	matches, live_positions = cache.get_or_compute(
+		("matches", status, round), lambda: build_match_list(status, round), ttl=MATCH_LIST_TTL, stale_ttl=MATCH_LIST_STALE_TTL
+	)
+	if not live_positions:
+		return matches
+	# Live matches show their running score, from memory when the match is being followed; the cached list is shared, so copy
+	matches = list(matches)
+	for position in live_positions:
+		live_score = live_hub.score(matches[position]["matchid"])
+		if live_score is not None:
+			matches[position] = {**matches[position], "homescore": live_score[0], "awayscore": live_score[1]}
+	return matches
+
+def build_match_list(status: Optional[str], round: Optional[str]):
+	"""
+	((matches, positions of Live matches without a result), cache tags) for
+	list_matches, in its own session since it may run after the request.
+	Every tournament invalidation evicts it; team renames evict it too.
+	"""
+	db = SessionLocal()
+	try:
+		matches = match_list(db, status, round)
+	finally:
+		db.close()
+	live_positions = [position for position, match in enumerate(matches) if match["status"] == "Live" and match["homescore"] is None]
+	tags = {ALL_TOURNAMENTS_TAG}
+	tags.update(team_tag(teamid) for match in matches for teamid in (match["hometeamid"], match["awayteamid"]) if teamid is not None)
+	return (matches, live_positions), tags
+
+def match_list(db: Session, status: Optional[str], round: Optional[str]) -> list:
 	# Use LEFT JOIN to get matches with their results
 	query = db.query(models.Match, models.MatchResult).outerjoin(
 		models.MatchResult, models.Match.matchid == models.MatchResult.matchid
@@ -59,7 +101,8 @@ def get_next_upcoming_match(db: Session = Depends(get_db)):
 	"""Get the next upcoming match with team and stadium details"""
 	now = datetime.now()
 	
-	# Query for the next upcoming match
+	# Served by the partial index on Upcoming matches; the date filter covers the seconds
+	# between a kick-off and the status scheduler's next tick
 	match = db.query(models.Match)\
 		.filter(
 			and_(
@@ -111,11 +154,18 @@ def get_next_upcoming_match(db: Session = Depends(get_db)):
 	}
 
 @router.post("", response_model=MatchSchema, status_code=201)
-def create_match(payload: MatchCreate, db: Session = Depends(get_db), current_user: models.User = Depends(require_organizer_or_admin)):
+def create_match(payload: MatchCreate, db: Session = Depends(get_db), current_user: models.User = Depends(require_organizer_or_admin), idempotency: IdempotentRequest = Depends(idempotent_request)):
+	# A retried request (same Idempotency-Key) gets the original match instead of a duplicate fixture
+	if idempotency.replay is not None:
+		return idempotency.replay
 	match = models.Match(**payload.model_dump())
 	db.add(match)
+	bump_team_versions(db, match.hometeamid, match.awayteamid)
+	db.flush()
+	idempotency.save(db, MatchSchema, match, 201)
 	db.commit()
 	db.refresh(match)
+	invalidate_tournament(match.tournamentid)
 	return match
 
 @router.get("/{matchid}", response_model=MatchSchema)
@@ -130,11 +180,27 @@ def update_match(matchid: int, payload: MatchUpdate, db: Session = Depends(get_d
 	match = db.query(models.Match).filter(models.Match.matchid == matchid).first()
 	if not match:
 		raise HTTPException(404, "Match not found")
+	previous_tournamentid = match.tournamentid
+	previous_teamids = (match.hometeamid, match.awayteamid)
+	previous_status = match.status
 	for field, value in payload.model_dump(exclude_unset=True).items():
 		setattr(match, field, value)
 	db.add(match)
+	if match.tournamentid != previous_tournamentid:
+		# The match's appearances, goals and MVP award now count for the other tournament
+		changes = match_player_changes(db, matchid)
+		apply_tournament_player_stats(db, previous_tournamentid, changes, subtract=True)
+		apply_tournament_player_stats(db, match.tournamentid, changes)
+	bump_team_versions(db, *previous_teamids, match.hometeamid, match.awayteamid)
 	db.commit()
 	db.refresh(match)
+	invalidate_tournament(previous_tournamentid, match.tournamentid)
+	invalidate_team(*previous_teamids, match.hometeamid, match.awayteamid)
+	if previous_status == "Live" and match.status != "Live":
+		# Write out what was pushed live and tell spectators the match is over
+		live_hub.end(matchid)
+	elif match.status != previous_status:
+		live_hub.forget_live_ids()
 	return match
 
 @router.delete("/{matchid}", status_code=204)
@@ -142,6 +208,15 @@ def delete_match(matchid: int, db: Session = Depends(get_db), current_user: mode
 	match = db.query(models.Match).filter(models.Match.matchid == matchid).first()
 	if not match:
 		raise HTTPException(404, "Match not found")
+	tournamentid = match.tournamentid
+	# Appearances, goals and the result go with the match (ON DELETE CASCADE); take back what they counted first
+	apply_player_changes(db, tournamentid, match_player_changes(db, matchid), subtract=True)
+	for result in db.query(models.MatchResult.resultid).filter(models.MatchResult.matchid == matchid).all():
+		revert_result_rating(db, result.resultid)
 	db.delete(match)
+	bump_team_versions(db, match.hometeamid, match.awayteamid)
 	db.commit()
+	invalidate_tournament(tournamentid)
+	invalidate_team(match.hometeamid, match.awayteamid)
+	live_hub.end(matchid)
 	return None
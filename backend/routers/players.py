@@ -3,12 +3,38 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session, joinedload
 from deps import get_db
 import models
-from schemas import Player as PlayerSchema, PlayerCreate, PlayerUpdate, PlayerWithUser
-from auth import require_authenticated_user
+from schemas import Player as PlayerSchema, PlayerCreate, PlayerUpdate, PlayerWithUser, PlayerProfile, PlayerSearchResult
+from auth import Identity, get_active_identity, require_authenticated_user
 from schemas.notification import NotificationCreate
+from responses import rows_response, serialize_object, json_response
+from services.player_search import search_players, invalidate_player_search
+from services.team_version import bump_team_versions
+from services.stats import player_tournament_stats
 
 router = APIRouter()
 
+# Flat column list for PlayerWithUser rows; labels match the schema field names
+PLAYER_WITH_USER_COLUMNS = (
+	models.Player.playerid,
+	models.Player.userid,
+	models.Player.teamid,
+	models.Player.position,
+	models.Player.jerseynumber,
+	models.Player.statsid,
+	models.Player.preferredfoot,
+	models.Player.height,
+	models.Player.weight,
+	models.Player.registered_at,
+	models.Player.joined_team_at,
+	models.User.firstname,
+	models.User.lastname,
+	models.User.email,
+	models.User.profileimage,
+	models.User.status,
+	models.Team.teamname,
+	models.Team.logourl.label("teamlogo"),
+)
+
 @router.get("", response_model=List[PlayerWithUser])
 def list_players(
 	teamid: Optional[int] = Query(None, description="Filter players by team ID"),
@@ -16,8 +42,8 @@ def list_players(
 	limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
 	db: Session = Depends(get_db)
 ):
-	# Join Player with User and Team to get player names and team info
-	query = db.query(models.Player, models.User, models.Team).outerjoin(
+	# Join Player with User and Team, selecting only the columns PlayerWithUser needs
+	query = db.query(*PLAYER_WITH_USER_COLUMNS).outerjoin(
 		models.User, models.Player.userid == models.User.userid
 	).outerjoin(
 		models.Team, models.Player.teamid == models.Team.teamid
@@ -30,32 +56,31 @@ def list_players(
 	query = query.filter((models.User.status.is_(None)) | (models.User.status != "deleted"))
 	results = query.offset(skip).limit(limit).all()
 	
-	# Convert joined results to PlayerWithUser objects
-	players_with_users = []
-	for player, user, team in results:
-		player_data = {
-			"playerid": player.playerid,
-			"userid": player.userid,
-			"teamid": player.teamid,
-			"position": player.position,
-			"jerseynumber": player.jerseynumber,
-			"statsid": player.statsid,
-			"preferredfoot": player.preferredfoot,
-			"height": float(player.height) if player.height else None,
-			"weight": float(player.weight) if player.weight else None,
-			"registered_at": player.registered_at,
-			"joined_team_at": player.joined_team_at,
-			"firstname": user.firstname if user else None,
-			"lastname": user.lastname if user else None,
-			"email": user.email if user else None,
-			"profileimage": user.profileimage if user else None,
-			"status": user.status if user else None,
-			"teamname": team.teamname if team else None,
-			"teamlogo": team.logourl if team else None,
-		}
-		players_with_users.append(PlayerWithUser(**player_data))
-	
-	return players_with_users
+	# Rows go straight to JSON bytes, validated once against PlayerWithUser
+	return rows_response(PlayerWithUser, results)
+
+@router.get("/search", response_model=PlayerSearchResult)
+def search_players_endpoint(
+	q: str = Query(..., min_length=1, max_length=100, description="Name prefix or approximate spelling"),
+	position: Optional[str] = Query(None, description="Exact position filter"),
+	teamid: Optional[int] = Query(None, description="Filter players by team ID"),
+	skip: int = Query(0, ge=0, description="Number of records to skip"),
+	limit: int = Query(20, ge=1, le=100, description="Number of records to return"),
+	db: Session = Depends(get_db)
+):
+	"""Ranked, paginated player search on first/last names (prefix and fuzzy matching)"""
+	total, ranked = search_players(db, q, position=position, teamid=teamid, skip=skip, limit=limit)
+	items = []
+	if ranked:
+		# Load the page's rows in one query, then restore the ranking order
+		rows = db.query(*PLAYER_WITH_USER_COLUMNS).outerjoin(
+			models.User, models.Player.userid == models.User.userid
+		).outerjoin(
+			models.Team, models.Player.teamid == models.Team.teamid
+		).filter(models.Player.playerid.in_([playerid for playerid, _ in ranked])).all()
+		by_id = {row.playerid: row for row in rows}
+		items = [{**by_id[playerid]._mapping, "score": round(score, 4)} for playerid, score in ranked if playerid in by_id]
+	return json_response(serialize_object(PlayerSearchResult, {"total": total, "skip": skip, "limit": limit, "items": items}))
 
 @router.post("", response_model=PlayerSchema, status_code=201)
 def create_player(payload: PlayerCreate, db: Session = Depends(get_db), current_user: models.User = Depends(require_authenticated_user)):
@@ -66,11 +91,13 @@ def create_player(payload: PlayerCreate, db: Session = Depends(get_db), current_
 			raise HTTPException(400, "Player already exists for this user")
 	player = models.Player(**payload.model_dump())
 	db.add(player)
+	bump_team_versions(db, payload.teamid)
 	db.commit()
+	invalidate_player_search()
 	db.refresh(player)
 	return player
 
-@router.get("/{playerid}", response_model=PlayerWithUser)
+@router.get("/{playerid}", response_model=PlayerProfile)
 def get_player(playerid: int, db: Session = Depends(get_db)):
 	# Join Player with User, Team, and PlayerStats to get complete player info
 	result = db.query(models.Player, models.User, models.Team, models.PlayerStats).outerjoin(
@@ -106,7 +133,7 @@ def get_player(playerid: int, db: Session = Depends(get_db)):
 		"status": user.status if user else None,
 		"teamname": team.teamname if team else None,
 		"teamlogo": team.logourl if team else None,
-		# Player statistics
+		# Career statistics
 		"matchesplayed": stats.matchesplayed if stats else 0,
 		"goals": stats.goals if stats else 0,
 		"assists": stats.assists if stats else 0,
@@ -114,38 +141,37 @@ def get_player(playerid: int, db: Session = Depends(get_db)):
 		"redcards": stats.redcards if stats else 0,
 		"mvpcount": stats.mvpcount if stats else 0,
 		"ratingaverage": float(stats.ratingaverage) if stats and stats.ratingaverage else 0.0,
+		"tournaments": player_tournament_stats(db, playerid),
 	}
 	
-	return PlayerWithUser(**player_data)
+	return PlayerProfile(**player_data)
 
 @router.patch("/{playerid}", response_model=PlayerSchema)
-def update_player(playerid: int, payload: PlayerUpdate, db: Session = Depends(get_db), current_user: models.User = Depends(require_authenticated_user)):
+def update_player(playerid: int, payload: PlayerUpdate, db: Session = Depends(get_db), identity: Identity = Depends(get_active_identity)):
     player = db.query(models.Player).filter(models.Player.playerid == playerid).first()
     if not player:
         raise HTTPException(404, "Player not found")
 
     # Authorization: Only Admin/Organizer OR the captain of this player's team can update
-    if current_user.role not in ["Admin", "Organizer"]:
-        current_player = db.query(models.Player).filter(models.Player.userid == current_user.userid).first()
-        if not current_player or not current_player.teamid:
-            raise HTTPException(403, "Only team captains can modify team players")
-        team = db.query(models.Team).filter(models.Team.teamid == current_player.teamid).first()
-        if not team or team.teamcaptainid != current_player.playerid:
-            raise HTTPException(403, "Only team captains can modify team players")
-        if player.teamid != current_player.teamid:
+    if not identity.is_staff:
+        team = identity.captain_team("Only team captains can modify team players")
+        if player.teamid != team.teamid:
             raise HTTPException(403, "You can only modify players from your own team")
 
+    previous_teamid = player.teamid
     for field, value in payload.model_dump(exclude_unset=True).items():
         setattr(player, field, value)
     db.add(player)
+    bump_team_versions(db, previous_teamid, player.teamid)
     db.commit()
+    invalidate_player_search()
     db.refresh(player)
     return player
 
 @router.post("/leave-team", status_code=200)
-def leave_team(db: Session = Depends(get_db), current_user: models.User = Depends(require_authenticated_user)):
+def leave_team(db: Session = Depends(get_db), identity: Identity = Depends(get_active_identity)):
     """Allow a player to leave their current team (cannot be captain)"""
-    current_player = db.query(models.Player).filter(models.Player.userid == current_user.userid).first()
+    current_player = identity.player
     if not current_player:
         raise HTTPException(404, "Player profile not found")
     
@@ -153,35 +179,35 @@ def leave_team(db: Session = Depends(get_db), current_user: models.User = Depend
         raise HTTPException(400, "You are not currently on any team")
     
     # Check if player is the team captain
-    team = db.query(models.Team).filter(models.Team.teamid == current_player.teamid).first()
-    if team and team.teamcaptainid == current_player.playerid:
+    if identity.is_captain:
         raise HTTPException(403, "Team captains cannot leave their team. Transfer captaincy first or delete the team.")
     
     # Remove player from team
+    previous_teamid = current_player.teamid
     current_player.teamid = None
     current_player.joined_team_at = None
     db.add(current_player)
+    bump_team_versions(db, previous_teamid)
     db.commit()
+    invalidate_player_search()
     
     return {"message": "Successfully left the team"}
 
 @router.delete("/{playerid}", status_code=204)
-def delete_player(playerid: int, db: Session = Depends(get_db), current_user: models.User = Depends(require_authenticated_user)):
+def delete_player(playerid: int, db: Session = Depends(get_db), identity: Identity = Depends(get_active_identity)):
     player = db.query(models.Player).filter(models.Player.playerid == playerid).first()
     if not player:
         raise HTTPException(404, "Player not found")
 
     # Authorization: Only Admin/Organizer OR the captain of this player's team can delete
-    if current_user.role not in ["Admin", "Organizer"]:
-        current_player = db.query(models.Player).filter(models.Player.userid == current_user.userid).first()
-        if not current_player or not current_player.teamid:
-            raise HTTPException(403, "Only team captains can remove team players")
-        team = db.query(models.Team).filter(models.Team.teamid == current_player.teamid).first()
-        if not team or team.teamcaptainid != current_player.playerid:
-            raise HTTPException(403, "Only team captains can remove team players")
-        if player.teamid != current_player.teamid:
+    if not identity.is_staff:
+        team = identity.captain_team("Only team captains can remove team players")
+        if player.teamid != team.teamid:
             raise HTTPException(403, "You can only remove players from your own team")
 
+    teamid = player.teamid
     db.delete(player)
+    bump_team_versions(db, teamid)
     db.commit()
+    invalidate_player_search()
     return None
@@ -0,0 +1,20 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from deps import get_db
+from schemas.search import SearchResult, SearchType
+from services.search_index import search_index
+
+router = APIRouter()
+
+@router.get("", response_model=SearchResult)
+def search(
+	q: str = Query(..., min_length=1, max_length=100, description="Search text; the last word may be partial"),
+	types: Optional[List[SearchType]] = Query(None, description="Restrict hits to these types"),
+	limit: int = Query(20, ge=1, le=100, description="Number of hits to return"),
+	db: Session = Depends(get_db)
+):
+	"""League-wide search over teams, users, tournaments, events and stadiums, served from the in-process index"""
+	# Only the first search after startup reads the database
+	search_index.ensure_loaded(db)
+	return {"query": q, "hits": search_index.search(q, kinds=types, limit=limit)}
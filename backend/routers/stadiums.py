@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from deps import get_db
 import models
 from schemas import Stadium as StadiumSchema, StadiumCreate, StadiumUpdate
+from services.search_index import index_stadium, unindex
 
 router = APIRouter()
 
@@ -17,6 +18,7 @@ def create_stadium(payload: StadiumCreate, db: Session = Depends(get_db)):
 	db.add(stadium)
 	db.commit()
 	db.refresh(stadium)
+	index_stadium(stadium)
 	return stadium
 
 @router.get("/{stadiumid}", response_model=StadiumSchema)
@@ -36,6 +38,7 @@ def update_stadium(stadiumid: int, payload: StadiumUpdate, db: Session = Depends
 	db.add(stadium)
 	db.commit()
 	db.refresh(stadium)
+	index_stadium(stadium)
 	return stadium
 
 @router.delete("/{stadiumid}", status_code=204)
@@ -45,4 +48,5 @@ def delete_stadium(stadiumid: int, db: Session = Depends(get_db)):
 		raise HTTPException(404, "Stadium not found")
 	db.delete(stadium)
 	db.commit()
+	unindex("stadium", stadiumid)
 	return None
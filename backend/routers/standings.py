@@ -1,13 +1,20 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from database import SessionLocal
 from deps import get_db
 import models
 from schemas import Standings as StandingsSchema, StandingsCreate, StandingsUpdate
 from pydantic import BaseModel
+from responses import json_response, serialize_rows
+from services.cache import cache, group_tag, team_tag, ALL_GROUPS_TAG, invalidate_group
 
 router = APIRouter()
 
+# Seconds standings are served from the cache, and how much longer an expired copy is served while one refresh runs
+STANDINGS_TTL = 30.0
+STANDINGS_STALE_TTL = 30.0
+
 class StandingsWithTeam(BaseModel):
 	standingid: int
 	groupid: Optional[int] = None
@@ -30,12 +37,44 @@ class StandingsWithTeam(BaseModel):
 		from_attributes = True
 
 @router.get("", response_model=List[StandingsWithTeam])
-def list_standings(
-	groupid: Optional[int] = Query(None, description="Filter standings by group ID"),
-	db: Session = Depends(get_db)
-):
-	# Join Standings with Team and TournamentGroup to get complete information
-	query = db.query(models.Standings, models.Team, models.TournamentGroup).outerjoin(
+def list_standings(groupid: Optional[int] = Query(None, description="Filter standings by group ID")):
+	"""
+	Standings with team and group names. Everyone reloads this when a match
+	ends, so identical requests share one query (see TaggedCache.get_or_compute)
+	"""
+	body = cache.get_or_compute(("standings", groupid), lambda: build_standings(groupid), ttl=STANDINGS_TTL, stale_ttl=STANDINGS_STALE_TTL)
+	return json_response(body)
+
+def build_standings(groupid: Optional[int]):
+	"""(JSON body, cache tags) of list_standings, in its own session since it may run after the request"""
+	db = SessionLocal()
+	try:
+		rows = standings_rows(db, groupid)
+	finally:
+		db.close()
+	tags = [group_tag(groupid) if groupid is not None else ALL_GROUPS_TAG]
+	tags += {team_tag(row.teamid) for row in rows if row.teamid is not None}
+	# Rows go straight to JSON bytes, validated once against StandingsWithTeam
+	return serialize_rows(StandingsWithTeam, rows), tags
+
+def standings_rows(db: Session, groupid: Optional[int]) -> list:
+	# Join Standings with Team and TournamentGroup, selecting only the columns StandingsWithTeam needs
+	query = db.query(
+		models.Standings.standingid,
+		models.Standings.groupid,
+		models.Standings.teamid,
+		models.Standings.matchesplayed,
+		models.Standings.wins,
+		models.Standings.draws,
+		models.Standings.losses,
+		models.Standings.goalsfor,
+		models.Standings.goalsagainst,
+		models.Standings.goaldifference,
+		models.Standings.points,
+		models.Team.teamname,
+		models.Team.logourl.label("teamlogo"),
+		models.TournamentGroup.groupname,
+	).outerjoin(
 		models.Team, models.Standings.teamid == models.Team.teamid
 	).outerjoin(
 		models.TournamentGroup, models.Standings.groupid == models.TournamentGroup.groupid
@@ -44,37 +83,21 @@ def list_standings(
 	if groupid is not None:
 		query = query.filter(models.Standings.groupid == groupid)
 	
-	results = query.all()
-	
-	# Convert joined results to StandingsWithTeam objects
-	standings_with_teams = []
-	for standing, team, group in results:
-		standing_data = {
-			"standingid": standing.standingid,
-			"groupid": standing.groupid,
-			"teamid": standing.teamid,
-			"matchesplayed": standing.matchesplayed,
-			"wins": standing.wins,
-			"draws": standing.draws,
-			"losses": standing.losses,
-			"goalsfor": standing.goalsfor,
-			"goalsagainst": standing.goalsagainst,
-			"goaldifference": standing.goaldifference,
-			"points": standing.points,
-			"teamname": team.teamname if team else None,
-			"teamlogo": team.logourl if team else None,
-			"groupname": group.groupname if group else None,
-		}
-		standings_with_teams.append(StandingsWithTeam(**standing_data))
-	
-	return standings_with_teams
+	return query.all()
 
 @router.post("", response_model=StandingsSchema, status_code=201)
 def create_standing(payload: StandingsCreate, db: Session = Depends(get_db)):
+	existing = db.query(models.Standings.standingid).filter(
+		models.Standings.groupid == payload.groupid,
+		models.Standings.teamid == payload.teamid
+	).first()
+	if existing:
+		raise HTTPException(409, "Standings already exist for this team in this group")
 	standing = models.Standings(**payload.model_dump())
 	db.add(standing)
 	db.commit()
 	db.refresh(standing)
+	invalidate_group(standing.groupid)
 	return standing
 
 @router.get("/{standingid}", response_model=StandingsSchema)
@@ -89,11 +112,13 @@ def update_standing(standingid: int, payload: StandingsUpdate, db: Session = Dep
 	standing = db.query(models.Standings).filter(models.Standings.standingid == standingid).first()
 	if not standing:
 		raise HTTPException(404, "Standing not found")
+	previous_groupid = standing.groupid
 	for field, value in payload.model_dump(exclude_unset=True).items():
 		setattr(standing, field, value)
 	db.add(standing)
 	db.commit()
 	db.refresh(standing)
+	invalidate_group(previous_groupid, standing.groupid)
 	return standing
 
 @router.delete("/{standingid}", status_code=204)
@@ -101,6 +126,8 @@ def delete_standing(standingid: int, db: Session = Depends(get_db)):
 	standing = db.query(models.Standings).filter(models.Standings.standingid == standingid).first()
 	if not standing:
 		raise HTTPException(404, "Standing not found")
+	groupid = standing.groupid
 	db.delete(standing)
 	db.commit()
+	invalidate_group(groupid)
 	return None
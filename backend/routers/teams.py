@@ -1,14 +1,25 @@
 from typing import List
-from sqlalchemy import text
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import text, func, case, or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session, aliased
 from deps import get_db
 import models
-from schemas import Team as TeamSchema, TeamCreate, TeamUpdate
-from auth import require_organizer_or_admin, require_authenticated_user
+from schemas import Team as TeamSchema, TeamCreate, TeamUpdate, TeamBundle, TeamVersion, TeamRanking, RatingReplay, TeamForm, HeadToHead
+from auth import Identity, get_active_identity, require_admin, require_organizer_or_admin, require_authenticated_user
+from responses import serialize_object, serialize_rows, json_response
+from routers.players import PLAYER_WITH_USER_COLUMNS
+from services.cache import cache, team_tag, invalidate_team
+from services.team_version import bump_team_versions, get_team_version
+from services.player_search import invalidate_player_search
+from services.search_index import index_team, unindex
+from services.ratings import replay_ratings, revert_ratings
+from services.team_form import team_form, head_to_head
 
 router = APIRouter()
 
+# Form and head-to-head only change with results, which evict them by team tag
+FORM_TTL = 600
+
 @router.get("", response_model=List[TeamSchema])
 def list_teams(db: Session = Depends(get_db)):
 	return db.query(models.Team).all()
@@ -19,6 +30,7 @@ def create_team(payload: TeamCreate, db: Session = Depends(get_db), current_user
 	db.add(team)
 	db.commit()
 	db.refresh(team)
+	index_team(team)
 	return team
 
 # Players without a team can create a new team and become captain automatically
@@ -51,20 +63,25 @@ def create_my_team(payload: TeamCreate, db: Session = Depends(get_db), current_u
     player.teamid = team.teamid
     db.add(team)
     db.add(player)
+    bump_team_versions(db, team.teamid)
     db.commit()
     db.refresh(team)
+    invalidate_player_search()
+    index_team(team)
     return team
 
 @router.post("/{teamid}/disband", status_code=204)
-def disband_team(teamid: int, db: Session = Depends(get_db), current_user: models.User = Depends(require_authenticated_user)):
+def disband_team(teamid: int, db: Session = Depends(get_db), identity: Identity = Depends(get_active_identity)):
     """Captain-only: remove all players from team and delete the team."""
-    team = db.query(models.Team).filter(models.Team.teamid == teamid).first()
-    if not team:
-        raise HTTPException(404, "Team not found")
+    team = identity.team
+    if team is None or team.teamid != teamid:
+        # Not the caller's team, so they can't be its captain; it only needs looking up for the 404
+        if not db.query(models.Team.teamid).filter(models.Team.teamid == teamid).first():
+            raise HTTPException(404, "Team not found")
+        raise HTTPException(403, "Only this team's captain can disband the team")
 
     # Ensure current user is captain of this team
-    current_player = db.query(models.Player).filter(models.Player.userid == current_user.userid).first()
-    if not current_player or current_player.teamid != team.teamid or team.teamcaptainid != current_player.playerid:
+    if not identity.is_captain:
         raise HTTPException(403, "Only this team's captain can disband the team")
 
     # Remove all players from the team
@@ -74,10 +91,17 @@ def disband_team(teamid: int, db: Session = Depends(get_db), current_user: model
     db.add(team)
     db.commit()
 
-    # Detach team from matches to satisfy FKs (set to NULL)
+    # Detach team from matches to satisfy FKs (set to NULL); opponents' fixtures change too
+    opponent_rows = db.execute(
+        text("SELECT awayteamid FROM match WHERE hometeamid = :tid UNION SELECT hometeamid FROM match WHERE awayteamid = :tid"),
+        {"tid": team.teamid},
+    ).all()
     try:
+        # Results without both teams aren't rated: take this team's results back out of its opponents' ratings
+        revert_ratings(db, or_(models.RatingChange.hometeamid == team.teamid, models.RatingChange.awayteamid == team.teamid))
         db.execute(text("UPDATE match SET hometeamid = NULL WHERE hometeamid = :tid"), {"tid": team.teamid})
         db.execute(text("UPDATE match SET awayteamid = NULL WHERE awayteamid = :tid"), {"tid": team.teamid})
+        bump_team_versions(db, *(row[0] for row in opponent_rows))
         db.commit()
     except Exception:
         db.rollback()
@@ -104,8 +128,50 @@ def disband_team(teamid: int, db: Session = Depends(get_db), current_user: model
     # Delete the team itself
     db.delete(team)
     db.commit()
+    invalidate_team(teamid, *(row[0] for row in opponent_rows))
+    invalidate_player_search()
+    unindex("team", teamid)
     return None
 
+# Declared before /{teamid} so "rankings" isn't parsed as a team id
+@router.get("/rankings", response_model=List[TeamRanking])
+def get_team_rankings(
+	skip: int = Query(0, ge=0),
+	limit: int = Query(50, ge=1, le=500),
+	db: Session = Depends(get_db)
+):
+	"""Teams by Elo rating, best first, read straight from the ratings table that results keep up to date"""
+	rows = db.query(
+		models.TeamRating.teamid,
+		models.Team.teamname,
+		models.Team.logourl,
+		models.TeamRating.rating,
+		models.TeamRating.matchesplayed,
+	).join(
+		models.Team, models.Team.teamid == models.TeamRating.teamid
+	).order_by(models.TeamRating.rating.desc(), models.TeamRating.teamid).offset(skip).limit(limit).all()
+	rankings = [
+		{
+			"rank": skip + i + 1,
+			"teamid": row.teamid,
+			"teamname": row.teamname,
+			"logourl": row.logourl,
+			"rating": round(row.rating, 1),
+			"matchesplayed": row.matchesplayed,
+		}
+		for i, row in enumerate(rows)
+	]
+	return json_response(serialize_rows(TeamRanking, rankings))
+
+@router.post("/rankings/replay", response_model=RatingReplay)
+def replay_team_rankings(db: Session = Depends(get_db), current_user: models.User = Depends(require_admin)):
+	"""Recompute every rating from the full result history (admin only)"""
+	results = replay_ratings(db)
+	db.commit()
+	teamids = [row.teamid for row in db.query(models.TeamRating.teamid).all()]
+	invalidate_team(*teamids)
+	return {"results": results, "teams": len(teamids)}
+
 @router.get("/{teamid}", response_model=TeamSchema)
 def get_team(teamid: int, db: Session = Depends(get_db)):
 	team = db.query(models.Team).filter(models.Team.teamid == teamid).first()
@@ -121,8 +187,11 @@ def update_team(teamid: int, payload: TeamUpdate, db: Session = Depends(get_db),
 	for field, value in payload.model_dump(exclude_unset=True).items():
 		setattr(team, field, value)
 	db.add(team)
+	bump_team_versions(db, teamid)
 	db.commit()
 	db.refresh(team)
+	invalidate_team(teamid)
+	index_team(team)
 	return team
 
 @router.delete("/{teamid}", status_code=204)
@@ -130,6 +199,165 @@ def delete_team(teamid: int, db: Session = Depends(get_db), current_user: models
 	team = db.query(models.Team).filter(models.Team.teamid == teamid).first()
 	if not team:
 		raise HTTPException(404, "Team not found")
+	# Its rating history goes with it (ON DELETE CASCADE); take its results back out of the opponents' ratings first
+	rated_teamids = [tid for tid in revert_ratings(db, or_(models.RatingChange.hometeamid == teamid, models.RatingChange.awayteamid == teamid)) if tid != teamid]
+	bump_team_versions(db, *rated_teamids)
 	db.delete(team)
 	db.commit()
+	invalidate_team(teamid, *rated_teamids)
+	unindex("team", teamid)
 	return None
+
+@router.get("/{teamid}/version", response_model=TeamVersion)
+def get_team_version_probe(teamid: int, db: Session = Depends(get_db)):
+	"""Cheap change probe for polling clients: only fetch /bundle when the version moves"""
+	version = get_team_version(db, teamid)
+	if version is None:
+		raise HTTPException(404, "Team not found")
+	return {"teamid": teamid, "version": version}
+
+@router.get("/{teamid}/bundle", response_model=TeamBundle)
+def get_team_bundle(teamid: int, request: Request, db: Session = Depends(get_db)):
+	"""Team, roster with user info, aggregate stats and recent/upcoming matches in one response. Supports If-None-Match on the version ETag."""
+	version = get_team_version(db, teamid)
+	if version is None:
+		raise HTTPException(404, "Team not found")
+	etag = f'"team-{teamid}-v{version}"'
+	if request.headers.get("if-none-match") == etag:
+		return Response(status_code=304, headers={"ETag": etag})
+
+	# Keyed by version, so any bump makes old entries unreachable on every worker
+	key = ("team_bundle", teamid, version)
+	body = cache.get(key)
+	if body is None:
+		body = serialize_object(TeamBundle, build_team_bundle(db, teamid, version))
+		cache.set(key, body, tags=[team_tag(teamid)])
+	response = json_response(body)
+	response.headers["ETag"] = etag
+	return response
+
+@router.get("/{teamid}/form", response_model=TeamForm)
+def get_team_form(
+	teamid: int,
+	limit: int = Query(5, ge=1, le=50, description="Number of recent results"),
+	db: Session = Depends(get_db)
+):
+	"""Recent results, current streak and longest runs of a team"""
+	key = ("team_form", teamid, limit)
+	body = cache.get(key)
+	if body is None:
+		team = db.query(models.Team.teamname).filter(models.Team.teamid == teamid).first()
+		if not team:
+			raise HTTPException(404, "Team not found")
+		form = team_form(db, teamid, limit)
+		form["teamname"] = team.teamname
+		body = serialize_object(TeamForm, form)
+		cache.set(key, body, tags=[team_tag(teamid)], ttl=FORM_TTL)
+	return json_response(body)
+
+@router.get("/{teamid}/h2h/{opponentid}", response_model=HeadToHead)
+def get_head_to_head(
+	teamid: int,
+	opponentid: int,
+	limit: int = Query(10, ge=1, le=50, description="Number of recent meetings"),
+	db: Session = Depends(get_db)
+):
+	"""Head-to-head record between two teams (from the first team's side) and their recent meetings"""
+	if teamid == opponentid:
+		raise HTTPException(400, "Pick two different teams")
+	key = ("team_h2h", teamid, opponentid, limit)
+	body = cache.get(key)
+	if body is None:
+		names = dict(db.query(models.Team.teamid, models.Team.teamname).filter(models.Team.teamid.in_([teamid, opponentid])).all())
+		if len(names) < 2:
+			raise HTTPException(404, "Team not found")
+		record = head_to_head(db, teamid, opponentid, limit)
+		record["teamname"] = names[teamid]
+		record["opponentname"] = names[opponentid]
+		body = serialize_object(HeadToHead, record)
+		cache.set(key, body, tags=[team_tag(teamid), team_tag(opponentid)], ttl=FORM_TTL)
+	return json_response(body)
+
+def build_team_bundle(db: Session, teamid: int, version: int, match_limit: int = 5) -> dict:
+	team = db.query(models.Team).filter(models.Team.teamid == teamid).first()
+
+	# Roster with user info and per-player stats
+	roster = db.query(
+		*PLAYER_WITH_USER_COLUMNS,
+		func.coalesce(models.PlayerStats.matchesplayed, 0).label("matchesplayed"),
+		func.coalesce(models.PlayerStats.goals, 0).label("goals"),
+		func.coalesce(models.PlayerStats.assists, 0).label("assists"),
+		func.coalesce(models.PlayerStats.yellowcards, 0).label("yellowcards"),
+		func.coalesce(models.PlayerStats.redcards, 0).label("redcards"),
+		func.coalesce(models.PlayerStats.mvpcount, 0).label("mvpcount"),
+		func.coalesce(models.PlayerStats.ratingaverage, 0).label("ratingaverage"),
+	).outerjoin(
+		models.User, models.Player.userid == models.User.userid
+	).outerjoin(
+		models.Team, models.Player.teamid == models.Team.teamid
+	).outerjoin(
+		models.PlayerStats, models.Player.statsid == models.PlayerStats.statsid
+	).filter(
+		models.Player.teamid == teamid,
+		(models.User.status.is_(None)) | (models.User.status != "deleted"),
+	).order_by(models.Player.jerseynumber, models.Player.playerid).all()
+	captain = next((player for player in roster if player.playerid == team.teamcaptainid), None)
+
+	# Aggregate stats over all decided matches
+	is_home = models.Match.hometeamid == teamid
+	goalsfor = case((is_home, models.MatchResult.homescore), else_=models.MatchResult.awayscore)
+	goalsagainst = case((is_home, models.MatchResult.awayscore), else_=models.MatchResult.homescore)
+	totals = db.query(
+		func.count(models.MatchResult.resultid).label("matchesplayed"),
+		func.coalesce(func.sum(case((goalsfor > goalsagainst, 1), else_=0)), 0).label("wins"),
+		func.coalesce(func.sum(case((goalsfor == goalsagainst, 1), else_=0)), 0).label("draws"),
+		func.coalesce(func.sum(case((goalsfor < goalsagainst, 1), else_=0)), 0).label("losses"),
+		func.coalesce(func.sum(goalsfor), 0).label("goalsfor"),
+		func.coalesce(func.sum(goalsagainst), 0).label("goalsagainst"),
+	).select_from(models.Match).join(
+		models.MatchResult, models.MatchResult.matchid == models.Match.matchid
+	).filter(or_(models.Match.hometeamid == teamid, models.Match.awayteamid == teamid)).one()
+	stats = dict(totals._mapping)
+	stats["goaldifference"] = stats["goalsfor"] - stats["goalsagainst"]
+	stats["points"] = stats["wins"] * 3 + stats["draws"]
+
+	recent = team_matches_query(db, teamid).filter(
+		models.MatchResult.resultid.isnot(None)
+	).order_by(models.Match.matchdate.desc()).limit(match_limit).all()
+	upcoming = team_matches_query(db, teamid).filter(
+		models.MatchResult.resultid.is_(None),
+		models.Match.status.in_(["Upcoming", "Live"]),
+	).order_by(models.Match.matchdate.asc()).limit(match_limit).all()
+
+	return {
+		"version": version,
+		"team": team,
+		"captain": captain,
+		"roster": roster,
+		"stats": stats,
+		"recent_matches": recent,
+		"upcoming_matches": upcoming,
+	}
+
+def team_matches_query(db: Session, teamid: int):
+	"""Matches of a team seen from its side: opponent, goals for/against"""
+	is_home = models.Match.hometeamid == teamid
+	opponentid = case((is_home, models.Match.awayteamid), else_=models.Match.hometeamid)
+	opponent = aliased(models.Team)
+	return db.query(
+		models.Match.matchid,
+		models.Match.tournamentid,
+		models.Match.matchdate,
+		models.Match.round,
+		models.Match.status,
+		is_home.label("ishome"),
+		opponentid.label("opponentid"),
+		func.coalesce(opponent.teamname, "TBD").label("opponentname"),
+		opponent.logourl.label("opponentlogo"),
+		case((is_home, models.MatchResult.homescore), else_=models.MatchResult.awayscore).label("goalsfor"),
+		case((is_home, models.MatchResult.awayscore), else_=models.MatchResult.homescore).label("goalsagainst"),
+	).outerjoin(
+		opponent, opponent.teamid == opponentid
+	).outerjoin(
+		models.MatchResult, models.MatchResult.matchid == models.Match.matchid
+	).filter(or_(models.Match.hometeamid == teamid, models.Match.awayteamid == teamid))
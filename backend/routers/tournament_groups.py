@@ -1,13 +1,24 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, insert, or_
 from sqlalchemy.orm import Session
 from deps import get_db
 import models
-from schemas import TournamentGroup as TournamentGroupSchema, TournamentGroupCreate, TournamentGroupUpdate
+from schemas import TournamentGroup as TournamentGroupSchema, TournamentGroupCreate, TournamentGroupUpdate, FixtureRequest, FixtureSchedule, GroupProjection
 from auth import require_organizer_or_admin
+from responses import json_response, serialize_object
+from services.cache import cache, group_tag, team_tag, tournament_tag, invalidate_tournament, invalidate_group
+from services.projections import project_group
+from services.ratings import team_ratings
+from services.fixtures import ScheduleError, booked_stadium_slots, resolve_stadiums, round_robin, schedule_fixtures
+from services.team_version import bump_team_versions
 
 router = APIRouter()
 
+# Projections only change with a new result, which evicts them, so keep them long
+PROJECTION_TTL = 3600
+
 @router.get("", response_model=List[TournamentGroupSchema])
 def list_tournament_groups(db: Session = Depends(get_db)):
 	return db.query(models.TournamentGroup).all()
@@ -18,6 +29,7 @@ def create_tournament_group(payload: TournamentGroupCreate, db: Session = Depend
 	db.add(group)
 	db.commit()
 	db.refresh(group)
+	invalidate_tournament(group.tournamentid)
 	return group
 
 @router.get("/{groupid}", response_model=TournamentGroupSchema)
@@ -32,11 +44,14 @@ def update_tournament_group(groupid: int, payload: TournamentGroupUpdate, db: Se
 	group = db.query(models.TournamentGroup).filter(models.TournamentGroup.groupid == groupid).first()
 	if not group:
 		raise HTTPException(404, "Tournament group not found")
+	previous_tournamentid = group.tournamentid
 	for field, value in payload.model_dump(exclude_unset=True).items():
 		setattr(group, field, value)
 	db.add(group)
 	db.commit()
 	db.refresh(group)
+	invalidate_tournament(previous_tournamentid, group.tournamentid)
+	invalidate_group(groupid)
 	return group
 
 @router.delete("/{groupid}", status_code=204)
@@ -44,6 +59,194 @@ def delete_tournament_group(groupid: int, db: Session = Depends(get_db), current
 	group = db.query(models.TournamentGroup).filter(models.TournamentGroup.groupid == groupid).first()
 	if not group:
 		raise HTTPException(404, "Tournament group not found")
+	tournamentid = group.tournamentid
 	db.delete(group)
 	db.commit()
+	invalidate_tournament(tournamentid)
+	invalidate_group(groupid)
 	return None
+
+@router.get("/{groupid}/projections", response_model=GroupProjection)
+def get_group_projections(
+	groupid: int,
+	simulations: int = Query(20000, ge=1000, le=200000, description="Number of simulated group stages"),
+	qualifiers: int = Query(2, ge=1, le=16, description="Teams that go through from the group"),
+	ratings: bool = Query(False, description="Rate teams by Elo instead of their scoring record in this group"),
+	db: Session = Depends(get_db)
+):
+	"""
+	Qualification odds for every team in the group: the remaining group matches
+	are simulated many times from each team's scoring record so far (or from
+	their Elo ratings), and the final tables are counted. Cached until the
+	next result, standings change or group change.
+	"""
+	key = ("group_projections", groupid, simulations, qualifiers, ratings)
+	body = cache.get(key)
+	if body is not None:
+		return json_response(body)
+
+	group = db.query(models.TournamentGroup).filter(models.TournamentGroup.groupid == groupid).first()
+	if not group:
+		raise HTTPException(404, "Tournament group not found")
+
+	# Every team in the group, with zeros for a team that has no standings row yet
+	rows = db.query(
+		models.GroupTeams.teamid,
+		models.Team.teamname,
+		models.Standings.matchesplayed,
+		models.Standings.points,
+		models.Standings.goalsfor,
+		models.Standings.goalsagainst,
+	).join(
+		models.Team, models.Team.teamid == models.GroupTeams.teamid
+	).outerjoin(
+		models.Standings, and_(models.Standings.groupid == models.GroupTeams.groupid, models.Standings.teamid == models.GroupTeams.teamid)
+	).filter(
+		models.GroupTeams.groupid == groupid
+	).order_by(models.GroupTeams.teamid).all()
+	teams = [
+		{
+			"teamid": row.teamid,
+			"teamname": row.teamname,
+			"matchesplayed": row.matchesplayed or 0,
+			"points": row.points or 0,
+			"goalsfor": row.goalsfor or 0,
+			"goalsagainst": row.goalsagainst or 0,
+		}
+		for row in rows
+	]
+	teamids = [team["teamid"] for team in teams]
+
+	# Group matches between these teams that don't have a result yet
+	remaining = db.query(models.Match.hometeamid, models.Match.awayteamid).outerjoin(
+		models.MatchResult, models.MatchResult.matchid == models.Match.matchid
+	).filter(
+		models.Match.tournamentid == group.tournamentid,
+		models.Match.round == "Group",
+		models.Match.hometeamid.in_(teamids),
+		models.Match.awayteamid.in_(teamids),
+		models.MatchResult.resultid.is_(None),
+	).all() if teamids else []
+	fixtures = [(row.hometeamid, row.awayteamid) for row in remaining]
+
+	elo = team_ratings(db, teamids) if ratings else None
+	projected = project_group(teams, fixtures, simulations, ratings=elo)
+	names = {team["teamid"]: team["teamname"] for team in teams}
+	for team in projected:
+		team["teamname"] = names[team["teamid"]]
+		team["qualify_probability"] = round(sum(team["positions"][:qualifiers]), 4)
+	projected.sort(key=lambda team: (team["average_position"], -team["expected_points"], team["teamid"]))
+
+	body = serialize_object(GroupProjection, {
+		"groupid": groupid,
+		"tournamentid": group.tournamentid,
+		"simulations": simulations,
+		"qualifiers": qualifiers,
+		"remaining_matches": len(fixtures),
+		"teams": projected,
+	})
+	# Results, standings and group membership all invalidate one of these tags;
+	# ratings also move with results in other tournaments, which invalidate the teams
+	tags = [group_tag(groupid), tournament_tag(group.tournamentid)]
+	if ratings:
+		tags += [team_tag(teamid) for teamid in teamids]
+	cache.set(key, body, tags=tags, ttl=PROJECTION_TTL)
+	return json_response(body)
+
+@router.post("/{groupid}/fixtures", response_model=FixtureSchedule, status_code=201)
+def generate_fixtures(
+	groupid: int,
+	payload: FixtureRequest,
+	preview: bool = Query(False, description="Return the schedule without creating any matches"),
+	db: Session = Depends(get_db),
+	current_user: models.User = Depends(require_organizer_or_admin)
+):
+	"""
+	Generate a single or double round robin for every team in the group and
+	create all of its matches in one transaction. Kickoffs respect the teams'
+	rest days and don't double-book a stadium, including matches that already
+	exist. With preview=true nothing is written.
+	"""
+	group = db.query(models.TournamentGroup).filter(models.TournamentGroup.groupid == groupid).first()
+	if not group:
+		raise HTTPException(404, "Tournament group not found")
+	teamids = [row.teamid for row in db.query(models.GroupTeams.teamid).filter(
+		models.GroupTeams.groupid == groupid
+	).order_by(models.GroupTeams.teamid).all()]
+	if len(teamids) < 2:
+		raise HTTPException(400, "A group needs at least two teams to generate fixtures")
+
+	stadiumids, missing = resolve_stadiums(db, payload.stadiumids)
+	if missing:
+		raise HTTPException(404, f"Stadium {missing[0]} not found")
+
+	if not preview:
+		existing = db.query(models.Match.matchid).filter(
+			models.Match.tournamentid == group.tournamentid,
+			models.Match.round == "Group",
+			models.Match.hometeamid.in_(teamids),
+			models.Match.awayteamid.in_(teamids),
+		).first()
+		if existing:
+			raise HTTPException(409, "This group already has fixtures")
+
+	# Existing commitments from now on: stadium bookings and the teams' own matches
+	booked_slots = booked_stadium_slots(db, stadiumids, payload.start)
+	busy_days = {}
+	for row in db.query(models.Match.hometeamid, models.Match.awayteamid, models.Match.matchdate).filter(
+		or_(models.Match.hometeamid.in_(teamids), models.Match.awayteamid.in_(teamids)),
+		models.Match.matchdate >= payload.start - timedelta(days=payload.rest_days),
+	).all():
+		for teamid in (row.hometeamid, row.awayteamid):
+			busy_days.setdefault(teamid, set()).add(row.matchdate.date())
+
+	rounds = round_robin(teamids, double=payload.double_round_robin)
+	try:
+		fixtures = schedule_fixtures(
+			rounds,
+			start=payload.start,
+			kickoff_times=payload.kickoff_times or [payload.start.time()],
+			stadiumids=stadiumids,
+			rest_days=payload.rest_days,
+			booked_slots=booked_slots,
+			busy_days=busy_days,
+		)
+	except ScheduleError as e:
+		raise HTTPException(400, str(e))
+
+	matchids = [None] * len(fixtures)
+	if not preview:
+		# One multi-row INSERT ... RETURNING for the whole schedule
+		table = models.Match.__table__
+		result = db.execute(
+			insert(table).returning(table.c.matchid, sort_by_parameter_order=True),
+			[
+				{
+					"tournamentid": group.tournamentid,
+					"hometeamid": home,
+					"awayteamid": away,
+					"stadiumid": stadiumid,
+					"matchdate": kickoff,
+					"round": "Group",
+					"status": "Upcoming",
+				}
+				for _, home, away, stadiumid, kickoff in fixtures
+			],
+		)
+		matchids = list(result.scalars())
+		bump_team_versions(db, *teamids)
+		db.commit()
+		invalidate_tournament(group.tournamentid)
+		invalidate_group(groupid)
+
+	schedule = {
+		"groupid": groupid,
+		"tournamentid": group.tournamentid,
+		"preview": preview,
+		"matchdays": len(rounds),
+		"fixtures": [
+			{"matchid": matchid, "matchday": matchday, "hometeamid": home, "awayteamid": away, "stadiumid": stadiumid, "matchdate": kickoff}
+			for matchid, (matchday, home, away, stadiumid, kickoff) in zip(matchids, fixtures)
+		],
+	}
+	return json_response(serialize_object(FixtureSchedule, schedule), 200 if preview else 201)
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from deps import get_db
 import models
 from schemas import TournamentTeam as TTschema, TournamentTeamCreate
+from services.cache import invalidate_tournament
 
 router = APIRouter()
 
@@ -17,6 +18,7 @@ def create_entry(payload: TournamentTeamCreate, db: Session = Depends(get_db)):
 	db.add(entry)
 	db.commit()
 	db.refresh(entry)
+	invalidate_tournament(entry.tournamentid)
 	return entry
 
 @router.delete("/{tournamentid}/{teamid}", status_code=204)
@@ -29,4 +31,5 @@ def delete_entry(tournamentid: int, teamid: int, db: Session = Depends(get_db)):
 		raise HTTPException(404, "Entry not found")
 	db.delete(entry)
 	db.commit()
+	invalidate_tournament(tournamentid)
 	return None
@@ -1,10 +1,19 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session, aliased
 from deps import get_db
 import models
-from schemas import Tournament as TournamentSchema, TournamentCreate, TournamentUpdate, TournamentJoinRequest
-from auth import require_organizer_or_admin, require_authenticated_user
+from schemas import Tournament as TournamentSchema, TournamentCreate, TournamentUpdate, TournamentJoinRequest, TournamentOverview, KnockoutRequest, Bracket, TournamentLeaderboards
+from auth import Identity, get_active_identity, require_admin, require_organizer_or_admin
+from responses import serialize_object, json_response
+from services.cache import cache, tournament_tag, group_tag, team_tag, invalidate_tournament, invalidate_team
+from services.search_index import index_tournament, unindex
+from services.bracket import BracketError, KNOCKOUT_ROUNDS, plan_bracket, schedule_rounds, seed_first_round, standings_snapshot
+from services.fixtures import booked_stadium_slots, resolve_stadiums
+from services.team_version import bump_team_versions
+from services.stats import rebuild_tournament_player_stats, tournament_leaderboard
+from services.ratings import revert_ratings
 
 router = APIRouter()
 
@@ -18,6 +27,7 @@ def create_tournament(payload: TournamentCreate, db: Session = Depends(get_db),
 	db.add(tournament)
 	db.commit()
 	db.refresh(tournament)
+	index_tournament(tournament)
 	return tournament
 
 @router.get("/{tournamentid}", response_model=TournamentSchema)
@@ -37,6 +47,8 @@ def update_tournament(tournamentid: int, payload: TournamentUpdate, db: Session
 	db.add(tournament)
 	db.commit()
 	db.refresh(tournament)
+	invalidate_tournament(tournamentid)
+	index_tournament(tournament)
 	return tournament
 
 @router.delete("/{tournamentid}", status_code=204)
@@ -44,12 +56,20 @@ def delete_tournament(tournamentid: int, db: Session = Depends(get_db), current_
 	tournament = db.query(models.Tournament).filter(models.Tournament.tournamentid == tournamentid).first()
 	if not tournament:
 		raise HTTPException(404, "Tournament not found")
+	# Its matches and results go with it (ON DELETE CASCADE); take back the rating changes they made first
+	rated_teamids = revert_ratings(db, models.RatingChange.matchid.in_(
+		db.query(models.Match.matchid).filter(models.Match.tournamentid == tournamentid)
+	))
+	bump_team_versions(db, *rated_teamids)
 	db.delete(tournament)
 	db.commit()
+	invalidate_tournament(tournamentid)
+	invalidate_team(*rated_teamids)
+	unindex("tournament", tournamentid)
 	return None
 
 @router.post("/join", status_code=201)
-def join_tournament(payload: TournamentJoinRequest, db: Session = Depends(get_db), current_user: models.User = Depends(require_authenticated_user)):
+def join_tournament(payload: TournamentJoinRequest, db: Session = Depends(get_db), identity: Identity = Depends(get_active_identity)):
 	"""Team captain joins a tournament"""
 	# Verify tournament exists
 	tournament = db.query(models.Tournament).filter(models.Tournament.tournamentid == payload.tournamentid).first()
@@ -57,13 +77,7 @@ def join_tournament(payload: TournamentJoinRequest, db: Session = Depends(get_db
 		raise HTTPException(404, "Tournament not found")
 	
 	# Verify current user is a team captain
-	player = db.query(models.Player).filter(models.Player.userid == current_user.userid).first()
-	if not player or not player.teamid:
-		raise HTTPException(403, "Only team captains can join tournaments")
-	
-	team = db.query(models.Team).filter(models.Team.teamid == player.teamid).first()
-	if not team or team.teamcaptainid != player.playerid:
-		raise HTTPException(403, "Only team captains can join tournaments")
+	team = identity.captain_team("Only team captains can join tournaments")
 	
 	# Check if team is already registered for this tournament
 	existing_entry = db.query(models.TournamentTeam).filter(
@@ -82,6 +96,7 @@ def join_tournament(payload: TournamentJoinRequest, db: Session = Depends(get_db
 	db.add(tournament_team)
 	db.commit()
 	db.refresh(tournament_team)
+	invalidate_tournament(payload.tournamentid)
 	
 	return {"message": f"Team {team.teamname} successfully joined tournament {tournament.name}"}
 
@@ -107,3 +122,308 @@ def get_tournament_teams(tournamentid: int, db: Session = Depends(get_db)):
 		"teams": teams,
 		"registered_team_ids": team_ids
 	}
+
+
+@router.get("/{tournamentid}/overview", response_model=TournamentOverview)
+def get_tournament_overview(
+	tournamentid: int,
+	top: int = Query(10, ge=1, le=50, description="Number of top scorers to return"),
+	db: Session = Depends(get_db)
+):
+	"""Everything the Tournaments/Standings pages need in one round trip: groups with ranked standings, teams, fixtures and top scorers"""
+	key = ("tournament_overview", tournamentid, top)
+	body = cache.get(key)
+	if body is None:
+		overview = build_tournament_overview(db, tournamentid, top)
+		if overview is None:
+			raise HTTPException(404, "Tournament not found")
+		body = serialize_object(TournamentOverview, overview)
+		tags = [tournament_tag(tournamentid)]
+		tags += [group_tag(group["groupid"]) for group in overview["groups"]]
+		tags += [team_tag(team.teamid) for team in overview["teams"]]
+		cache.set(key, body, tags=tags)
+	return json_response(body)
+
+# Leaderboard name in the response -> counter in tournamentplayerstats
+LEADERBOARDS = {"goals": "goals", "owngoals": "owngoals", "mvp": "mvpcount"}
+
+@router.get("/{tournamentid}/leaderboards", response_model=TournamentLeaderboards)
+def get_tournament_leaderboards(
+	tournamentid: int,
+	limit: int = Query(10, ge=1, le=100, description="Players per leaderboard"),
+	db: Session = Depends(get_db)
+):
+	"""Top scorers, own goals and MVP awards of a tournament, read from the per-tournament player counters"""
+	key = ("tournament_leaderboards", tournamentid, limit)
+	body = cache.get(key)
+	if body is None:
+		if not db.query(models.Tournament.tournamentid).filter(models.Tournament.tournamentid == tournamentid).first():
+			raise HTTPException(404, "Tournament not found")
+		boards = {"tournamentid": tournamentid}
+		for name, counter in LEADERBOARDS.items():
+			entries = []
+			for row in tournament_leaderboard(db, tournamentid, counter, limit):
+				value = getattr(row, counter)
+				# Shared places: 1, 2, 2, 4
+				rank = entries[-1]["rank"] if entries and entries[-1]["value"] == value else len(entries) + 1
+				entries.append({**row._mapping, "rank": rank, "value": value})
+			boards[name] = entries
+		body = serialize_object(TournamentLeaderboards, boards)
+		cache.set(key, body, tags=[tournament_tag(tournamentid)])
+	return json_response(body)
+
+@router.post("/{tournamentid}/leaderboards/rebuild", status_code=204)
+def rebuild_tournament_leaderboards(tournamentid: int, db: Session = Depends(get_db), current_user: models.User = Depends(require_admin)):
+	"""Recount the tournament's player counters from its goals and results (admin only)"""
+	if not db.query(models.Tournament.tournamentid).filter(models.Tournament.tournamentid == tournamentid).first():
+		raise HTTPException(404, "Tournament not found")
+	rebuild_tournament_player_stats(db, tournamentid)
+	db.commit()
+	invalidate_tournament(tournamentid)
+	return None
+
+def build_tournament_overview(db: Session, tournamentid: int, top: int = 10) -> Optional[dict]:
+	"""Build the overview from five set-based queries, independent of how many groups, teams or matches the tournament has"""
+	# 1. Tournament
+	tournament = db.query(models.Tournament).filter(models.Tournament.tournamentid == tournamentid).first()
+	if not tournament:
+		return None
+
+	# 2. Groups with their standings, already in ranking order
+	standing_rows = db.query(
+		models.TournamentGroup.groupid,
+		models.TournamentGroup.groupname,
+		models.Standings.teamid,
+		models.Standings.matchesplayed,
+		models.Standings.wins,
+		models.Standings.draws,
+		models.Standings.losses,
+		models.Standings.goalsfor,
+		models.Standings.goalsagainst,
+		models.Standings.points,
+		models.Team.teamname,
+		models.Team.logourl,
+	).outerjoin(
+		models.Standings, models.Standings.groupid == models.TournamentGroup.groupid
+	).outerjoin(
+		models.Team, models.Standings.teamid == models.Team.teamid
+	).filter(
+		models.TournamentGroup.tournamentid == tournamentid
+	).order_by(
+		models.TournamentGroup.groupname,
+		models.TournamentGroup.groupid,
+		models.Standings.points.desc(),
+		(models.Standings.goalsfor - models.Standings.goalsagainst).desc(),
+		models.Standings.goalsfor.desc(),
+		models.Team.teamname,
+	).all()
+
+	groups = {}
+	for row in standing_rows:
+		group = groups.get(row.groupid)
+		if group is None:
+			group = groups[row.groupid] = {"groupid": row.groupid, "groupname": row.groupname, "standings": []}
+		if row.teamid is None:
+			continue  # Group without any standings yet
+		group["standings"].append({
+			"rank": len(group["standings"]) + 1,
+			"teamid": row.teamid,
+			"teamname": row.teamname,
+			"teamlogo": row.logourl,
+			"matchesplayed": row.matchesplayed,
+			"wins": row.wins,
+			"draws": row.draws,
+			"losses": row.losses,
+			"goalsfor": row.goalsfor,
+			"goalsagainst": row.goalsagainst,
+			"goaldifference": row.goalsfor - row.goalsagainst,
+			"points": row.points,
+		})
+
+	# 3. Registered teams
+	teams = db.query(
+		models.Team.teamid,
+		models.Team.teamname,
+		models.Team.logourl,
+	).join(
+		models.TournamentTeam, models.TournamentTeam.teamid == models.Team.teamid
+	).filter(
+		models.TournamentTeam.tournamentid == tournamentid
+	).order_by(models.Team.teamname).all()
+
+	# 4. Fixtures with team names, stadium and score
+	hometeam = aliased(models.Team)
+	awayteam = aliased(models.Team)
+	fixtures = db.query(
+		models.Match.matchid,
+		models.Match.hometeamid,
+		models.Match.awayteamid,
+		func.coalesce(hometeam.teamname, "TBD").label("hometeamname"),
+		func.coalesce(awayteam.teamname, "TBD").label("awayteamname"),
+		models.Match.stadiumid,
+		models.Stadium.name.label("stadiumname"),
+		models.Match.matchdate,
+		models.Match.round,
+		models.Match.status,
+		models.MatchResult.homescore,
+		models.MatchResult.awayscore,
+	).outerjoin(
+		hometeam, models.Match.hometeamid == hometeam.teamid
+	).outerjoin(
+		awayteam, models.Match.awayteamid == awayteam.teamid
+	).outerjoin(
+		models.Stadium, models.Match.stadiumid == models.Stadium.stadiumid
+	).outerjoin(
+		models.MatchResult, models.MatchResult.matchid == models.Match.matchid
+	).filter(
+		models.Match.tournamentid == tournamentid
+	).order_by(models.Match.matchdate, models.Match.matchid).all()
+
+	# 5. Top scorers from the maintained per-tournament counters (own goals don't count)
+	top_scorers = tournament_leaderboard(db, tournamentid, "goals", top)
+
+	return {
+		"tournament": tournament,
+		"groups": list(groups.values()),
+		"teams": teams,
+		"fixtures": fixtures,
+		"top_scorers": top_scorers,
+	}
+
+@router.post("/{tournamentid}/knockout", response_model=Bracket, status_code=201)
+def generate_knockout(
+	tournamentid: int,
+	payload: KnockoutRequest,
+	preview: bool = Query(False, description="Return the bracket without creating any matches"),
+	db: Session = Depends(get_db),
+	current_user: models.User = Depends(require_organizer_or_admin)
+):
+	"""
+	Seed the knockout stage from the final group tables and create every
+	knockout match (Round of 16 down to the final) in one transaction. Only the
+	first round has teams; winners are moved on as knockout results come in.
+	"""
+	tournament = db.query(models.Tournament.tournamentid).filter(models.Tournament.tournamentid == tournamentid).first()
+	if not tournament:
+		raise HTTPException(404, "Tournament not found")
+	if not preview and db.query(models.KnockoutMatch.matchid).filter(models.KnockoutMatch.tournamentid == tournamentid).first():
+		raise HTTPException(409, "This tournament already has a knockout bracket")
+	if not payload.force:
+		# A result, not the status, marks a match as played: matches turn Finished
+		# on the clock, and ones scored before going Live stay Upcoming
+		unfinished = db.query(models.Match.matchid).outerjoin(
+			models.MatchResult, models.MatchResult.matchid == models.Match.matchid
+		).filter(
+			models.Match.tournamentid == tournamentid,
+			models.Match.round == "Group",
+			models.MatchResult.resultid.is_(None),
+		).first()
+		if unfinished:
+			raise HTTPException(409, "The group stage is not finished; pass force to seed from the current standings")
+
+	# One standings snapshot for every group; seeding never goes back to the database
+	groups = standings_snapshot(db, tournamentid)
+	if not groups:
+		raise HTTPException(400, "This tournament has no group standings to seed from")
+	stadiumids, missing = resolve_stadiums(db, payload.stadiumids)
+	if missing:
+		raise HTTPException(404, f"Stadium {missing[0]} not found")
+	try:
+		rounds = plan_bracket(seed_first_round(groups, payload.qualifiers_per_group, payload.seeding, payload.pairings))
+		schedule_rounds(
+			rounds,
+			start=payload.start,
+			kickoff_times=payload.kickoff_times or [payload.start.time()],
+			stadiumids=stadiumids,
+			days_between_rounds=payload.days_between_rounds,
+			booked_slots=booked_stadium_slots(db, stadiumids, payload.start),
+		)
+	except BracketError as e:
+		raise HTTPException(400, str(e))
+
+	planned = [match for matches in rounds for match in matches]
+	if not preview:
+		# All knockout matches in one INSERT ... RETURNING, then their bracket links
+		table = models.Match.__table__
+		result = db.execute(
+			insert(table).returning(table.c.matchid, sort_by_parameter_order=True),
+			[
+				{
+					"tournamentid": tournamentid,
+					"hometeamid": match["home"]["teamid"] if match["home"] else None,
+					"awayteamid": match["away"]["teamid"] if match["away"] else None,
+					"stadiumid": match["stadiumid"],
+					"matchdate": match["matchdate"],
+					"round": match["round"],
+					"status": "Upcoming",
+				}
+				for match in planned
+			],
+		)
+		for match, matchid in zip(planned, result.scalars()):
+			match["matchid"] = matchid
+		for current, following in zip(rounds, rounds[1:]):
+			for match in current:
+				match["nextmatchid"] = following[match["position"] // 2]["matchid"]
+				match["nextslot"] = "home" if match["position"] % 2 == 0 else "away"
+		db.execute(insert(models.KnockoutMatch.__table__), [
+			{
+				"matchid": match["matchid"],
+				"tournamentid": tournamentid,
+				"round": match["round"],
+				"position": match["position"],
+				"nextmatchid": match.get("nextmatchid"),
+				"nextslot": match.get("nextslot"),
+			}
+			for match in planned
+		])
+		bump_team_versions(db, *(entry["teamid"] for match in rounds[0] for entry in (match["home"], match["away"])))
+		db.commit()
+		invalidate_tournament(tournamentid)
+
+	bracket = {
+		"tournamentid": tournamentid,
+		"preview": preview,
+		"matches": [
+			{
+				"matchid": match.get("matchid"),
+				"round": match["round"],
+				"position": match["position"],
+				"hometeamid": match["home"]["teamid"] if match["home"] else None,
+				"awayteamid": match["away"]["teamid"] if match["away"] else None,
+				"homeseed": match["home"]["seed"] if match["home"] else None,
+				"awayseed": match["away"]["seed"] if match["away"] else None,
+				"stadiumid": match["stadiumid"],
+				"matchdate": match["matchdate"],
+				"nextmatchid": match.get("nextmatchid"),
+				"nextslot": match.get("nextslot"),
+			}
+			for match in planned
+		],
+	}
+	return json_response(serialize_object(Bracket, bracket), 200 if preview else 201)
+
+@router.get("/{tournamentid}/bracket", response_model=Bracket)
+def get_bracket(tournamentid: int, db: Session = Depends(get_db)):
+	"""The tournament's knockout bracket with current teams and scores, first round first"""
+	rows = db.query(
+		models.KnockoutMatch.matchid,
+		models.KnockoutMatch.round,
+		models.KnockoutMatch.position,
+		models.KnockoutMatch.nextmatchid,
+		models.KnockoutMatch.nextslot,
+		models.Match.hometeamid,
+		models.Match.awayteamid,
+		models.Match.stadiumid,
+		models.Match.matchdate,
+		models.MatchResult.homescore,
+		models.MatchResult.awayscore,
+	).join(
+		models.Match, models.Match.matchid == models.KnockoutMatch.matchid
+	).outerjoin(
+		models.MatchResult, models.MatchResult.matchid == models.KnockoutMatch.matchid
+	).filter(models.KnockoutMatch.tournamentid == tournamentid).all()
+	if not rows:
+		raise HTTPException(404, "This tournament has no knockout bracket")
+	rows.sort(key=lambda row: (KNOCKOUT_ROUNDS.index(row.round) if row.round in KNOCKOUT_ROUNDS else len(KNOCKOUT_ROUNDS), row.position))
+	return json_response(serialize_object(Bracket, {"tournamentid": tournamentid, "matches": rows}))
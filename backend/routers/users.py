@@ -5,6 +5,8 @@ from deps import get_db
 import models
 from schemas import User as UserSchema, UserUpdate
 from pydantic import BaseModel
+from services.player_search import invalidate_player_search
+from services.search_index import index_user
 
 router = APIRouter()
 
@@ -70,4 +72,6 @@ def update_user(userid: int, payload: UserUpdate, db: Session = Depends(get_db))
     db.add(user)
     db.commit()
     db.refresh(user)
+    invalidate_player_search()
+    index_user(user)
     return user
\ No newline at end of file
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Run one maintenance job now, to completion, instead of waiting for its
+schedule (the app runs them in the background; see services/jobs.py). The job
+still goes through its lock, so it won't run twice if a worker already has it,
+and it works in the same small chunks. Replaces the old one-off profile image
+scripts: `python run_job.py fill_default_profile_images`.
+
+Usage: python run_job.py [job name]   (no name lists the jobs)
+"""
+
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from database import SessionLocal, init_db
+import models
+from services.jobs import scheduler
+
+def list_jobs():
+    for job in scheduler.jobs.values():
+        print(f"{job.name:<36} {job.schedule.expression:<14} {job.description}")
+
+def run_job(name):
+    """Run the named job once; False if it is unknown, locked by a worker or failed"""
+    job = scheduler.jobs.get(name)
+    if job is None:
+        print(f"❌ Unknown job {name}")
+        return False
+    init_db()
+    db = SessionLocal()
+    try:
+        scheduler.ensure_states(db)
+    finally:
+        db.close()
+    if not scheduler.run(job, force=True):
+        print(f"❌ {name} is running on a worker right now; try again later")
+        return False
+    db = SessionLocal()
+    try:
+        state = db.query(models.JobState).filter(models.JobState.name == name).first()
+        if state.lasterrorat is not None and state.lasterrorat >= state.laststartedat:
+            print(f"❌ {name} failed; it will resume from where it stopped: {state.lasterror}")
+            return False
+        print(f"✓ {name} processed {state.lastrows} rows in {state.lastduration:.2f}s")
+        return True
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        list_jobs()
+        sys.exit(0)
+    print(f"🔄 Running {sys.argv[1]}...")
+    success = run_job(sys.argv[1])
+    sys.exit(0 if success else 1)
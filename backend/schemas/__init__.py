@@ -1,35 +1,41 @@
 from schemas.user import User, UserCreate, UserUpdate, UserResponse
 from schemas.admin import Admin, AdminCreate, AdminUpdate, AdminWithUser
 from schemas.auth import LoginRequest, RegisterRequest, AuthResponse, TokenData
-from schemas.team import Team, TeamCreate, TeamUpdate
+from schemas.team import Team, TeamCreate, TeamUpdate, TeamBundle, TeamVersion, TeamRanking, RatingReplay, TeamForm, HeadToHead
 from schemas.playerstats import PlayerStats, PlayerStatsCreate, PlayerStatsUpdate
-from schemas.player import Player, PlayerCreate, PlayerUpdate, PlayerWithUser
+from schemas.player import Player, PlayerCreate, PlayerUpdate, PlayerWithUser, PlayerProfile, PlayerTournamentStats, PlayerSearchResult
 from schemas.stadium import Stadium, StadiumCreate, StadiumUpdate
-from schemas.tournament import Tournament, TournamentCreate, TournamentUpdate, TournamentJoinRequest
+from schemas.tournament import Tournament, TournamentCreate, TournamentUpdate, TournamentJoinRequest, TournamentOverview, KnockoutRequest, Bracket, TournamentLeaderboards
 from schemas.tournament_team import TournamentTeam, TournamentTeamCreate
-from schemas.tournament_group import TournamentGroup, TournamentGroupCreate, TournamentGroupUpdate
+from schemas.tournament_group import TournamentGroup, TournamentGroupCreate, TournamentGroupUpdate, FixtureRequest, FixtureSchedule, GroupProjection
 from schemas.group_teams import GroupTeams, GroupTeamsCreate
 from schemas.standings import Standings, StandingsCreate, StandingsUpdate
 from schemas.match import Match, MatchCreate, MatchUpdate
 from schemas.match_result import MatchResult, MatchResultCreate, MatchResultUpdate
 from schemas.goal import Goal, GoalCreate, GoalUpdate, GoalWithPlayer
+from schemas.match_event import MatchEvent, MatchEventCreate, MatchEventBatchCreate, MatchEventBatch
+from schemas.live import LiveMatch, LiveUpdate
 from schemas.event import Event, EventCreate, EventUpdate
+from schemas.job import Job
 
 __all__ = [
 	"User", "UserCreate", "UserUpdate", "UserResponse",
 	"Admin", "AdminCreate", "AdminUpdate", "AdminWithUser",
 	"LoginRequest", "RegisterRequest", "AuthResponse", "TokenData",
-	"Team", "TeamCreate", "TeamUpdate",
+	"Team", "TeamCreate", "TeamUpdate", "TeamBundle", "TeamVersion", "TeamRanking", "RatingReplay", "TeamForm", "HeadToHead",
 	"PlayerStats", "PlayerStatsCreate", "PlayerStatsUpdate",
-	"Player", "PlayerCreate", "PlayerUpdate", "PlayerWithUser",
+	"Player", "PlayerCreate", "PlayerUpdate", "PlayerWithUser", "PlayerProfile", "PlayerTournamentStats", "PlayerSearchResult",
 	"Stadium", "StadiumCreate", "StadiumUpdate",
-	"Tournament", "TournamentCreate", "TournamentUpdate", "TournamentJoinRequest",
+	"Tournament", "TournamentCreate", "TournamentUpdate", "TournamentJoinRequest", "TournamentOverview", "KnockoutRequest", "Bracket", "TournamentLeaderboards",
 	"TournamentTeam", "TournamentTeamCreate",
-	"TournamentGroup", "TournamentGroupCreate", "TournamentGroupUpdate",
+	"TournamentGroup", "TournamentGroupCreate", "TournamentGroupUpdate", "FixtureRequest", "FixtureSchedule", "GroupProjection",
 	"GroupTeams", "GroupTeamsCreate",
 	"Standings", "StandingsCreate", "StandingsUpdate",
 	"Match", "MatchCreate", "MatchUpdate",
 	"MatchResult", "MatchResultCreate", "MatchResultUpdate",
 	"Goal", "GoalCreate", "GoalUpdate", "GoalWithPlayer",
+	"MatchEvent", "MatchEventCreate", "MatchEventBatchCreate", "MatchEventBatch",
+	"LiveMatch", "LiveUpdate",
 	"Event", "EventCreate", "EventUpdate",
+	"Job",
 ]
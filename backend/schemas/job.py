@@ -0,0 +1,20 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+class Job(BaseModel):
+	name: str
+	description: str = ""
+	schedule: str
+	nextrunat: datetime
+	running: bool = False  # a run is in progress or was interrupted and will resume
+	runs: int = 0
+	failures: int = 0
+	chunks: int = 0
+	rows: int = 0
+	laststartedat: Optional[datetime] = None
+	lastfinishedat: Optional[datetime] = None
+	lastduration: Optional[float] = None
+	lastrows: Optional[int] = None
+	lasterror: Optional[str] = None
+	lasterrorat: Optional[datetime] = None
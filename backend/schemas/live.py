@@ -0,0 +1,17 @@
+from typing import Optional, List
+from pydantic import BaseModel, Field
+from schemas.match_event import MatchEventCreate
+
+class LiveMatch(BaseModel):
+	matchid: int
+	tournamentid: Optional[int] = None
+	hometeamid: Optional[int] = None
+	awayteamid: Optional[int] = None
+	homescore: int = 0
+	awayscore: int = 0
+	minute: Optional[int] = None
+	seq: int = 0  # bumped on every change; a gap means missed messages, so fetch a new snapshot
+
+class LiveUpdate(BaseModel):
+	minute: Optional[int] = Field(None, ge=0, le=200)
+	events: List[MatchEventCreate] = Field([], max_length=50)
@@ -2,7 +2,7 @@ from typing import Optional, Literal
 from datetime import datetime
 from pydantic import BaseModel
 
-MatchRound = Literal["Group", "Quarter", "Semi", "Final"]
+MatchRound = Literal["Group", "Round of 16", "Quarter", "Semi", "Final"]
 MatchStatus = Literal["Upcoming", "Live", "Finished"]
 
 class MatchBase(BaseModel):
@@ -0,0 +1,39 @@
+from typing import Optional, Literal, List
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+MatchEventType = Literal["goal", "assist", "yellow", "red", "substitution", "mvp", "void"]
+
+class MatchEventCreate(BaseModel):
+	eventtype: MatchEventType
+	playerid: Optional[int] = None  # required for everything but "void"
+	teamid: Optional[int] = None  # defaults to the player's team
+	minute: Optional[int] = Field(None, ge=0, le=200)
+	isowngoal: int = 0
+	relatedplayerid: Optional[int] = None  # substitution: the player going off
+	relatedeventid: Optional[int] = None  # void: the event to cancel
+
+class MatchEventBatchCreate(BaseModel):
+	# A whole match (or a stretch of it) at once
+	events: List[MatchEventCreate] = Field(..., min_length=1, max_length=500)
+
+class MatchEvent(BaseModel):
+	eventid: int
+	matchid: int
+	eventtype: str
+	playerid: Optional[int] = None
+	teamid: Optional[int] = None
+	minute: Optional[int] = None
+	isowngoal: int = 0
+	relatedplayerid: Optional[int] = None
+	relatedeventid: Optional[int] = None
+	goalid: Optional[int] = None
+	createdat: Optional[datetime] = None
+	voided: bool = False
+
+	class Config:
+		from_attributes = True
+
+class MatchEventBatch(BaseModel):
+	matchid: int
+	events: List[MatchEvent] = []
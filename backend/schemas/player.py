@@ -1,4 +1,4 @@
-from typing import Optional, Literal
+from typing import Optional, Literal, List
 from datetime import datetime
 from pydantic import BaseModel
 
@@ -63,4 +63,34 @@ class PlayerWithUser(PlayerBase):
 		elif self.lastname:
 			return self.lastname
 		else:
-			return f"Player {self.playerid}"
\ No newline at end of file
+			return f"Player {self.playerid}"
+
+class PlayerTournamentStats(BaseModel):
+	tournamentid: int
+	tournamentname: Optional[str] = None
+	seasonyear: Optional[int] = None
+	teamid: Optional[int] = None  # the team the player played for in the tournament
+	teamname: Optional[str] = None
+	matchesplayed: int = 0
+	goals: int = 0
+	owngoals: int = 0
+	mvpcount: int = 0
+	assists: int = 0
+	yellowcards: int = 0
+	redcards: int = 0
+
+	class Config:
+		from_attributes = True
+
+class PlayerProfile(PlayerWithUser):
+	# The flat statistics above are career totals; these are per tournament, newest first
+	tournaments: List[PlayerTournamentStats] = []
+
+class PlayerSearchHit(PlayerWithUser):
+	score: float
+
+class PlayerSearchResult(BaseModel):
+	total: int
+	skip: int
+	limit: int
+	items: List[PlayerSearchHit] = []
@@ -0,0 +1,15 @@
+from typing import Optional, List, Literal
+from pydantic import BaseModel
+
+SearchType = Literal["team", "user", "tournament", "event", "stadium"]
+
+class SearchHit(BaseModel):
+	type: SearchType
+	id: int
+	title: Optional[str] = None
+	subtitle: Optional[str] = None
+	score: float
+
+class SearchResult(BaseModel):
+	query: str
+	hits: List[SearchHit] = []
@@ -1,5 +1,7 @@
-from typing import Optional
+from typing import Optional, List
+from datetime import datetime
 from pydantic import BaseModel
+from schemas.player import PlayerWithUser
 
 class TeamBase(BaseModel):
 	teamname: Optional[str] = None
@@ -21,3 +23,93 @@ class TeamUpdate(TeamBase):
 
 class Team(TeamBase):
 	teamid: int
+
+
+class TeamVersion(BaseModel):
+	teamid: int
+	version: int
+
+class TeamStats(BaseModel):
+	matchesplayed: int = 0
+	wins: int = 0
+	draws: int = 0
+	losses: int = 0
+	goalsfor: int = 0
+	goalsagainst: int = 0
+	goaldifference: int = 0
+	points: int = 0
+
+class TeamMatchSummary(BaseModel):
+	matchid: int
+	tournamentid: Optional[int] = None
+	matchdate: datetime
+	round: Optional[str] = None
+	status: Optional[str] = None
+	ishome: bool
+	opponentid: Optional[int] = None
+	opponentname: str = "TBD"
+	opponentlogo: Optional[str] = None
+	goalsfor: Optional[int] = None
+	goalsagainst: Optional[int] = None
+
+class TeamBundle(BaseModel):
+	version: int
+	team: Team
+	captain: Optional[PlayerWithUser] = None
+	roster: List[PlayerWithUser] = []
+	stats: TeamStats
+	recent_matches: List[TeamMatchSummary] = []
+	upcoming_matches: List[TeamMatchSummary] = []
+
+class TeamRanking(BaseModel):
+	rank: int
+	teamid: int
+	teamname: str
+	logourl: Optional[str] = None
+	rating: float
+	matchesplayed: int
+
+class RatingReplay(BaseModel):
+	results: int  # results rated
+	teams: int  # teams with a rating
+
+class FormMatch(BaseModel):
+	matchid: int
+	matchdate: datetime
+	tournamentid: Optional[int] = None
+	round: Optional[str] = None
+	ishome: bool
+	opponentid: Optional[int] = None
+	opponentname: str = "TBD"
+	goalsfor: int
+	goalsagainst: int
+	result: str  # "W", "D" or "L" from this team's side
+
+class Streak(BaseModel):
+	result: str
+	length: int
+
+class TeamForm(BaseModel):
+	teamid: int
+	teamname: str
+	matches: int  # decided matches overall
+	form: str  # results of the recent matches, newest first, e.g. "WWDLW"
+	recent: List[FormMatch] = []
+	current_streak: Optional[Streak] = None
+	current_unbeaten_run: int = 0
+	longest_win_streak: int = 0
+	longest_unbeaten_run: int = 0
+	longest_losing_streak: int = 0
+
+class HeadToHead(BaseModel):
+	teamid: int
+	teamname: str
+	opponentid: int
+	opponentname: str
+	played: int = 0
+	wins: int = 0  # from teamid's side
+	draws: int = 0
+	losses: int = 0
+	goalsfor: int = 0
+	goalsagainst: int = 0
+	meetings: List[FormMatch] = []  # newest first
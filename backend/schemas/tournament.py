@@ -1,6 +1,7 @@
-from typing import Optional
-from datetime import date
-from pydantic import BaseModel
+from typing import Optional, List, Literal, Tuple
+from datetime import date, datetime, time
+from pydantic import BaseModel, Field, model_validator
+from schemas.tournament_group import local_kickoff_times, local_naive
 
 class TournamentBase(BaseModel):
 	name: Optional[str] = None
@@ -29,4 +30,111 @@ class Tournament(TournamentBase):
 
 class TournamentJoinRequest(BaseModel):
 	tournamentid: int
-	note: Optional[str] = None
\ No newline at end of file
+	note: Optional[str] = None
+
+class OverviewStanding(BaseModel):
+	rank: int
+	teamid: Optional[int] = None
+	teamname: Optional[str] = None
+	teamlogo: Optional[str] = None
+	matchesplayed: int = 0
+	wins: int = 0
+	draws: int = 0
+	losses: int = 0
+	goalsfor: int = 0
+	goalsagainst: int = 0
+	goaldifference: int = 0
+	points: int = 0
+
+class OverviewGroup(BaseModel):
+	groupid: int
+	groupname: str
+	standings: List[OverviewStanding] = []
+
+class OverviewTeam(BaseModel):
+	teamid: int
+	teamname: str
+	logourl: Optional[str] = None
+
+class OverviewFixture(BaseModel):
+	matchid: int
+	hometeamid: Optional[int] = None
+	awayteamid: Optional[int] = None
+	hometeamname: str = "TBD"
+	awayteamname: str = "TBD"
+	stadiumid: Optional[int] = None
+	stadiumname: Optional[str] = None
+	matchdate: datetime
+	round: Optional[str] = None
+	status: Optional[str] = None
+	homescore: Optional[int] = None
+	awayscore: Optional[int] = None
+
+class OverviewScorer(BaseModel):
+	playerid: int
+	firstname: Optional[str] = None
+	lastname: Optional[str] = None
+	teamid: Optional[int] = None
+	teamname: Optional[str] = None
+	goals: int
+
+class LeaderboardEntry(BaseModel):
+	rank: int  # tied players share a rank
+	playerid: int
+	firstname: Optional[str] = None
+	lastname: Optional[str] = None
+	teamid: Optional[int] = None
+	teamname: Optional[str] = None
+	value: int
+
+class TournamentLeaderboards(BaseModel):
+	tournamentid: int
+	goals: List[LeaderboardEntry] = []
+	owngoals: List[LeaderboardEntry] = []
+	mvp: List[LeaderboardEntry] = []
+
+class TournamentOverview(BaseModel):
+	tournament: Tournament
+	groups: List[OverviewGroup] = []
+	teams: List[OverviewTeam] = []
+	fixtures: List[OverviewFixture] = []
+	top_scorers: List[OverviewScorer] = []
+
+class KnockoutRequest(BaseModel):
+	start: datetime  # kickoff of the first knockout round
+	qualifiers_per_group: int = Field(2, ge=1, le=16)
+	# cross: A1 v B2, B1 v A2, ... between neighbouring groups (a single group plays 1 v n)
+	# ranked: all qualifiers seeded 1..n by group position, points, goal difference and goals, best v worst
+	seeding: Literal["cross", "ranked"] = "cross"
+	# Explicit first-round pairings such as [["A1", "B2"], ["B1", "A2"]] (group name + final position), in bracket order
+	pairings: Optional[List[Tuple[str, str]]] = None
+	days_between_rounds: int = Field(3, ge=1, le=60)
+	kickoff_times: Optional[List[time]] = None  # daily kickoff slots; defaults to the time of start
+	stadiumids: Optional[List[int]] = None  # stadiums to use; defaults to all stadiums
+	force: bool = False  # seed even if some group matches are not finished
+
+	@model_validator(mode="after")
+	def to_local_time(self):
+		self.kickoff_times = local_kickoff_times(self.start, self.kickoff_times)
+		self.start = local_naive(self.start)
+		return self
+
+class BracketMatch(BaseModel):
+	matchid: Optional[int] = None  # set once the match has been created
+	round: str
+	position: int
+	hometeamid: Optional[int] = None
+	awayteamid: Optional[int] = None
+	homeseed: Optional[str] = None  # e.g. "A1"; first round only
+	awayseed: Optional[str] = None
+	stadiumid: Optional[int] = None
+	matchdate: datetime
+	nextmatchid: Optional[int] = None
+	nextslot: Optional[str] = None
+	homescore: Optional[int] = None
+	awayscore: Optional[int] = None
+
+class Bracket(BaseModel):
+	tournamentid: int
+	preview: bool = False
+	matches: List[BracketMatch]
@@ -1,5 +1,20 @@
-from typing import Optional
-from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime, time
+from pydantic import BaseModel, Field, model_validator
+
+def local_naive(value: datetime) -> datetime:
+	"""
+	An aware datetime (JavaScript's toISOString() sends "...Z") as naive local
+	time, the way matchdate is stored and compared with datetime.now(); naive
+	values are returned unchanged.
+	"""
+	return value.astimezone().replace(tzinfo=None) if value.tzinfo is not None else value
+
+def local_kickoff_times(start: datetime, kickoff_times: Optional[List[time]]) -> Optional[List[time]]:
+	"""Kickoff times with an offset, converted to local time on the (unconverted) start's date"""
+	if kickoff_times is None:
+		return None
+	return [local_naive(datetime.combine(start.date(), kickoff, tzinfo=kickoff.tzinfo)).time() for kickoff in kickoff_times]
 
 class TournamentGroupBase(BaseModel):
 	tournamentid: Optional[int] = None
@@ -17,3 +32,48 @@ class TournamentGroupUpdate(TournamentGroupBase):
 
 class TournamentGroup(TournamentGroupBase):
 	groupid: int
+
+class FixtureRequest(BaseModel):
+	start: datetime  # date and time of the earliest kickoff
+	double_round_robin: bool = False  # every pairing home and away
+	rest_days: int = Field(1, ge=0, le=30)  # full days a team rests between matches
+	kickoff_times: Optional[List[time]] = None  # daily kickoff slots; defaults to the time of start
+	stadiumids: Optional[List[int]] = None  # stadiums to use; defaults to all stadiums
+
+	@model_validator(mode="after")
+	def to_local_time(self):
+		self.kickoff_times = local_kickoff_times(self.start, self.kickoff_times)
+		self.start = local_naive(self.start)
+		return self
+
+class ScheduledFixture(BaseModel):
+	matchid: Optional[int] = None  # set once the fixture has been created
+	matchday: int
+	hometeamid: int
+	awayteamid: int
+	stadiumid: Optional[int] = None
+	matchdate: datetime
+
+class FixtureSchedule(BaseModel):
+	groupid: int
+	tournamentid: Optional[int] = None
+	preview: bool
+	matchdays: int
+	fixtures: List[ScheduledFixture]
+
+class TeamProjection(BaseModel):
+	teamid: int
+	teamname: Optional[str] = None
+	points: int
+	expected_points: float  # current points plus the expected points from remaining matches
+	average_position: float
+	qualify_probability: float  # chance of finishing in the top `qualifiers`
+	positions: List[float]  # positions[i] = chance of finishing (i + 1)th
+
+class GroupProjection(BaseModel):
+	groupid: int
+	tournamentid: Optional[int] = None
+	simulations: int
+	qualifiers: int
+	remaining_matches: int
+	teams: List[TeamProjection]
@@ -0,0 +1,198 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from sqlalchemy.orm import Session
+import models
+
+# Round name by the number of teams entering it
+ROUND_NAMES = {16: "Round of 16", 8: "Quarter", 4: "Semi", 2: "Final"}
+KNOCKOUT_ROUNDS = tuple(ROUND_NAMES.values())
+
+class BracketError(ValueError):
+    pass
+
+def standings_snapshot(db: Session, tournamentid: int) -> Dict[str, List[dict]]:
+    """
+    Final group tables for a tournament from one query: group name -> teams in
+    ranking order (points, goal difference, goals scored), each with its rank.
+    """
+    rows = db.query(
+        models.TournamentGroup.groupname,
+        models.Standings.teamid,
+        models.Standings.points,
+        models.Standings.goalsfor,
+        models.Standings.goalsagainst,
+    ).join(
+        models.Standings, models.Standings.groupid == models.TournamentGroup.groupid
+    ).filter(
+        models.TournamentGroup.tournamentid == tournamentid,
+        models.Standings.teamid.isnot(None),
+    ).order_by(
+        models.TournamentGroup.groupname,
+        models.TournamentGroup.groupid,
+        models.Standings.points.desc(),
+        (models.Standings.goalsfor - models.Standings.goalsagainst).desc(),
+        models.Standings.goalsfor.desc(),
+        models.Standings.teamid,
+    ).all()
+
+    groups: Dict[str, List[dict]] = {}
+    for row in rows:
+        table = groups.setdefault(row.groupname, [])
+        table.append({
+            "seed": f"{row.groupname}{len(table) + 1}",
+            "rank": len(table) + 1,
+            "teamid": row.teamid,
+            "points": row.points,
+            "goaldifference": row.goalsfor - row.goalsagainst,
+            "goalsfor": row.goalsfor,
+        })
+    return groups
+
+def _standard_order(size: int) -> List[int]:
+    """Seed numbers in bracket order so seeds 1 and 2 can only meet in the final: 8 -> 1 8 4 5 2 7 3 6"""
+    order = [1]
+    while len(order) < size:
+        doubled = len(order) * 2
+        order = [seed for top in order for seed in (top, doubled + 1 - top)]
+    return order
+
+def seed_first_round(
+    groups: Dict[str, List[dict]],
+    qualifiers_per_group: int,
+    seeding: str = "cross",
+    pairings: Optional[Sequence[Tuple[str, str]]] = None,
+) -> List[Tuple[dict, dict]]:
+    """
+    First-round (home, away) entries in bracket order: neighbouring pairs feed
+    the same match of the next round.
+    """
+    if pairings:
+        by_seed = {entry["seed"].casefold(): entry for table in groups.values() for entry in table}
+        matches = []
+        used: Set[int] = set()
+        for home_seed, away_seed in pairings:
+            pair = []
+            for seed in (home_seed, away_seed):
+                entry = by_seed.get(seed.strip().casefold())
+                if entry is None:
+                    raise BracketError(f"Unknown seed {seed!r}; use group name and final position, e.g. A1")
+                if entry["teamid"] in used:
+                    raise BracketError(f"Seed {seed!r} appears in more than one pairing")
+                used.add(entry["teamid"])
+                pair.append(entry)
+            matches.append((pair[0], pair[1]))
+    else:
+        short = [name for name, table in groups.items() if len(table) < qualifiers_per_group]
+        if short:
+            raise BracketError(f"Group {short[0]} has fewer than {qualifiers_per_group} teams")
+        qualified = {name: table[:qualifiers_per_group] for name, table in groups.items()}
+        names = list(qualified)
+        if seeding == "cross" and len(names) > 1:
+            if len(names) % 2:
+                raise BracketError("Cross seeding needs an even number of groups; use ranked seeding or explicit pairings")
+            matches = []
+            q = qualifiers_per_group
+            # Xk v Y(q+1-k) for neighbouring groups X, Y; looping k outermost keeps
+            # group winners in opposite halves of the bracket
+            for k in range(q):
+                for x, y in zip(names[0::2], names[1::2]):
+                    a, b = qualified[x][k], qualified[y][q - 1 - k]
+                    matches.append((a, b) if a["rank"] <= b["rank"] else (b, a))
+        else:
+            ranked = sorted(
+                (entry for table in qualified.values() for entry in table),
+                key=lambda e: (e["rank"], -e["points"], -e["goaldifference"], -e["goalsfor"], e["teamid"]),
+            )
+            _check_size(len(ranked))
+            order = _standard_order(len(ranked))
+            matches = [(ranked[order[i] - 1], ranked[order[i + 1] - 1]) for i in range(0, len(order), 2)]
+
+    _check_size(len(matches) * 2)
+    return matches
+
+def _check_size(teams: int) -> None:
+    if teams not in ROUND_NAMES:
+        raise BracketError(f"A knockout needs 2, 4, 8 or 16 teams, got {teams}")
+
+def plan_bracket(first_round: List[Tuple[dict, dict]]) -> List[List[dict]]:
+    """Every round of the bracket; only the first has teams, the rest are filled in as winners advance"""
+    rounds = []
+    size = len(first_round)
+    rounds.append([
+        {"round": ROUND_NAMES[size * 2], "position": i, "home": home, "away": away}
+        for i, (home, away) in enumerate(first_round)
+    ])
+    while size > 1:
+        size //= 2
+        rounds.append([
+            {"round": ROUND_NAMES[size * 2], "position": i, "home": None, "away": None}
+            for i in range(size)
+        ])
+    return rounds
+
+def schedule_rounds(
+    rounds: List[List[dict]],
+    start: datetime,
+    kickoff_times: Iterable[time],
+    stadiumids: Sequence[int],
+    days_between_rounds: int,
+    booked_slots: Set[Tuple[int, datetime]] = frozenset(),
+) -> None:
+    """
+    Set "matchdate" and "stadiumid" on every planned match. Round r starts
+    days_between_rounds after round r - 1; a round with more matches than free
+    kickoff/stadium slots spills over to the following days.
+    """
+    times = sorted(set(kickoff_times)) or [start.time()]
+    stadiums: Sequence[Optional[int]] = list(stadiumids) or [None]
+    day = start.date()
+    for matches in rounds:
+        pending = list(matches)
+        last_day = day
+        current = day
+        while pending:
+            for kickoff_time in times:
+                kickoff = datetime.combine(current, kickoff_time)
+                if kickoff < start:
+                    continue
+                for stadiumid in stadiums:
+                    if not pending:
+                        break
+                    if stadiumid is not None and (stadiumid, kickoff) in booked_slots:
+                        continue
+                    planned = pending.pop(0)
+                    planned["matchdate"] = kickoff
+                    planned["stadiumid"] = stadiumid
+                    last_day = current
+            current += timedelta(days=1)
+            if (current - day).days > 365:
+                raise BracketError("Could not find free stadium slots for the knockout rounds")
+        day = last_day + timedelta(days=days_between_rounds)
+
+def winner_of(homescore: int, awayscore: int, hometeamid: Optional[int], awayteamid: Optional[int], winnerteamid: Optional[int] = None) -> Optional[int]:
+    """The team that goes through: the recorded winner (e.g. after penalties), else the higher score; None for an undecided draw"""
+    if winnerteamid is not None:
+        return winnerteamid
+    if homescore > awayscore:
+        return hometeamid
+    if awayscore > homescore:
+        return awayteamid
+    return None
+
+def advance_knockout_winner(db: Session, match: models.Match, result: Optional[models.MatchResult]) -> Optional[int]:
+    """
+    Put the winner of a knockout match into its slot of the next match, or
+    clear the slot when there is none: the result was deleted (result is None)
+    or is a draw without a recorded winner yet, so a corrected result never
+    leaves the old winner in place. Does not commit; returns the next match id
+    if a slot was written.
+    """
+    link = db.query(models.KnockoutMatch).filter(models.KnockoutMatch.matchid == match.matchid).first()
+    if link is None or link.nextmatchid is None:
+        return None
+    winner = None
+    if result is not None:
+        winner = winner_of(result.homescore, result.awayscore, match.hometeamid, match.awayteamid, result.winnerteamid)
+    column = models.Match.hometeamid if link.nextslot == "home" else models.Match.awayteamid
+    db.query(models.Match).filter(models.Match.matchid == link.nextmatchid).update({column: winner}, synchronize_session=False)
+    return link.nextmatchid
@@ -0,0 +1,265 @@
+import socket
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import orjson
+from config import settings
+
+Handler = Callable[[dict], None]
+
+# Prefix for channel names on a shared Redis, so several apps can use one server
+CHANNEL_PREFIX = "league:"
+# Seconds between reconnect attempts when the Redis connection drops
+RECONNECT_DELAY = 1.0
+SOCKET_TIMEOUT = 5.0
+
+class Broker:
+    """
+    Publish/subscribe between the app's worker processes. Write paths publish
+    invalidations and domain events; every worker subscribes and applies them
+    to its in-process state (cache, search index, live matches). Subscribe
+    before start(): subscriptions are made when the connection opens.
+
+    Messages are JSON-able dicts. Each broker stamps the messages it publishes
+    with its id ("origin"); handlers only get messages from other workers
+    unless they subscribe with include_own, since the publishing worker has
+    already applied its own change. Handlers may run on a broker thread.
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self._handlers: Dict[str, List[Tuple[Handler, bool]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel: str, handler: Handler, include_own: bool = False) -> None:
+        with self._lock:
+            self._handlers.setdefault(channel, []).append((handler, include_own))
+
+    def publish(self, channel: str, message: dict) -> int:
+        """Send a message to every worker; returns how many other workers received it"""
+        return self._send(channel, orjson.dumps({**message, "origin": self.id}))
+
+    def start(self) -> None:
+        """Start receiving (called once from the app's lifespan)"""
+
+    def close(self) -> None:
+        pass
+
+    def _send(self, channel: str, payload: bytes) -> int:
+        raise NotImplementedError
+
+    def _dispatch(self, channel: str, payload: bytes) -> None:
+        message = orjson.loads(payload)
+        own = message.get("origin") == self.id
+        with self._lock:
+            handlers = list(self._handlers.get(channel, ()))
+        for handler, include_own in handlers:
+            if own and not include_own:
+                continue
+            try:
+                handler(message)
+            except Exception as e:
+                print(f"Warning: broker handler for {channel} failed: {e}")
+
+class InProcessBroker(Broker):
+    """Single worker: messages go straight to this process's handlers"""
+
+    def _send(self, channel: str, payload: bytes) -> int:
+        self._dispatch(channel, payload)
+        return 0
+
+class LocalBus:
+    """Shared by LocalBroker instances; stands in for the Redis server in tests"""
+
+    def __init__(self):
+        self.brokers: List["LocalBroker"] = []
+
+class LocalBroker(Broker):
+    """
+    Test stand-in for a multi-worker deployment: several LocalBrokers on one
+    LocalBus behave like workers connected to the same Redis, delivering
+    synchronously. Every message sent is kept in `published`.
+    """
+
+    def __init__(self, bus: Optional[LocalBus] = None):
+        super().__init__()
+        self.bus = bus or LocalBus()
+        self.bus.brokers.append(self)
+        self.published: List[Tuple[str, dict]] = []
+
+    def _send(self, channel: str, payload: bytes) -> int:
+        self.published.append((channel, orjson.loads(payload)))
+        brokers = list(self.bus.brokers)
+        for broker in brokers:
+            broker._dispatch(channel, payload)
+        # Like Redis's receiver count, without this worker's own subscription
+        return len(brokers) - 1
+
+class RedisClient:
+    """
+    A minimal Redis client speaking the RESP protocol over a plain socket, so
+    no client library is needed: request/reply commands on one lock-protected
+    connection, reconnecting (and retrying once) after an error.
+    """
+
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self._lock = threading.Lock()
+        self._connection = None  # (socket, reader)
+
+    def connect(self) -> socket.socket:
+        """A new authenticated connection (also used for subscriptions)"""
+        sock = socket.create_connection((self.host, self.port), timeout=SOCKET_TIMEOUT)
+        # One command at a time, so the single-reply reads below can't over-read
+        for command in ([b"AUTH", self.password.encode()] if self.password else None, [b"SELECT", str(self.db).encode()] if self.db else None):
+            if command:
+                send_command(sock, *command)
+                _read_line_reply(sock)
+        return sock
+
+    def execute(self, *args: bytes):
+        """Send one command and return its reply; raises RedisError or OSError if Redis is unreachable"""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._connection is None:
+                        sock = self.connect()
+                        self._connection = (sock, sock.makefile("rb"))
+                    sock, reader = self._connection
+                    send_command(sock, *args)
+                    return _read_reply(reader)
+                except OSError:
+                    # Broken connection; an error reply (RedisError) leaves it usable
+                    self._drop()
+                    if attempt:
+                        raise
+
+    def close(self) -> None:
+        with self._lock:
+            self._drop()
+
+    def _drop(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection[0].close()
+            except OSError:
+                pass
+            self._connection = None
+
+class RedisBroker(Broker):
+    """
+    Redis pub/sub through RedisClient. Publishing uses the client's shared
+    connection; a daemon thread holds the subscription and reconnects after
+    errors. Messages published while Redis is unreachable are dropped with a
+    warning: workers then rely on cache TTLs, as before.
+    """
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.client = RedisClient(url)
+        self._subscriber: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+        self._subscribed = threading.Event()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._listen, name="redis-broker", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        self._closed.set()
+        self.client.close()
+        if self._subscriber is not None:
+            try:
+                self._subscriber.close()
+            except OSError:
+                pass
+
+    def _send(self, channel: str, payload: bytes) -> int:
+        try:
+            receivers = self.client.execute(b"PUBLISH", (CHANNEL_PREFIX + channel).encode(), payload)
+        except (OSError, RedisError) as e:
+            print(f"Warning: could not publish to {channel}: {e}")
+            return 0
+        # Redis counts every subscribed connection, this worker's own included
+        return max(0, receivers - (1 if self._subscribed.is_set() else 0))
+
+    def _listen(self) -> None:
+        while not self._closed.is_set():
+            try:
+                sock = self.client.connect()
+                sock.settimeout(None)
+                self._subscriber = sock
+                with self._lock:
+                    channels = [(CHANNEL_PREFIX + channel).encode() for channel in self._handlers]
+                if channels:
+                    send_command(sock, b"SUBSCRIBE", *channels)
+                reader = sock.makefile("rb")
+                while True:
+                    reply = _read_reply(reader)
+                    if isinstance(reply, list) and len(reply) == 3 and reply[0] == b"message":
+                        self._dispatch(reply[1].decode()[len(CHANNEL_PREFIX):], reply[2])
+                    elif isinstance(reply, list) and len(reply) == 3 and reply[0] == b"subscribe":
+                        self._subscribed.set()
+            except (OSError, RedisError) as e:
+                self._subscribed.clear()
+                if self._closed.is_set():
+                    return
+                print(f"Warning: broker subscription lost, reconnecting: {e}")
+                time.sleep(RECONNECT_DELAY)
+
+class RedisError(Exception):
+    pass
+
+def send_command(sock: socket.socket, *args: bytes) -> None:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    sock.sendall(b"".join(parts))
+
+def _read_line_reply(sock: socket.socket) -> None:
+    # Simple ("+OK") or error reply, read byte by byte so nothing after it is consumed
+    line = b""
+    while not line.endswith(b"\r\n"):
+        chunk = sock.recv(1)
+        if not chunk:
+            raise ConnectionError("connection closed")
+        line += chunk
+    if line.startswith(b"-"):
+        raise RedisError(line[1:-2].decode())
+
+def _read_reply(reader):
+    line = reader.readline()
+    if not line:
+        raise ConnectionError("connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest
+    if kind == b"-":
+        raise RedisError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        count = int(rest)
+        return None if count < 0 else [_read_reply(reader) for _ in range(count)]
+    raise RedisError(f"unexpected reply {line!r}")
+
+def create_broker() -> Broker:
+    """RedisBroker when REDIS_URL is set (several workers), otherwise InProcessBroker"""
+    return RedisBroker(settings.redis_url) if settings.redis_url else InProcessBroker()
+
+# Shared broker for the process
+broker = create_broker()
@@ -0,0 +1,210 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+from services.broker import Broker, broker
+
+class _Flight:
+    """One computation of a key, shared by every request that asks for the key while it runs"""
+
+    def __init__(self, started: int):
+        self.started = started
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+class TaggedCache:
+    """
+    Small in-process TTL cache where every entry carries a set of tags.
+    Write paths invalidate by tag (e.g. "tournament:3") instead of tracking
+    individual keys, so a new match result evicts every view built from that
+    tournament in one call.
+
+    get_or_compute adds single-flight and stale-while-revalidate on top: while
+    a key is being computed, other callers wait for that computation instead
+    of starting their own, and an entry that expired less than stale_ttl ago
+    is served once more while one background thread refreshes it. Invalidated
+    entries are dropped outright, never served stale.
+    """
+
+    def __init__(self, default_ttl: float = 60.0, max_entries: int = 2048):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        self._entries: Dict[Hashable, Tuple[float, float, Any, Tuple[str, ...]]] = {}  # key -> (expires_at, stale_until, value, tags)
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._flights: Dict[Hashable, _Flight] = {}
+        # Bumped by every invalidation; _invalidated[tag] is its value when the tag was last invalidated
+        self._generation = 0
+        self._invalidated: Dict[str, int] = {}
+        self._cleared = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, stale_until, value, _ = entry
+            now = time.monotonic()
+            if expires_at < now:
+                if stale_until < now:
+                    self._remove(key)
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[str] = (), ttl: Optional[float] = None, stale_ttl: float = 0.0) -> None:
+        """Store value under key, attached to the given tags; get_or_compute may serve it stale_ttl seconds past ttl"""
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            elif len(self._entries) >= self.max_entries:
+                self._evict()
+            expires_at = time.monotonic() + (ttl if ttl is not None else self.default_ttl)
+            self._entries[key] = (expires_at, expires_at + stale_ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], Any], tags: Iterable[str] = (), ttl: Optional[float] = None) -> Any:
+        """Return the cached value for key, computing and storing it on a miss"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.set(key, value, tags=tags, ttl=ttl)
+        return value
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Tuple[Any, Iterable[str]]], ttl: Optional[float] = None, stale_ttl: float = 0.0) -> Any:
+        """
+        Return the value for key. compute() returns (value, tags) and runs at
+        most once at a time per key in this process: callers arriving while it
+        runs wait for its result (or its exception). Within stale_ttl seconds
+        after expiry the old value is returned at once and compute runs in a
+        background thread, so it must not use the caller's database session.
+        """
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is not None and now <= entry[0]:
+                return entry[2]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight(self._generation)
+            if entry is not None and now <= entry[1]:
+                if leader:
+                    threading.Thread(
+                        target=self._refresh, args=(key, flight, compute, ttl, stale_ttl), name="cache-refresh", daemon=True
+                    ).start()
+                return entry[2]
+        if leader:
+            self._compute(key, flight, compute, ttl, stale_ttl)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _compute(self, key: Hashable, flight: _Flight, compute: Callable[[], Tuple[Any, Iterable[str]]], ttl: Optional[float], stale_ttl: float) -> None:
+        try:
+            value, tags = compute()
+            tags = tuple(tags)
+            flight.value = value
+            with self._lock:
+                # A write that invalidated one of the value's tags while it was computed makes it outdated: hand it to
+                # the callers that were waiting for it, but don't store it
+                if flight.started >= self._cleared and all(self._invalidated.get(tag, 0) <= flight.started for tag in tags):
+                    self.set(key, value, tags=tags, ttl=ttl, stale_ttl=stale_ttl)
+        except BaseException as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    def _refresh(self, key: Hashable, flight: _Flight, compute: Callable[[], Tuple[Any, Iterable[str]]], ttl: Optional[float], stale_ttl: float) -> None:
+        self._compute(key, flight, compute, ttl, stale_ttl)
+        if flight.error is not None:
+            # The stale value stays in use until its stale_ttl runs out; the next caller retries
+            print(f"Warning: background refresh of {key} failed: {flight.error}")
+
+    def invalidate(self, *tags: str) -> None:
+        """Drop every entry attached to any of the given tags"""
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                self._invalidated[tag] = self._generation
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+            # Computations already running may have read the old data; later callers start a new one
+            self._flights.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._flights.clear()
+            self._generation += 1
+            self._cleared = self._generation
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[3]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def _evict(self) -> None:
+        # Drop expired entries first; if still full, drop the entry closest to expiry
+        now = time.monotonic()
+        for key in [k for k, (_, stale_until, _, _) in self._entries.items() if stale_until < now]:
+            self._remove(key)
+        if len(self._entries) >= self.max_entries:
+            self._remove(min(self._entries, key=lambda k: self._entries[k][0]))
+
+
+# Views spanning every tournament (or group) carry these; any tournament (or group) invalidation evicts them
+ALL_TOURNAMENTS_TAG = "tournament:*"
+ALL_GROUPS_TAG = "group:*"
+
+def tournament_tag(tournamentid: Optional[int]) -> str:
+    return f"tournament:{tournamentid}"
+
+def group_tag(groupid: Optional[int]) -> str:
+    return f"group:{groupid}"
+
+def team_tag(teamid: Optional[int]) -> str:
+    return f"team:{teamid}"
+
+# Shared cache instance for the process
+cache = TaggedCache()
+
+def connect_cache(target: TaggedCache, source: Broker) -> None:
+    """Apply the invalidations other workers publish on source to target"""
+    source.subscribe("cache", lambda message: target.invalidate(*message["tags"]))
+
+connect_cache(cache, broker)
+
+def invalidate_tags(*tags: str) -> None:
+    """Evict the tags here and tell the other workers to do the same"""
+    if not tags:
+        return
+    cache.invalidate(*tags)
+    broker.publish("cache", {"tags": list(tags)})
+
+def invalidate_tournament(*tournamentids: Optional[int]) -> None:
+    """Evict cached views for the given tournaments and those spanning all tournaments (None ids only evict the latter)"""
+    invalidate_tags(*(tournament_tag(tid) for tid in tournamentids if tid is not None), ALL_TOURNAMENTS_TAG)
+
+def invalidate_group(*groupids: Optional[int]) -> None:
+    """Evict cached views built from the given groups and those spanning all groups (None ids only evict the latter)"""
+    invalidate_tags(*(group_tag(gid) for gid in groupids if gid is not None), ALL_GROUPS_TAG)
+
+def invalidate_team(*teamids: Optional[int]) -> None:
+    """Evict cached views that include the given teams (None ids are ignored)"""
+    invalidate_tags(*(team_tag(tid) for tid in teamids if tid is not None))
@@ -0,0 +1,131 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from sqlalchemy.orm import Session
+import models
+
+Pairing = Tuple[int, int]  # (home team id, away team id)
+Fixture = Tuple[int, int, int, Optional[int], datetime]  # (matchday, home, away, stadium id, kickoff)
+
+# Give up rather than search forever when the constraints can't be met
+MAX_SCHEDULE_DAYS = 3 * 365
+
+class ScheduleError(ValueError):
+    pass
+
+def resolve_stadiums(db: Session, requested: Optional[Sequence[int]]) -> Tuple[List[int], List[int]]:
+    """(stadium ids to schedule in, requested ids that don't exist); all stadiums when none are requested"""
+    if requested is None:
+        return [row.stadiumid for row in db.query(models.Stadium.stadiumid).order_by(models.Stadium.stadiumid).all()], []
+    stadiumids = list(dict.fromkeys(requested))
+    found = {row.stadiumid for row in db.query(models.Stadium.stadiumid).filter(models.Stadium.stadiumid.in_(stadiumids)).all()}
+    return [sid for sid in stadiumids if sid in found], [sid for sid in stadiumids if sid not in found]
+
+def booked_stadium_slots(db: Session, stadiumids: Sequence[int], start: datetime) -> Set[Tuple[int, datetime]]:
+    """(stadium id, kickoff) of every existing match in those stadiums from start on"""
+    return {
+        (row.stadiumid, row.matchdate)
+        for row in db.query(models.Match.stadiumid, models.Match.matchdate).filter(
+            models.Match.stadiumid.in_(stadiumids),
+            models.Match.matchdate >= start,
+        ).all()
+    }
+
+def round_robin(teamids: Sequence[int], double: bool = False) -> List[List[Pairing]]:
+    """
+    Pairings per matchday using the circle method: the first team stays put
+    while the others rotate one place each round, so every team meets every
+    other exactly once in n - 1 rounds (n rounded up to even; the odd team out
+    has a bye). A double round robin appends the same rounds with home and away
+    swapped.
+    """
+    teams: List[Optional[int]] = list(teamids)
+    if len(teams) < 2:
+        return []
+    if len(teams) % 2:
+        teams.append(None)
+    n = len(teams)
+    fixed, rotating = teams[0], teams[1:]
+    rounds = []
+    for r in range(n - 1):
+        lineup = [fixed] + rotating
+        pairings = []
+        for i in range(n // 2):
+            home, away = lineup[i], lineup[n - 1 - i]
+            if home is None or away is None:
+                continue
+            # Alternate home and away: the fixed team by round, the rest by position,
+            # which keeps every team within one home game of an even split
+            if (r % 2 == 1) if i == 0 else (i % 2 == 1):
+                home, away = away, home
+            pairings.append((home, away))
+        rounds.append(pairings)
+        rotating = [rotating[-1]] + rotating[:-1]
+    if double:
+        rounds += [[(away, home) for home, away in pairings] for pairings in rounds]
+    return rounds
+
+def schedule_fixtures(
+    rounds: List[List[Pairing]],
+    start: datetime,
+    kickoff_times: Iterable[time],
+    stadiumids: Sequence[int],
+    rest_days: int,
+    booked_slots: Set[Tuple[int, datetime]] = frozenset(),
+    busy_days: Optional[Dict[int, Set[date]]] = None,
+) -> List[Fixture]:
+    """
+    Give every pairing a kickoff and a stadium, round by round, at the earliest
+    slot where:
+    - neither team has played within rest_days days (this includes busy_days,
+      their existing matches)
+    - the stadium isn't already booked at that kickoff (booked_slots) or used by
+      another fixture of this schedule
+    Each team's matches stay in round order. Without stadiums only the rest
+    rule applies and stadium ids are None. Raises ScheduleError if something
+    can't be placed within MAX_SCHEDULE_DAYS.
+    """
+    times = sorted(set(kickoff_times)) or [start.time()]
+    stadiums: Sequence[Optional[int]] = list(stadiumids) or [None]
+    busy: Dict[int, Set[date]] = {team: set(days) for team, days in (busy_days or {}).items()}
+    next_day: Dict[int, date] = {}
+    used: Set[Tuple[Optional[int], datetime]] = set()
+    first_day = start.date()
+    last_day = first_day + timedelta(days=MAX_SCHEDULE_DAYS)
+
+    def rested(team: int, day: date) -> bool:
+        days = busy.get(team)
+        if not days:
+            return True
+        return not any(day + timedelta(days=offset) in days for offset in range(-rest_days, rest_days + 1))
+
+    def free_slot(day: date) -> Optional[Tuple[Optional[int], datetime]]:
+        for kickoff_time in times:
+            kickoff = datetime.combine(day, kickoff_time)
+            if kickoff < start:
+                continue
+            for stadiumid in stadiums:
+                if stadiumid is None:
+                    return None, kickoff
+                if (stadiumid, kickoff) not in used and (stadiumid, kickoff) not in booked_slots:
+                    return stadiumid, kickoff
+        return None
+
+    fixtures: List[Fixture] = []
+    for matchday, pairings in enumerate(rounds, start=1):
+        for home, away in pairings:
+            day = max(next_day.get(home, first_day), next_day.get(away, first_day))
+            while True:
+                if day > last_day:
+                    raise ScheduleError(f"Could not fit matchday {matchday} within {MAX_SCHEDULE_DAYS} days; add kickoff times or stadiums, or lower rest_days")
+                if rested(home, day) and rested(away, day):
+                    slot = free_slot(day)
+                    if slot is not None:
+                        break
+                day += timedelta(days=1)
+            stadiumid, kickoff = slot
+            used.add((stadiumid, kickoff))
+            for team in (home, away):
+                busy.setdefault(team, set()).add(day)
+                next_day[team] = day + timedelta(days=rest_days + 1)
+            fixtures.append((matchday, home, away, stadiumid, kickoff))
+    return fixtures
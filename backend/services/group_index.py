@@ -0,0 +1,57 @@
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+import models
+from database import SessionLocal
+from services.cache import cache, tournament_tag, group_tag
+
+# Built from the database on demand; invalidated through the tournament and
+# group tags whenever groups or group memberships change
+GROUP_INDEX_TTL = 3600.0
+
+def tournament_group_index(tournamentid: int) -> Dict[int, int]:
+    """
+    team id -> group id for one tournament, read with a single
+    TournamentGroup -> GroupTeams query and cached per tournament. Built in
+    its own session through get_or_compute, so neither a caller's uncommitted
+    changes nor a result invalidated while it was being read get cached.
+    """
+    def build():
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                models.TournamentGroup.groupid,
+                models.GroupTeams.teamid,
+            ).outerjoin(
+                models.GroupTeams, models.GroupTeams.groupid == models.TournamentGroup.groupid
+            ).filter(models.TournamentGroup.tournamentid == tournamentid).all()
+        finally:
+            db.close()
+        index = {row.teamid: row.groupid for row in rows if row.teamid is not None}
+        # Tag with every group of the tournament, empty ones included, so adding
+        # a team to any of them evicts this entry
+        tags = [tournament_tag(tournamentid)] + [group_tag(gid) for gid in {row.groupid for row in rows}]
+        return index, tags
+
+    return cache.get_or_compute(("group-index", tournamentid), build, ttl=GROUP_INDEX_TTL)
+
+def resolve_match_group(db: Session, match: models.Match) -> Optional[int]:
+    """
+    Group the match counts towards: the group both teams share within the
+    match's tournament, or None if they are not in the same group there.
+    """
+    if match.hometeamid is None or match.awayteamid is None:
+        return None
+    if match.tournamentid is not None:
+        index = tournament_group_index(match.tournamentid)
+        groupid = index.get(match.hometeamid)
+        if groupid is None or index.get(match.awayteamid) != groupid:
+            return None
+        return groupid
+
+    # No tournament on the match: accept a shared group only when it is unambiguous
+    home = db.query(models.GroupTeams.groupid).filter(models.GroupTeams.teamid == match.hometeamid)
+    shared = db.query(models.GroupTeams.groupid).filter(
+        models.GroupTeams.teamid == match.awayteamid,
+        models.GroupTeams.groupid.in_(home),
+    ).limit(2).all()
+    return shared[0].groupid if len(shared) == 1 else None
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Optional, Tuple, Type
+from fastapi import Depends, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.orm import Session
+import models
+from auth import get_current_active_user
+from database import SessionLocal, dialect_insert
+from responses import serialize_object
+
+# How long a stored response is replayed for
+KEY_TTL = timedelta(hours=24)
+# A claim older than this belongs to a request that died without releasing it
+CLAIM_LEASE = timedelta(seconds=60)
+# How long a duplicate waits for the first request before giving up with 409
+WAIT_TIMEOUT = 10.0
+POLL_INTERVAL = 0.05
+MAX_KEY_LENGTH = 255
+
+class IdempotentRequest:
+    """
+    Handle given to an endpoint by the idempotent_request dependency.
+    If replay is set the request was already handled and the endpoint should
+    return it as is. Otherwise the endpoint does its work and calls save()
+    right before committing, so the stored response commits together with the
+    changes it describes.
+    """
+
+    def __init__(self, userid: Optional[int] = None, key: Optional[str] = None, token: Optional[str] = None, replay: Optional[Response] = None):
+        self.userid = userid
+        self.key = key
+        self.token = token
+        self.replay = replay
+
+    def save(self, db: Session, model: Type[BaseModel], data: Any, status_code: int) -> None:
+        """Store the response for this key in the caller's transaction (no-op without a key)"""
+        if self.key is None or self.replay is not None:
+            return
+        db.query(models.IdempotencyKey).filter(
+            models.IdempotencyKey.userid == self.userid,
+            models.IdempotencyKey.key == self.key,
+            models.IdempotencyKey.token == self.token,
+        ).update({
+            models.IdempotencyKey.statuscode: status_code,
+            models.IdempotencyKey.response: serialize_object(model, data).decode(),
+        }, synchronize_session=False)
+
+def _fingerprint(method: str, path: str, body: bytes) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{method} {path}\n".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+def _claim(userid: int, key: str, fingerprint: str, token: str) -> Tuple[bool, Optional[Any]]:
+    """
+    Try to claim the key with INSERT ... ON CONFLICT DO NOTHING in a short
+    transaction of its own. Returns (True, None) when claimed, else (False, row)
+    with the existing row (None if it vanished in between).
+    """
+    table = models.IdempotencyKey.__table__
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        # Expired keys and abandoned claims can be taken over
+        db.query(models.IdempotencyKey).filter(
+            models.IdempotencyKey.userid == userid,
+            models.IdempotencyKey.key == key,
+            or_(
+                models.IdempotencyKey.expiresat < now,
+                and_(models.IdempotencyKey.statuscode.is_(None), models.IdempotencyKey.createdat < now - CLAIM_LEASE),
+            ),
+        ).delete(synchronize_session=False)
+        insert = dialect_insert(db)
+        stmt = insert(table).values(
+            userid=userid, key=key, fingerprint=fingerprint, token=token, createdat=now, expiresat=now + KEY_TTL
+        ).on_conflict_do_nothing(index_elements=[table.c.userid, table.c.key])
+        claimed = db.execute(stmt).rowcount == 1
+        db.commit()
+        if claimed:
+            return True, None
+        row = db.query(
+            models.IdempotencyKey.fingerprint,
+            models.IdempotencyKey.statuscode,
+            models.IdempotencyKey.response,
+        ).filter(
+            models.IdempotencyKey.userid == userid,
+            models.IdempotencyKey.key == key,
+        ).first()
+        return False, row
+    finally:
+        db.close()
+
+def _release(userid: int, key: str, token: str) -> None:
+    """Drop our claim if no response was stored (the request failed), so a retry can run"""
+    db = SessionLocal()
+    try:
+        db.query(models.IdempotencyKey).filter(
+            models.IdempotencyKey.userid == userid,
+            models.IdempotencyKey.key == key,
+            models.IdempotencyKey.token == token,
+            models.IdempotencyKey.statuscode.is_(None),
+        ).delete(synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        print(f"Warning: could not release idempotency key {key!r}: {e}")
+    finally:
+        db.close()
+
+async def idempotent_request(
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    Honor an Idempotency-Key header, scoped to the current user.
+    - first request with a key: runs normally; its response is stored for KEY_TTL
+    - repeat after it finished: gets the stored response back (Idempotent-Replayed: true)
+    - repeat while it is still running: waits for it, up to WAIT_TIMEOUT seconds
+    - same key with a different body: 422
+    Requests without the header are not affected.
+    """
+    if not idempotency_key:
+        yield IdempotentRequest()
+        return
+    if len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(400, f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters")
+
+    fingerprint = _fingerprint(request.method, request.url.path, await request.body())
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while True:
+        claimed, row = await run_in_threadpool(_claim, current_user.userid, idempotency_key, fingerprint, token)
+        if claimed:
+            break
+        if row is not None:
+            if row.fingerprint != fingerprint:
+                raise HTTPException(422, "Idempotency-Key was already used for a different request")
+            if row.statuscode is not None:
+                yield IdempotentRequest(replay=Response(
+                    content=row.response,
+                    status_code=row.statuscode,
+                    media_type="application/json",
+                    headers={"Idempotent-Replayed": "true"},
+                ))
+                return
+            if time.monotonic() >= deadline:
+                raise HTTPException(409, "A request with this Idempotency-Key is still in progress", headers={"Retry-After": "1"})
+        await asyncio.sleep(POLL_INTERVAL)
+
+    try:
+        yield IdempotentRequest(current_user.userid, idempotency_key, token)
+    finally:
+        await run_in_threadpool(_release, current_user.userid, idempotency_key, token)
+
+def purge_expired_idempotency_keys(db: Session, limit: int = 1000) -> int:
+    """
+    Delete up to `limit` stored responses past their expiry, oldest first, so
+    a big backlog is removed in short transactions. Does not commit; returns
+    how many were removed (fewer than limit means none are left).
+    """
+    expired = db.query(models.IdempotencyKey.userid, models.IdempotencyKey.key).filter(
+        models.IdempotencyKey.expiresat < datetime.utcnow()
+    ).order_by(models.IdempotencyKey.expiresat).limit(limit).all()
+    if not expired:
+        return 0
+    return db.query(models.IdempotencyKey).filter(
+        tuple_(models.IdempotencyKey.userid, models.IdempotencyKey.key).in_([tuple(row) for row in expired])
+    ).delete(synchronize_session=False)
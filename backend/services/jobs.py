@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+import models
+from services.idempotency import purge_expired_idempotency_keys
+from services.player_search import invalidate_player_search
+from services.scheduler import Job, scheduler
+from services.search_index import unindex
+from services.stats import rebuild_career_stats, rebuild_tournament_player_stats
+
+# Unverified accounts are kept this long after their verification link expired (they can still ask for a new one)
+PENDING_ACCOUNT_GRACE = timedelta(days=7)
+# Read notifications are kept this long, unread ones this long
+READ_NOTIFICATION_RETENTION = timedelta(days=30)
+NOTIFICATION_RETENTION = timedelta(days=180)
+# Values old clients and scripts stored instead of an image URL
+MISSING_PROFILE_IMAGES = ("", "null", "/assets/defaultPlayer.png")
+
+# Each step handles one chunk: see Job. Delete-style steps return "" as the cursor while rows remain.
+
+def purge_idempotency_keys(db: Session, cursor: Optional[str], size: int) -> Tuple[int, Optional[str]]:
+    deleted = purge_expired_idempotency_keys(db, size)
+    return deleted, "" if deleted == size else None
+
+def reap_pending_accounts(db: Session, cursor: Optional[str], size: int) -> Tuple[int, Optional[str]]:
+    """
+    Delete registrations never verified within PENDING_ACCOUNT_GRACE of their
+    link expiring: the user, its placeholder player with its stats rows, and
+    its notifications, join requests and idempotency keys (deleted here as
+    well, since SQLite doesn't enforce the cascades). Users are walked in
+    (email_verification_expires, userid) order from the cursor, using the
+    (status, email_verification_expires) index. A user whose player has a team
+    or any match history, or who is an admin, is left alone. Returns the rows
+    deleted across all tables.
+    """
+    player = models.Player
+    query = db.query(models.User.userid, models.User.email_verification_expires, player.playerid, player.statsid).outerjoin(
+        player, player.userid == models.User.userid
+    ).filter(
+        models.User.status == "pending",
+        models.User.is_email_verified.is_(False),
+        models.User.email_verification_expires < datetime.utcnow() - PENDING_ACCOUNT_GRACE,
+        ~db.query(models.Admin.adminid).filter(models.Admin.userid == models.User.userid).exists(),
+        or_(player.playerid.is_(None), and_(
+            player.teamid.is_(None),
+            ~db.query(models.Team.teamid).filter(models.Team.teamcaptainid == player.playerid).exists(),
+            ~db.query(models.MatchAppearance.matchid).filter(models.MatchAppearance.playerid == player.playerid).exists(),
+            ~db.query(models.Goal.goalid).filter(models.Goal.playerid == player.playerid).exists(),
+            ~db.query(models.MatchEvent.eventid).filter(or_(
+                models.MatchEvent.playerid == player.playerid, models.MatchEvent.relatedplayerid == player.playerid
+            )).exists(),
+            ~db.query(models.MatchResult.resultid).filter(models.MatchResult.mvpplayerid == player.playerid).exists(),
+        )),
+    )
+    if cursor:
+        expires, userid = cursor.split("|")
+        expires = datetime.fromisoformat(expires)
+        query = query.filter(or_(
+            models.User.email_verification_expires > expires,
+            and_(models.User.email_verification_expires == expires, models.User.userid > int(userid)),
+        ))
+    rows = query.order_by(models.User.email_verification_expires, models.User.userid).limit(size).all()
+    if not rows:
+        return 0, None
+    userids = sorted({row.userid for row in rows})
+    playerids = [row.playerid for row in rows if row.playerid is not None]
+    statsids = [row.statsid for row in rows if row.statsid is not None]
+    deleted = 0
+    if playerids:
+        deleted += db.query(models.TournamentPlayerStats).filter(models.TournamentPlayerStats.playerid.in_(playerids)).delete(synchronize_session=False)
+        deleted += db.query(models.Player).filter(models.Player.playerid.in_(playerids)).delete(synchronize_session=False)
+    if statsids:
+        deleted += db.query(models.PlayerStats).filter(models.PlayerStats.statsid.in_(statsids)).delete(synchronize_session=False)
+    for model, column in (
+        (models.Notification, models.Notification.recipient_userid),
+        (models.JoinRequest, models.JoinRequest.requester_userid),
+        (models.IdempotencyKey, models.IdempotencyKey.userid),
+    ):
+        deleted += db.query(model).filter(column.in_(userids)).delete(synchronize_session=False)
+    deleted += db.query(models.User).filter(models.User.userid.in_(userids)).delete(synchronize_session=False)
+    for userid in userids:
+        unindex("user", userid)
+    if playerids:
+        invalidate_player_search()
+    last = rows[-1]
+    return deleted, f"{last.email_verification_expires.isoformat()}|{last.userid}" if len(rows) == size else None
+
+def purge_stale_notifications(db: Session, cursor: Optional[str], size: int) -> Tuple[int, Optional[str]]:
+    now = datetime.utcnow()
+    notificationids = [
+        row.notificationid for row in db.query(models.Notification.notificationid).filter(
+            or_(
+                models.Notification.createdat < now - NOTIFICATION_RETENTION,
+                and_(models.Notification.isread.is_(True), models.Notification.createdat < now - READ_NOTIFICATION_RETENTION),
+            )
+        ).limit(size).all()
+    ]
+    if notificationids:
+        db.query(models.Notification).filter(models.Notification.notificationid.in_(notificationids)).delete(synchronize_session=False)
+    return len(notificationids), "" if len(notificationids) == size else None
+
+def fill_default_profile_images(db: Session, cursor: Optional[str], size: int) -> Tuple[int, Optional[str]]:
+    """Give users without a profile image the default one (replaces fix_user_profile_images.py and update_users_to_default_image.py)"""
+    after = int(cursor) if cursor else 0
+    userids = [
+        row.userid for row in db.query(models.User.userid).filter(
+            models.User.userid > after,
+            or_(models.User.profileimage.is_(None), models.User.profileimage.in_(MISSING_PROFILE_IMAGES)),
+        ).order_by(models.User.userid).limit(size).all()
+    ]
+    if userids:
+        db.query(models.User).filter(models.User.userid.in_(userids)).update(
+            {"profileimage": models.User.profileimage.default.arg}, synchronize_session=False
+        )
+    return len(userids), str(userids[-1]) if len(userids) == size else None
+
+def rebuild_player_stats(db: Session, cursor: Optional[str], size: int) -> Tuple[int, Optional[str]]:
+    """Re-derive the player statistics snapshots from the match records, a few tournaments per chunk, then the career totals"""
+    if cursor == "career":
+        return rebuild_career_stats(db), None
+    after = int(cursor) if cursor else 0
+    tournamentids = [
+        row.tournamentid for row in db.query(models.Tournament.tournamentid).filter(
+            models.Tournament.tournamentid > after
+        ).order_by(models.Tournament.tournamentid).limit(size).all()
+    ]
+    rows = 0
+    for tournamentid in tournamentids:
+        rows += rebuild_tournament_player_stats(db, tournamentid)
+    return rows, str(tournamentids[-1]) if len(tournamentids) == size else "career"
+
+scheduler.register(Job("purge_idempotency_keys", "17 * * * *", purge_idempotency_keys, 1000, "Delete stored Idempotency-Key responses past their expiry"))
+scheduler.register(Job("reap_pending_accounts", "25 3 * * *", reap_pending_accounts, 200, "Delete accounts left unverified a week after their verification link expired"))
+scheduler.register(Job("purge_stale_notifications", "40 3 * * *", purge_stale_notifications, 1000, "Delete read notifications after 30 days and all after 180"))
+scheduler.register(Job("fill_default_profile_images", "10 4 * * 0", fill_default_profile_images, 500, "Set the default profile image for users without one"))
+scheduler.register(Job("rebuild_player_stats", "30 4 * * *", rebuild_player_stats, 5, "Recount per-tournament and career player statistics from the match records"))
@@ -0,0 +1,474 @@
+import asyncio
+import threading
+import time
+import uuid
+from itertools import groupby
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import orjson
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+import models
+from database import SessionLocal
+from services.broker import Broker, broker
+from services.cache import invalidate_team, invalidate_tournament
+from services.match_events import MatchEventError, record_match_events
+from services.team_version import bump_team_versions
+
+# Seconds between writes of pushed live events to the database
+LIVE_FLUSH_INTERVAL = 5.0
+# Seconds flush_everywhere waits for the other workers to write their pushes
+LIVE_FLUSH_WAIT = 5.0
+# How long the list of live matches is reused before it is queried again
+LIVE_LIST_TTL = 5.0
+# Messages a spectator may fall behind by before it is disconnected (it can reconnect for a fresh snapshot)
+SUBSCRIBER_QUEUE_SIZE = 256
+# Event types that can be pushed live; MVPs and voids go through the match event batch endpoint
+LIVE_EVENT_TYPES = ("goal", "assist", "yellow", "red", "substitution")
+
+class LiveError(ValueError):
+    pass
+
+def match_channel(matchid: int) -> str:
+    return f"match:{matchid}"
+
+def tournament_channel(tournamentid: Optional[int]) -> str:
+    return f"tournament:{tournamentid}"
+
+class Subscription:
+    """One connected spectator: messages for its channels are queued on its event loop"""
+
+    def __init__(self, channels: Iterable[str], loop: asyncio.AbstractEventLoop):
+        self.channels = tuple(channels)
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, message: str) -> None:
+        # Runs on the subscriber's loop. A spectator that can't keep up is cut
+        # off rather than letting its queue grow; None tells it to disconnect.
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self) -> Optional[str]:
+        return await self.queue.get()
+
+class LiveMatch:
+    """
+    In-memory state of one live match. The score is the database tally as of
+    the last load (base) plus the goals pushed since, which are either waiting
+    for this worker's next flush (pending) or being written (in_flight), or
+    were pushed on other workers and not yet flushed there (remote).
+    """
+
+    def __init__(self, match: models.Match, base: Tuple[int, int], roster: Dict[int, Optional[int]]):
+        self.matchid = match.matchid
+        self.tournamentid = match.tournamentid
+        self.hometeamid = match.hometeamid
+        self.awayteamid = match.awayteamid
+        self.base = base
+        self.roster = roster
+        self.minute: Optional[int] = None
+        self.seq = 0
+        self.pending: List[Tuple[Optional[int], str, object]] = []  # (userid, pushid, event)
+        self.in_flight: List[Tuple[Optional[int], str, object]] = []
+        self.remote: Dict[str, List[object]] = {}  # pushid -> events
+        self.stale = False
+
+    def goal_for(self, event) -> Optional[int]:
+        """Team credited with a goal event: the scorer's team, or the other one for an own goal"""
+        teamid = event.teamid if event.teamid is not None else self.roster.get(event.playerid)
+        if event.isowngoal:
+            return self.awayteamid if teamid == self.hometeamid else self.hometeamid
+        return teamid
+
+    def score(self) -> Tuple[int, int]:
+        home, away = self.base
+        events = [event for _, _, event in self.in_flight + self.pending]
+        for pushed in self.remote.values():
+            events.extend(pushed)
+        for event in events:
+            if event.eventtype == "goal":
+                teamid = self.goal_for(event)
+                home += teamid == self.hometeamid
+                away += teamid == self.awayteamid
+        return home, away
+
+    def snapshot(self) -> dict:
+        home, away = self.score()
+        return {
+            "matchid": self.matchid,
+            "tournamentid": self.tournamentid,
+            "hometeamid": self.hometeamid,
+            "awayteamid": self.awayteamid,
+            "homescore": home,
+            "awayscore": away,
+            "minute": self.minute,
+            "seq": self.seq,
+        }
+
+def _load_tally(db: Session, match: models.Match) -> Tuple[Tuple[int, int], Dict[int, Optional[int]]]:
+    """(home goals, away goals) recorded for a match so far, and its two rosters"""
+    home = away = 0
+    for row in db.query(models.Goal.teamid, models.Goal.isowngoal, func.count().label("goals")).filter(
+        models.Goal.matchid == match.matchid
+    ).group_by(models.Goal.teamid, models.Goal.isowngoal).all():
+        # Goals carry the scorer's team; an own goal counts for the other side
+        for_home = (row.teamid == match.hometeamid) != bool(row.isowngoal)
+        if for_home:
+            home += row.goals
+        else:
+            away += row.goals
+    teamids = [teamid for teamid in (match.hometeamid, match.awayteamid) if teamid is not None]
+    roster = {
+        row.playerid: row.teamid
+        for row in db.query(models.Player.playerid, models.Player.teamid).filter(models.Player.teamid.in_(teamids)).all()
+    } if teamids else {}
+    return (home, away), roster
+
+class LiveHub:
+    """
+    Live match mode. Organizers push events for a match whose status is Live;
+    each push updates the in-memory state and is fanned out at once to
+    everyone subscribed to the match or its tournament, serialized a single
+    time whatever the number of spectators. Pushed events are written to the
+    database in batches every LIVE_FLUSH_INTERVAL seconds by flush(), through
+    the same path as the match event batch endpoint. Spectators get snapshots
+    from memory, so the database sees the same load with one spectator or ten
+    thousand.
+
+    With several workers, pushes, flushes and status changes are also sent on
+    the broker's "live" channel, so spectators connected to any worker see
+    every push. A worker that loads a match after pushes were made elsewhere
+    misses those until the pushing worker's next flush, at most
+    LIVE_FLUSH_INTERVAL seconds later; flush_everywhere doesn't wait for it.
+    """
+
+    def __init__(self, broker: Broker):
+        self._lock = threading.RLock()
+        # Serializes flushes, so a match's events are written in push order
+        self._flush_lock = threading.Lock()
+        self._matches: Dict[int, LiveMatch] = {}
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._live_ids: Optional[Tuple[float, List[int]]] = None
+        # flush_everywhere request id -> workers that confirmed their flush
+        self._flush_acks: Dict[str, int] = {}
+        self._flush_acked = threading.Condition(self._lock)
+        self.broker = broker
+        broker.subscribe("live", self._on_message)
+
+    # Spectators
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        subscription = Subscription(channels, asyncio.get_running_loop())
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def fan_out(self, channels: Iterable[str], message: dict) -> None:
+        """Send a message to this worker's subscribers of any of the channels (callable from any thread)"""
+        with self._lock:
+            targets = set()
+            for channel in channels:
+                targets |= self._subscribers.get(channel, set())
+        if not targets:
+            return
+        text = orjson.dumps(message, default=str).decode()
+        for subscription in targets:
+            subscription.loop.call_soon_threadsafe(subscription.deliver, text)
+
+    # State
+
+    def live_match_ids(self, db: Session) -> List[int]:
+        """Ids of the matches whose status is Live, re-queried at most every LIVE_LIST_TTL seconds"""
+        now = time.monotonic()
+        with self._lock:
+            if self._live_ids is not None and self._live_ids[0] > now:
+                return self._live_ids[1]
+        ids = [row.matchid for row in db.query(models.Match.matchid).filter(models.Match.status == "Live").order_by(models.Match.matchid).all()]
+        with self._lock:
+            self._live_ids = (now + LIVE_LIST_TTL, ids)
+        return ids
+
+    def state(self, db: Session, matchid: int) -> Optional[LiveMatch]:
+        """The match's live state, loaded from the database on first use; None unless the match is Live"""
+        with self._lock:
+            live = self._matches.get(matchid)
+        if live is not None:
+            return live
+        match = db.query(models.Match).filter(models.Match.matchid == matchid).first()
+        if match is None or match.status != "Live":
+            return None
+        base, roster = _load_tally(db, match)
+        with self._lock:
+            return self._matches.setdefault(matchid, LiveMatch(match, base, roster))
+
+    def snapshots(self, db: Session, tournamentid: Optional[int] = None) -> List[dict]:
+        states = [self.state(db, matchid) for matchid in self.live_match_ids(db)]
+        with self._lock:
+            return [
+                live.snapshot() for live in states
+                if live is not None and (tournamentid is None or live.tournamentid == tournamentid)
+            ]
+
+    def score(self, matchid: int) -> Optional[Tuple[int, int]]:
+        """Live score of a match already loaded in memory (never touches the database)"""
+        with self._lock:
+            live = self._matches.get(matchid)
+            return live.score() if live is not None else None
+
+    # Organizers
+
+    def push(self, db: Session, matchid: int, events: List, minute: Optional[int] = None, userid: Optional[int] = None) -> dict:
+        """
+        Apply an organizer's update to a live match and fan it out. Events are
+        checked against the rosters loaded with the match, so the later flush
+        doesn't have to reject them. Raises LiveError if the match isn't live
+        or an event is invalid. Returns the new snapshot.
+        """
+        live = self.state(db, matchid)
+        if live is None:
+            raise LiveError("Match is not live")
+        teams = {live.hometeamid, live.awayteamid} - {None}
+        for event in events:
+            if event.eventtype not in LIVE_EVENT_TYPES:
+                raise LiveError(f"{event.eventtype} events can't be pushed live; use the match events endpoint")
+            if event.playerid is None:
+                raise LiveError(f"A {event.eventtype} event needs a playerid")
+            if event.playerid not in live.roster or (event.relatedplayerid is not None and event.relatedplayerid not in live.roster):
+                raise LiveError(f"Player {event.playerid if event.playerid not in live.roster else event.relatedplayerid} is not on either team's roster")
+            if event.teamid is not None and event.teamid not in teams:
+                raise LiveError(f"Team {event.teamid} is not playing match {matchid}")
+        pushid = uuid.uuid4().hex
+        pushed = [event.model_dump() for event in events]
+        with self._lock:
+            live.pending.extend((userid, pushid, event) for event in events)
+            if minute is not None:
+                live.minute = minute
+            live.seq += 1
+            message = {"type": "update", **live.snapshot(), "events": pushed}
+        self.fan_out((match_channel(matchid), tournament_channel(live.tournamentid)), message)
+        self.broker.publish("live", {"type": "push", "matchid": matchid, "pushid": pushid, "minute": minute, "events": pushed})
+        return live.snapshot()
+
+    def mark_stale(self, matchid: int) -> None:
+        """The match's goals changed through another path; the next flush (on every worker) reloads its tally"""
+        self._mark_stale(matchid)
+        self.broker.publish("live", {"type": "stale", "matchid": matchid})
+
+    def _mark_stale(self, matchid: int) -> None:
+        with self._lock:
+            live = self._matches.get(matchid)
+            if live is not None:
+                live.stale = True
+
+    def forget_live_ids(self) -> None:
+        """A match status changed; re-query the live list on every worker"""
+        self._forget_live_ids()
+        self.broker.publish("live", {"type": "statuses"})
+
+    def _forget_live_ids(self) -> None:
+        with self._lock:
+            self._live_ids = None
+
+    def end(self, matchid: int) -> None:
+        """Write out a match that is no longer live, drop it from memory and tell its spectators (on every worker)"""
+        self._end(matchid)
+        self.broker.publish("live", {"type": "ended", "matchid": matchid})
+
+    def _end(self, matchid: int) -> None:
+        self.flush(matchid)
+        with self._lock:
+            live = self._matches.pop(matchid, None)
+            self._live_ids = None
+        if live is not None:
+            self.fan_out((match_channel(matchid), tournament_channel(live.tournamentid)), {
+                "type": "finished", **live.snapshot(),
+            })
+
+    # Writing pushed events to the database
+
+    def flush(self, matchid: Optional[int] = None) -> int:
+        """
+        Write the pending events of one match (or all matches) to the database,
+        one batch per match, then reload the flushed matches' tallies. Events
+        that fail validation are dropped with a warning; on any other error
+        they are kept for the next flush. Returns the events written.
+        """
+        written = 0
+        with self._flush_lock:
+            with self._lock:
+                if matchid is None:
+                    matches = list(self._matches.values())
+                else:
+                    matches = [self._matches[matchid]] if matchid in self._matches else []
+                batches = []
+                for live in matches:
+                    if live.pending or live.stale:
+                        live.in_flight, live.pending = live.pending, []
+                        live.stale = False
+                        batches.append(live)
+            for live in batches:
+                written += self._write(live)
+        return written
+
+    def flush_everywhere(self, matchid: int) -> bool:
+        """
+        Write the match's pending pushes on every worker, e.g. before its
+        result is recorded: flushes here, asks the other workers over the
+        broker, and waits until as many confirmations as there were receivers
+        come back. Returns False if some didn't within LIVE_FLUSH_WAIT seconds.
+        """
+        self.flush(matchid)
+        requestid = uuid.uuid4().hex
+        with self._lock:
+            self._flush_acks[requestid] = 0
+        try:
+            # Confirmations can arrive before publish returns; they are counted under the request id
+            expected = self.broker.publish("live", {"type": "flush", "matchid": matchid, "requestid": requestid})
+            deadline = time.monotonic() + LIVE_FLUSH_WAIT
+            with self._flush_acked:
+                while self._flush_acks[requestid] < expected:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        print(f"Warning: {expected - self._flush_acks[requestid]} workers did not confirm flushing match {matchid}")
+                        return False
+                    self._flush_acked.wait(remaining)
+            return True
+        finally:
+            with self._lock:
+                self._flush_acks.pop(requestid, None)
+
+    def _write(self, live: LiveMatch) -> int:
+        db = SessionLocal()
+        try:
+            match = db.query(models.Match).filter(models.Match.matchid == live.matchid).first()
+            if match is None:
+                with self._lock:
+                    self._matches.pop(live.matchid, None)
+                return 0
+            written = 0
+            pushids = list(dict.fromkeys(pushid for _, pushid, _ in live.in_flight))
+            if live.in_flight:
+                try:
+                    for userid, group in groupby(live.in_flight, key=lambda item: item[0]):
+                        events = [event for _, _, event in group]
+                        record_match_events(db, match, events, userid)
+                        written += len(events)
+                    bump_team_versions(db, match.hometeamid, match.awayteamid)
+                    db.commit()
+                except MatchEventError as e:
+                    db.rollback()
+                    print(f"Warning: dropped {len(live.in_flight)} live events for match {live.matchid}: {e}")
+                    written = 0
+                invalidate_tournament(match.tournamentid)
+                invalidate_team(match.hometeamid, match.awayteamid)
+                # Written (or dropped) for good: other workers stop counting these pushes
+                self.broker.publish("live", {"type": "flushed", "matchid": live.matchid, "pushids": pushids})
+            self._reload(db, match, live)
+            return written
+        except Exception as e:
+            db.rollback()
+            print(f"Warning: could not flush live events for match {live.matchid}, retrying later: {e}")
+            with self._lock:
+                live.pending = live.in_flight + live.pending
+                live.in_flight = []
+            return 0
+        finally:
+            db.close()
+
+    def _reload(self, db: Session, match: models.Match, live: LiveMatch, pushids: Iterable[str] = ()) -> None:
+        """Reload a match's tally after a flush here or elsewhere; spectators get a snapshot if the score moved"""
+        base, roster = _load_tally(db, match)
+        with self._lock:
+            before = live.score()
+            live.base, live.roster, live.in_flight = base, roster, []
+            for pushid in pushids:
+                live.remote.pop(pushid, None)
+            changed = live.score() != before
+            if changed:
+                # Goals recorded or removed through another path
+                live.seq += 1
+            message = {"type": "snapshot", **live.snapshot()}
+        if changed:
+            self.fan_out((match_channel(live.matchid), tournament_channel(live.tournamentid)), message)
+
+    # Other workers
+
+    def _on_message(self, message: dict) -> None:
+        kind = message["type"]
+        if kind == "statuses":
+            self._forget_live_ids()
+            return
+        matchid = message["matchid"]
+        if kind == "stale":
+            self._mark_stale(matchid)
+        elif kind == "ended":
+            self._end(matchid)
+        elif kind == "push":
+            self._apply_remote_push(matchid, message)
+        elif kind == "flush":
+            self.flush(matchid)
+            self.broker.publish("live", {"type": "flush_done", "matchid": matchid, "requestid": message["requestid"]})
+        elif kind == "flush_done":
+            with self._flush_acked:
+                if message["requestid"] in self._flush_acks:
+                    self._flush_acks[message["requestid"]] += 1
+                    self._flush_acked.notify_all()
+        elif kind == "flushed":
+            with self._lock:
+                live = self._matches.get(matchid)
+            if live is None:
+                return
+            db = SessionLocal()
+            try:
+                match = db.query(models.Match).filter(models.Match.matchid == matchid).first()
+                if match is not None:
+                    with self._flush_lock:
+                        self._reload(db, match, live, message["pushids"])
+            finally:
+                db.close()
+
+    def _apply_remote_push(self, matchid: int, message: dict) -> None:
+        # Only matches this worker has loaded; the others load the flushed tally later
+        events = [SimpleNamespace(**event) for event in message["events"]]
+        with self._lock:
+            live = self._matches.get(matchid)
+            if live is None:
+                return
+            live.remote[message["pushid"]] = events
+            if message["minute"] is not None:
+                live.minute = message["minute"]
+            live.seq += 1
+            update = {"type": "update", **live.snapshot(), "events": message["events"]}
+        self.fan_out((match_channel(matchid), tournament_channel(live.tournamentid)), update)
+
+    async def run_flusher(self) -> None:
+        """Background task: flush pushed events every LIVE_FLUSH_INTERVAL seconds until cancelled"""
+        while True:
+            await asyncio.sleep(LIVE_FLUSH_INTERVAL)
+            try:
+                await run_in_threadpool(self.flush)
+            except Exception as e:
+                print(f"Warning: live flush failed: {e}")
+
+# Shared hub for the process
+live_hub = LiveHub(broker)
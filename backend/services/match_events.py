@@ -0,0 +1,161 @@
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import case
+from sqlalchemy.orm import Session, aliased
+import models
+from services.stats import EVENT_COUNTERS, apply_player_changes
+
+class MatchEventError(ValueError):
+    pass
+
+def _count(changes: Dict[int, Dict[str, int]], playerid: int, column: str) -> None:
+    counter = changes.setdefault(playerid, {})
+    counter[column] = counter.get(column, 0) + 1
+
+def match_timeline(db: Session, matchid: int) -> list:
+    """A match's events by minute (unknown minutes last), each flagged if a later event voided it"""
+    void = aliased(models.MatchEvent)
+    return db.query(
+        models.MatchEvent.eventid,
+        models.MatchEvent.matchid,
+        models.MatchEvent.eventtype,
+        models.MatchEvent.playerid,
+        models.MatchEvent.teamid,
+        models.MatchEvent.minute,
+        models.MatchEvent.isowngoal,
+        models.MatchEvent.relatedplayerid,
+        models.MatchEvent.relatedeventid,
+        models.MatchEvent.goalid,
+        models.MatchEvent.createdat,
+        case((void.eventid.isnot(None), True), else_=False).label("voided"),
+    ).outerjoin(
+        void, void.relatedeventid == models.MatchEvent.eventid
+    ).filter(
+        models.MatchEvent.matchid == matchid
+    ).order_by(
+        models.MatchEvent.minute.is_(None), models.MatchEvent.minute, models.MatchEvent.eventid
+    ).all()
+
+def record_match_events(db: Session, match: models.Match, events: Sequence, userid: Optional[int] = None) -> List[models.MatchEvent]:
+    """
+    Append a batch of events to a match's log and fold them into the player
+    counters, all in the caller's transaction. The batch is validated as a
+    whole first (raises MatchEventError and writes nothing if any event is
+    bad), then written with a few set-based statements whatever its size:
+    - goal: also records the goal row, so goal lists and counts see it
+    - assist, yellow, red: count towards the player's assists and cards
+    - mvp: makes the player the result's MVP (the last one in a batch wins)
+    - substitution: logged for the timeline; appearances come from the rosters
+    - void: cancels an earlier event of the match and takes back what it counted
+    The counters are the profile snapshot: reads never count events.
+    Does not commit; returns the new events, flushed.
+    """
+    teams = {teamid for teamid in (match.hometeamid, match.awayteamid) if teamid is not None}
+    playerids = {event.playerid for event in events if event.eventtype != "void" and event.playerid is not None}
+    playerids |= {event.relatedplayerid for event in events if event.relatedplayerid is not None}
+    player_teams = {
+        row.playerid: row.teamid
+        for row in db.query(models.Player.playerid, models.Player.teamid).filter(models.Player.playerid.in_(playerids)).all()
+    }
+    missing = sorted(playerids - set(player_teams))
+    if missing:
+        raise MatchEventError(f"Players not found: {', '.join(str(playerid) for playerid in missing)}")
+
+    voided_ids = [event.relatedeventid for event in events if event.eventtype == "void"]
+    if None in voided_ids:
+        raise MatchEventError("A void event needs the relatedeventid of the event it cancels")
+    if len(set(voided_ids)) != len(voided_ids):
+        raise MatchEventError("The batch voids the same event more than once")
+    void = aliased(models.MatchEvent)
+    targets = {
+        row.MatchEvent.eventid: row
+        for row in db.query(models.MatchEvent, void.eventid.label("voidid")).outerjoin(
+            void, void.relatedeventid == models.MatchEvent.eventid
+        ).filter(
+            models.MatchEvent.matchid == match.matchid,
+            models.MatchEvent.eventid.in_(voided_ids),
+        ).all()
+    } if voided_ids else {}
+    for eventid in voided_ids:
+        target = targets.get(eventid)
+        if target is None:
+            raise MatchEventError(f"Event {eventid} is not an event of match {match.matchid}")
+        if target.MatchEvent.eventtype == "void":
+            raise MatchEventError(f"Event {eventid} is a void; log the event again instead of voiding the void")
+        if target.voidid is not None:
+            raise MatchEventError(f"Event {eventid} is already voided")
+
+    teamids = []
+    for event in events:
+        if event.eventtype == "void":
+            teamids.append(None)
+            continue
+        if event.playerid is None:
+            raise MatchEventError(f"A {event.eventtype} event needs a playerid")
+        teamid = event.teamid if event.teamid is not None else player_teams[event.playerid]
+        if teamid not in teams:
+            raise MatchEventError(f"Player {event.playerid}'s team is not playing match {match.matchid}")
+        teamids.append(teamid)
+
+    result = db.query(models.MatchResult).filter(models.MatchResult.matchid == match.matchid).first()
+    affects_mvp = any(event.eventtype == "mvp" for event in events) or any(
+        targets[eventid].MatchEvent.eventtype == "mvp" for eventid in voided_ids
+    )
+    if affects_mvp and result is None:
+        raise MatchEventError("Record the match result before its MVP")
+
+    added: Dict[int, Dict[str, int]] = {}
+    removed: Dict[int, Dict[str, int]] = {}
+
+    # Voids first, so a batch can void the old MVP and name a new one
+    for eventid in voided_ids:
+        target = targets[eventid].MatchEvent
+        if target.eventtype in EVENT_COUNTERS:
+            _count(removed, target.playerid, EVENT_COUNTERS[target.eventtype])
+        elif target.eventtype == "goal" and target.goalid is not None:
+            goal = db.query(models.Goal).filter(models.Goal.goalid == target.goalid).first()
+            # The goal may already have been deleted through the goals API
+            if goal is not None:
+                _count(removed, goal.playerid, "owngoals" if goal.isowngoal else "goals")
+                db.delete(goal)
+        elif target.eventtype == "mvp" and result.mvpplayerid == target.playerid:
+            _count(removed, target.playerid, "mvpcount")
+            result.mvpplayerid = None
+
+    goals = {
+        i: models.Goal(matchid=match.matchid, playerid=event.playerid, teamid=teamids[i], minute=event.minute, isowngoal=event.isowngoal or 0)
+        for i, event in enumerate(events) if event.eventtype == "goal"
+    }
+    db.add_all(goals.values())
+    db.flush()
+
+    rows = []
+    for i, event in enumerate(events):
+        rows.append(models.MatchEvent(
+            matchid=match.matchid,
+            eventtype=event.eventtype,
+            playerid=event.playerid if event.eventtype != "void" else None,
+            teamid=teamids[i],
+            minute=event.minute,
+            isowngoal=(event.isowngoal or 0) if event.eventtype == "goal" else 0,
+            relatedplayerid=event.relatedplayerid,
+            relatedeventid=event.relatedeventid if event.eventtype == "void" else None,
+            goalid=goals[i].goalid if i in goals else None,
+            createdby=userid,
+        ))
+        if event.eventtype == "goal":
+            _count(added, event.playerid, "owngoals" if event.isowngoal else "goals")
+        elif event.eventtype in EVENT_COUNTERS:
+            _count(added, event.playerid, EVENT_COUNTERS[event.eventtype])
+    db.add_all(rows)
+
+    mvps = [event.playerid for event in events if event.eventtype == "mvp"]
+    if mvps and result.mvpplayerid != mvps[-1]:
+        if result.mvpplayerid is not None:
+            _count(removed, result.mvpplayerid, "mvpcount")
+        _count(added, mvps[-1], "mvpcount")
+        result.mvpplayerid = mvps[-1]
+
+    apply_player_changes(db, match.tournamentid, removed, subtract=True)
+    apply_player_changes(db, match.tournamentid, added)
+    db.flush()
+    return rows
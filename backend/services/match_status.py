@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, case, or_, update
+from sqlalchemy.orm import Session
+import models
+from database import SessionLocal
+from services.cache import invalidate_team, invalidate_tournament
+from services.live import live_hub
+from services.team_version import bump_team_versions
+
+# How long after kick-off a match is considered over (play, half-time and stoppages)
+MATCH_DURATION = timedelta(minutes=120)
+# Seconds between status ticks
+STATUS_TICK_INTERVAL = 30.0
+
+def advance_match_statuses(db: Session, now: Optional[datetime] = None) -> list:
+    """
+    Move matches along by the clock: Upcoming matches that have kicked off
+    become Live, and Upcoming or Live matches whose MATCH_DURATION has passed
+    become Finished. Matches set to Finished by hand are never touched, and a
+    postponed match should have its matchdate moved rather than its status.
+
+    One UPDATE ... RETURNING does the whole tick, so concurrent ticks on
+    several workers can't apply the same change twice; the Upcoming half is
+    served by the partial ix_match_upcoming_date index. Does not commit.
+    Returns the changed matches (matchid, tournamentid, hometeamid,
+    awayteamid, status).
+    """
+    now = now or datetime.now()
+    ended_before = now - MATCH_DURATION
+    match = models.Match.__table__
+    stmt = update(match).where(
+        or_(
+            and_(match.c.status == "Upcoming", match.c.matchdate <= now),
+            and_(match.c.status == "Live", match.c.matchdate <= ended_before),
+        )
+    ).values(
+        status=case((match.c.matchdate <= ended_before, "Finished"), else_="Live")
+    ).returning(match.c.matchid, match.c.tournamentid, match.c.hometeamid, match.c.awayteamid, match.c.status)
+    rows = db.execute(stmt).all()
+    bump_team_versions(db, *(row.hometeamid for row in rows), *(row.awayteamid for row in rows))
+    return rows
+
+def tick_match_statuses(now: Optional[datetime] = None) -> Dict[str, List[int]]:
+    """
+    One scheduler tick in its own session: advance, commit, then evict the
+    cached views and update live state. Returns the ids that went
+    {"Live": [...], "Finished": [...]}.
+    """
+    db = SessionLocal()
+    try:
+        rows = advance_match_statuses(db, now)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    changed = {"Live": [], "Finished": []}
+    if not rows:
+        return changed
+    for row in rows:
+        changed[row.status].append(row.matchid)
+    invalidate_tournament(*{row.tournamentid for row in rows})
+    invalidate_team(*{teamid for row in rows for teamid in (row.hometeamid, row.awayteamid)})
+    live_hub.forget_live_ids()
+    for matchid in changed["Finished"]:
+        # Writes out anything pushed live and tells spectators the match is over
+        live_hub.end(matchid)
+    return changed
+
+async def run_match_status_scheduler() -> None:
+    """Background task: advance match statuses every STATUS_TICK_INTERVAL seconds until cancelled"""
+    while True:
+        try:
+            changed = await run_in_threadpool(tick_match_statuses)
+            if changed["Live"] or changed["Finished"]:
+                print(f"Match statuses: {len(changed['Live'])} now live, {len(changed['Finished'])} finished")
+        except Exception as e:
+            print(f"Warning: match status tick failed: {e}")
+        await asyncio.sleep(STATUS_TICK_INTERVAL)
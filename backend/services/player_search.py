@@ -0,0 +1,216 @@
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import case, func, or_
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+import models
+from services.text_search import tokenize, trigrams, trigram_similarity
+from services.broker import broker
+
+# Same default as pg_trgm.similarity_threshold, so both backends rank alike
+SIMILARITY_THRESHOLD = 0.3
+EXACT_SCORE = 1.5
+PREFIX_SCORE = 1.0
+
+Ranked = List[Tuple[int, float]]
+
+def search_players(
+    db: Session,
+    q: str,
+    position: Optional[str] = None,
+    teamid: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 20,
+) -> Tuple[int, Ranked]:
+    """
+    Rank players whose first/last names match every token of q by prefix or
+    trigram similarity. Returns (total matches, [(playerid, score), ...]) for
+    the requested page. Postgres uses the trigram GIN indexes; other databases
+    use the in-memory index below.
+    """
+    tokens = tokenize(q)
+    if not tokens:
+        return 0, []
+    if db.get_bind().dialect.name == "postgresql":
+        try:
+            return _search_postgres(db, tokens, position, teamid, skip, limit)
+        except DBAPIError as e:
+            # pg_trgm not installed; serve from memory rather than fail
+            db.rollback()
+            print(f"Warning: trigram player search failed, using in-memory index: {e}")
+    return player_index.search(db, tokens, position, teamid, skip, limit)
+
+def invalidate_player_search() -> None:
+    """Call after player/user name, team or position changes so the in-memory index rebuilds (on every worker)"""
+    player_index.mark_stale()
+    broker.publish("player_search", {})
+
+def _like_escape(token: str) -> str:
+    # Tokens are \w+ runs, so "_" is the only LIKE wildcard they can contain
+    return token.replace("_", "!_")
+
+def _search_postgres(db: Session, tokens: List[str], position: Optional[str], teamid: Optional[int], skip: int, limit: int) -> Tuple[int, Ranked]:
+    first = models.User.firstname
+    last = models.User.lastname
+    conditions = []
+    score = None
+    for token in tokens:
+        escaped = _like_escape(token)
+        exact = or_(first.ilike(escaped, escape="!"), last.ilike(escaped, escape="!"))
+        # Prefix of any word in the name ("abd" matches "Abdel Rahman" and "Omar Abdallah")
+        prefix = or_(
+            first.ilike(f"{escaped}%", escape="!"), last.ilike(f"{escaped}%", escape="!"),
+            first.ilike(f"% {escaped}%", escape="!"), last.ilike(f"% {escaped}%", escape="!"),
+        )
+        fuzzy = or_(first.op("%")(token), last.op("%")(token))
+        conditions.append(or_(prefix, fuzzy))
+        token_score = case(
+            (exact, EXACT_SCORE),
+            (prefix, PREFIX_SCORE),
+            else_=func.greatest(func.coalesce(func.similarity(first, token), 0), func.coalesce(func.similarity(last, token), 0)),
+        )
+        score = token_score if score is None else score + token_score
+
+    query = db.query(
+        models.Player.playerid,
+        score.label("score"),
+        func.count().over().label("total"),
+    ).join(
+        models.User, models.Player.userid == models.User.userid
+    ).filter(
+        models.User.status != "deleted",
+        *conditions,
+    )
+    if position:
+        query = query.filter(models.Player.position == position)
+    if teamid is not None:
+        query = query.filter(models.Player.teamid == teamid)
+
+    rows = query.order_by(
+        score.desc(), models.User.lastname, models.User.firstname, models.Player.playerid
+    ).offset(skip).limit(limit).all()
+    if rows:
+        return rows[0].total, [(row.playerid, float(row.score)) for row in rows]
+    if skip == 0:
+        return 0, []
+    # Page past the end: the window count is unavailable, so count separately
+    total = query.with_entities(func.count(models.Player.playerid)).order_by(None).scalar()
+    return total or 0, []
+
+
+class PlayerNameIndex:
+    """
+    In-memory name index used when the database has no trigram support (SQLite).
+    Names are split into tokens; a sorted token list answers prefix lookups with
+    bisect and a trigram -> tokens map answers fuzzy lookups. The index is rebuilt
+    from one query when marked stale or older than ttl seconds.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._built_at = 0.0
+        self._stale = True
+        # (playerid -> (position, teamid, sort key), token -> playerids, sorted tokens, trigram -> tokens)
+        self._state: Tuple[Dict[int, tuple], Dict[str, Set[int]], List[str], Dict[str, Set[str]]] = ({}, {}, [], {})
+
+    def mark_stale(self) -> None:
+        self._stale = True
+
+    def _ensure_fresh(self, db: Session) -> None:
+        if not self._stale and time.monotonic() - self._built_at < self.ttl:
+            return
+        with self._lock:
+            if not self._stale and time.monotonic() - self._built_at < self.ttl:
+                return
+            self._stale = False
+            self._build(db)
+
+    def _build(self, db: Session) -> None:
+        rows = db.query(
+            models.Player.playerid,
+            models.Player.position,
+            models.Player.teamid,
+            models.User.firstname,
+            models.User.lastname,
+        ).join(
+            models.User, models.Player.userid == models.User.userid
+        ).filter(models.User.status != "deleted").all()
+
+        docs = {}
+        token_players: Dict[str, Set[int]] = {}
+        for row in rows:
+            docs[row.playerid] = (row.position, row.teamid, ((row.lastname or "").casefold(), (row.firstname or "").casefold(), row.playerid))
+            for token in tokenize(f"{row.firstname or ''} {row.lastname or ''}"):
+                token_players.setdefault(token, set()).add(row.playerid)
+        gram_tokens: Dict[str, Set[str]] = {}
+        for token in token_players:
+            for gram in trigrams(token):
+                gram_tokens.setdefault(gram, set()).add(token)
+
+        # Swap in the new structures in one go so readers never see a half-built index
+        self._state = (docs, token_players, sorted(token_players), gram_tokens)
+        self._built_at = time.monotonic()
+
+    def _match_token(self, state: tuple, token: str) -> Dict[int, float]:
+        """Best score per player for a single query token"""
+        _, token_players, sorted_tokens, gram_tokens = state
+        scores: Dict[int, float] = {}
+
+        def offer(players: Set[int], score: float) -> None:
+            for playerid in players:
+                if score > scores.get(playerid, 0.0):
+                    scores[playerid] = score
+
+        # Fuzzy: candidate tokens sharing at least one trigram
+        query_grams = trigrams(token)
+        candidates: Set[str] = set()
+        for gram in query_grams:
+            candidates.update(gram_tokens.get(gram, ()))
+        for candidate in candidates:
+            similarity = trigram_similarity(query_grams, trigrams(candidate))
+            if similarity >= SIMILARITY_THRESHOLD:
+                offer(token_players[candidate], similarity)
+
+        # Prefix: contiguous run in the sorted token list
+        position = bisect.bisect_left(sorted_tokens, token)
+        while position < len(sorted_tokens) and sorted_tokens[position].startswith(token):
+            candidate = sorted_tokens[position]
+            offer(token_players[candidate], EXACT_SCORE if candidate == token else PREFIX_SCORE)
+            position += 1
+        return scores
+
+    def search(self, db: Session, tokens: List[str], position: Optional[str], teamid: Optional[int], skip: int, limit: int) -> Tuple[int, Ranked]:
+        self._ensure_fresh(db)
+        state = self._state
+        docs = state[0]
+        totals: Optional[Dict[int, float]] = None
+        for token in tokens:
+            scores = self._match_token(state, token)
+            if totals is None:
+                totals = scores
+            else:
+                # Every token has to match
+                totals = {playerid: totals[playerid] + score for playerid, score in scores.items() if playerid in totals}
+            if not totals:
+                return 0, []
+
+        matches = []
+        for playerid, score in totals.items():
+            doc = docs.get(playerid)
+            if doc is None:
+                continue
+            if position and doc[0] != position:
+                continue
+            if teamid is not None and doc[1] != teamid:
+                continue
+            matches.append((-score, doc[2], playerid))
+        matches.sort()
+        return len(matches), [(playerid, -neg_score) for neg_score, _, playerid in matches[skip:skip + limit]]
+
+# Shared index instance for the process
+player_index = PlayerNameIndex()
+# Other workers' player changes mark this worker's index stale too
+broker.subscribe("player_search", lambda message: player_index.mark_stale())
@@ -0,0 +1,194 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Average goals per team per match when a group has no results yet
+DEFAULT_GOALS_PER_MATCH = 1.35
+# Home sides score this much more on average
+HOME_ADVANTAGE = 1.1
+# Pseudo-matches of league-average form mixed into each team's record, so one
+# early 5-0 doesn't make a team look unbeatable
+FORM_PRIOR_MATCHES = 3.0
+# Elo points difference that multiplies the goal-rate ratio by e
+ELO_SCALE = 400.0
+# Simulated matches (simulations x remaining matches) above which the work is split across processes
+PARALLEL_THRESHOLD = 2_000_000
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+# Simulated matches per batch inside one worker (about 8 MB per float array)
+BATCH_CELLS = 1_000_000
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def goal_rates(
+    teams: Sequence[dict],
+    fixtures: Sequence[Tuple[int, int]],
+    ratings: Optional[Dict[int, float]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Expected goals (home, away) for each remaining fixture, given as indexes
+    into teams. With ratings (team id -> Elo) strength comes from the rating
+    gap; otherwise from each team's goals for/against per match so far.
+    """
+    played = np.array([t["matchesplayed"] for t in teams], dtype=float)
+    scored = np.array([t["goalsfor"] for t in teams], dtype=float)
+    conceded = np.array([t["goalsagainst"] for t in teams], dtype=float)
+    mean = scored.sum() / played.sum() if played.sum() else DEFAULT_GOALS_PER_MATCH
+    mean = max(mean, 0.25)
+
+    home = np.array([h for h, _ in fixtures], dtype=int)
+    away = np.array([a for _, a in fixtures], dtype=int)
+    if ratings:
+        elo = np.array([ratings.get(t["teamid"], 1500.0) for t in teams], dtype=float)
+        gap = (elo[home] - elo[away]) / ELO_SCALE
+        return mean * HOME_ADVANTAGE * np.exp(gap / 2), mean * np.exp(-gap / 2)
+
+    attack = (scored + mean * FORM_PRIOR_MATCHES) / (played + FORM_PRIOR_MATCHES) / mean
+    defence = (conceded + mean * FORM_PRIOR_MATCHES) / (played + FORM_PRIOR_MATCHES) / mean
+    return (
+        mean * HOME_ADVANTAGE * attack[home] * defence[away],
+        mean * attack[away] * defence[home],
+    )
+
+def simulate_positions(
+    points: np.ndarray,
+    goaldiff: np.ndarray,
+    goalsfor: np.ndarray,
+    home: np.ndarray,
+    away: np.ndarray,
+    home_rate: np.ndarray,
+    away_rate: np.ndarray,
+    simulations: int,
+    seed: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Play the remaining fixtures `simulations` times and count final positions.
+    Returns a (teams x positions) matrix of counts. Each simulated season is one
+    row: goals for all fixtures are Poisson samples from one call, and results
+    are added to the tables with an (n x fixtures) by (fixtures x teams) matrix
+    product. Ties on points, goal difference and goals are broken at random.
+    Seasons are simulated in batches so memory stays bounded for big groups.
+    """
+    rng = np.random.default_rng(seed)
+    team_count = len(points)
+    fixture_count = len(home)
+    home_onehot = np.zeros((fixture_count, team_count))
+    away_onehot = np.zeros((fixture_count, team_count))
+    home_onehot[np.arange(fixture_count), home] = 1.0
+    away_onehot[np.arange(fixture_count), away] = 1.0
+    batch = max(1, BATCH_CELLS // max(fixture_count, team_count, 1))
+
+    counts = np.zeros((team_count, team_count), dtype=np.int64)
+    done = 0
+    while done < simulations:
+        size = min(batch, simulations - done)
+        done += size
+        table_points = np.broadcast_to(points, (size, team_count)).astype(float)
+        table_gd = np.broadcast_to(goaldiff, (size, team_count)).astype(float)
+        table_gf = np.broadcast_to(goalsfor, (size, team_count)).astype(float)
+        if fixture_count:
+            home_goals = rng.poisson(home_rate, size=(size, fixture_count)).astype(float)
+            away_goals = rng.poisson(away_rate, size=(size, fixture_count)).astype(float)
+            margin = home_goals - away_goals
+            home_points = np.where(margin > 0, 3.0, np.where(margin == 0, 1.0, 0.0))
+            away_points = np.where(margin < 0, 3.0, np.where(margin == 0, 1.0, 0.0))
+            table_points += home_points @ home_onehot + away_points @ away_onehot
+            table_gd += margin @ home_onehot - margin @ away_onehot
+            table_gf += home_goals @ home_onehot + away_goals @ away_onehot
+
+        # Lexicographic (points, goal difference, goals, random) packed into one float;
+        # goal difference and goals stay well inside their 1000-wide bands
+        key = table_points * 1e7 + (table_gd + 5000.0) * 1e3 + np.minimum(table_gf, 999.0) + rng.random((size, team_count))
+        order = np.argsort(-key, axis=1)
+        for position in range(team_count):
+            counts[:, position] += np.bincount(order[:, position], minlength=team_count)
+    return counts
+
+def _simulate_chunk(args) -> np.ndarray:
+    # Top-level so worker processes can unpickle it
+    return simulate_positions(*args)
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the parent has database connections and threads
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=get_context("spawn"))
+        return _pool
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+def project_group(
+    teams: Sequence[dict],
+    fixtures: Sequence[Tuple[int, int]],
+    simulations: int = 20000,
+    ratings: Optional[Dict[int, float]] = None,
+    seed: Optional[int] = None,
+) -> List[dict]:
+    """
+    Finishing-position probabilities for every team of a group.
+    teams: current standings rows (teamid, matchesplayed, points, goalsfor, goalsagainst)
+    fixtures: remaining (home team id, away team id) pairs between those teams
+    Large jobs are split across a process pool, each chunk with its own seed.
+    """
+    if not teams:
+        return []
+    index = {t["teamid"]: i for i, t in enumerate(teams)}
+    pairs = [(index[h], index[a]) for h, a in fixtures if h in index and a in index]
+    points = np.array([t["points"] for t in teams], dtype=float)
+    goalsfor = np.array([t["goalsfor"] for t in teams], dtype=float)
+    goaldiff = goalsfor - np.array([t["goalsagainst"] for t in teams], dtype=float)
+    home = np.array([h for h, _ in pairs], dtype=int)
+    away = np.array([a for _, a in pairs], dtype=int)
+    home_rate, away_rate = goal_rates(teams, pairs, ratings) if pairs else (np.zeros(0), np.zeros(0))
+
+    chunks = 1
+    if simulations * max(len(pairs), 1) > PARALLEL_THRESHOLD and MAX_WORKERS > 1:
+        chunks = MAX_WORKERS
+    seeds = np.random.SeedSequence(seed).spawn(chunks)
+    sizes = [simulations // chunks + (1 if i < simulations % chunks else 0) for i in range(chunks)]
+    jobs = [
+        (points, goaldiff, goalsfor, home, away, home_rate, away_rate, size, np.random.default_rng(child).integers(2**32))
+        for size, child in zip(sizes, seeds)
+    ]
+    if chunks == 1:
+        counts = _simulate_chunk(jobs[0])
+    else:
+        counts = sum(_get_pool().map(_simulate_chunk, jobs))
+
+    probabilities = counts / float(simulations)
+    positions = np.arange(1, len(teams) + 1)
+    expected_points = points.copy()
+    if pairs:
+        # Analytic expectation from the same Poisson model, no sampling noise
+        for (h, a), hr, ar in zip(pairs, home_rate, away_rate):
+            win, draw, loss = _outcome_probabilities(hr, ar)
+            expected_points[h] += 3 * win + draw
+            expected_points[a] += 3 * loss + draw
+    return [
+        {
+            "teamid": t["teamid"],
+            "points": int(t["points"]),
+            "expected_points": round(float(expected_points[i]), 2),
+            "average_position": round(float((probabilities[i] * positions).sum()), 2),
+            "positions": [round(float(p), 4) for p in probabilities[i]],
+        }
+        for i, t in enumerate(teams)
+    ]
+
+def _outcome_probabilities(home_rate: float, away_rate: float, max_goals: int = 15) -> Tuple[float, float, float]:
+    """P(home win), P(draw), P(away win) for independent Poisson scores"""
+    goals = np.arange(max_goals + 1)
+    log_factorial = np.concatenate(([0.0], np.cumsum(np.log(goals[1:]))))
+    home_p = np.exp(goals * np.log(max(home_rate, 1e-9)) - home_rate - log_factorial)
+    away_p = np.exp(goals * np.log(max(away_rate, 1e-9)) - away_rate - log_factorial)
+    grid = np.outer(home_p, away_p)
+    return float(np.tril(grid, -1).sum()), float(np.trace(grid)), float(np.triu(grid, 1).sum())
@@ -0,0 +1,259 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+from fastapi.concurrency import run_in_threadpool
+from jose import JWTError, jwt
+from auth import ALGORITHM, SECRET_KEY
+from config import settings
+from responses import DefaultResponse
+from services.broker import RedisClient, RedisError
+
+# Buckets kept per worker before the least recently used are dropped
+MAX_MEMORY_BUCKETS = 100_000
+# Seconds a client is told to wait when the server sheds load
+SHED_RETRY_AFTER = 1
+# Seconds to use this worker's buckets after the shared backend failed, before trying it again
+REDIS_RETRY_DELAY = 10.0
+# Buckets are checked narrowest first
+SCOPE_ORDER = {"user": 0, "ip": 1, "route": 2}
+
+class Limit:
+    """A token bucket: `per_minute` requests on average, at most `burst` at once, keyed by ip, user or route"""
+
+    def __init__(self, scope: str, per_minute: float, burst: Optional[int] = None):
+        if scope not in ("ip", "user", "route"):
+            raise ValueError(f"Unknown rate limit scope {scope}")
+        self.scope = scope
+        self.rate = per_minute / 60.0
+        self.capacity = burst or max(1, int(per_minute))
+
+class RouteRule:
+    """
+    Limits for one endpoint (or every endpoint under a path prefix):
+    token buckets checked on every request, and optionally a cap on its
+    requests in flight in this worker, so a flood of one expensive endpoint
+    (bcrypt, SMTP, uploads) can't take every worker thread from the rest.
+    """
+
+    def __init__(self, name: str, method: str, path: str, limits: Sequence[Limit], concurrency: Optional[int] = None, prefix: bool = False):
+        self.name = name
+        self.method = method
+        self.path = path.rstrip("/")
+        self.limits = list(limits)
+        self.concurrency = concurrency
+        self.prefix = prefix
+        self.in_flight = 0
+
+    def matches(self, method: str, path: str) -> bool:
+        if method != self.method:
+            return False
+        path = path.rstrip("/")
+        return path == self.path or (self.prefix and path.startswith(self.path + "/"))
+
+RATE_LIMIT_RULES = [
+    RouteRule("login", "POST", "/api/auth/login", [Limit("ip", 10), Limit("route", 300, 60)], concurrency=8),
+    RouteRule("register", "POST", "/api/auth/register", [Limit("ip", 5), Limit("route", 60, 20)], concurrency=4),
+    RouteRule("resend-verification", "POST", "/api/auth/resend-verification", [Limit("ip", 5), Limit("route", 60, 20)], concurrency=4),
+    RouteRule("upload", "POST", "/api/upload", [Limit("user", 20), Limit("ip", 30), Limit("route", 300, 30)], concurrency=4, prefix=True),
+]
+
+class MemoryBuckets:
+    """Token buckets of this worker"""
+
+    shared = False
+
+    def __init__(self, max_buckets: int = MAX_MEMORY_BUCKETS):
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, updated)
+        self._lock = threading.Lock()
+        self.max_buckets = max_buckets
+
+    def take(self, key: str, limit: Limit, now: Optional[float] = None) -> float:
+        """Take a token; returns 0 if there was one, otherwise the seconds until there will be"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (limit.capacity, now))
+            tokens = min(limit.capacity, tokens + (now - updated) * limit.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / limit.rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+            return wait
+
+# Same arithmetic as MemoryBuckets.take, atomically in Redis; the bucket expires once it would be full again
+_TAKE_SCRIPT = b"""
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+class RedisBuckets:
+    """
+    Token buckets shared by all workers, in Redis (one script call per
+    bucket). If Redis is unreachable the worker falls back to its own
+    buckets rather than failing or letting everything through.
+    """
+
+    shared = True
+
+    def __init__(self, url: str):
+        self.client = RedisClient(url)
+        self.fallback = MemoryBuckets()
+        self._sha: Optional[bytes] = None
+        self._down_until = 0.0
+
+    def take(self, key: str, limit: Limit, now: Optional[float] = None) -> float:
+        if time.monotonic() < self._down_until:
+            return self.fallback.take(key, limit)
+        now = time.time() if now is None else now
+        args = (b"1", f"league:ratelimit:{key}".encode(), repr(limit.rate).encode(), str(limit.capacity).encode(), repr(now).encode())
+        try:
+            if self._sha is not None:
+                try:
+                    return float(self.client.execute(b"EVALSHA", self._sha, *args))
+                except RedisError as e:
+                    if not str(e).startswith("NOSCRIPT"):
+                        raise
+            self._sha = self.client.execute(b"SCRIPT", b"LOAD", _TAKE_SCRIPT)
+            return float(self.client.execute(b"EVALSHA", self._sha, *args))
+        except (OSError, RedisError, ValueError) as e:
+            print(f"Warning: shared rate limit unavailable, using this worker's buckets for {REDIS_RETRY_DELAY:.0f}s: {e}")
+            self._down_until = time.monotonic() + REDIS_RETRY_DELAY
+            return self.fallback.take(key, limit)
+
+def create_buckets():
+    """RedisBuckets when REDIS_URL is set (several workers), otherwise MemoryBuckets"""
+    return RedisBuckets(settings.redis_url) if settings.redis_url else MemoryBuckets()
+
+def client_ip(scope: dict, proxy_hops: int = 0) -> Optional[str]:
+    """
+    The caller's address: the socket peer, or with proxy_hops trusted proxies
+    the address they saw. None when the request came through a proxy that
+    isn't configured (X-Forwarded-For with proxy_hops 0): the socket peer is
+    then the proxy, shared by every client.
+    """
+    for name, value in scope.get("headers") or ():
+        if name == b"x-forwarded-for":
+            if proxy_hops <= 0:
+                return None
+            hops = [hop.strip() for hop in value.decode("latin-1").split(",") if hop.strip()]
+            if len(hops) >= proxy_hops:
+                return hops[-proxy_hops]
+            break
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+def token_userid(scope: dict) -> Optional[str]:
+    """User id from a valid bearer token, without touching the database"""
+    for name, value in scope.get("headers") or ():
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                return str(jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub") or "") or None
+            except JWTError:
+                return None
+    return None
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware protecting the workers:
+    - load shedding: once max_in_flight requests are being handled, new ones
+      get 503 with Retry-After instead of queueing behind them
+    - per-endpoint concurrency caps (RouteRule.concurrency), answered the same way
+    - token buckets per IP, per user and per route for the rules' endpoints,
+      answered with 429 and the seconds to wait in Retry-After
+    WebSockets and CORS preflights pass straight through.
+    """
+
+    def __init__(self, app, rules: Optional[List[RouteRule]] = None, max_in_flight: Optional[int] = None, buckets=None, proxy_hops: Optional[int] = None):
+        self.app = app
+        self.rules = RATE_LIMIT_RULES if rules is None else rules
+        self.max_in_flight = settings.max_in_flight if max_in_flight is None else max_in_flight
+        self.buckets = buckets if buckets is not None else create_buckets()
+        self.proxy_hops = settings.trusted_proxy_hops if proxy_hops is None else proxy_hops
+        self.in_flight = 0
+        self._warned_proxy = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        if self.in_flight >= self.max_in_flight:
+            await self._reject(scope, receive, send, 503, "Server is busy, please retry shortly", SHED_RETRY_AFTER)
+            return
+        rule = next((rule for rule in self.rules if rule.matches(scope["method"], scope["path"])), None)
+        if rule is not None:
+            if rule.concurrency is not None and rule.in_flight >= rule.concurrency:
+                await self._reject(scope, receive, send, 503, "Too many of these requests in progress, please retry shortly", SHED_RETRY_AFTER)
+                return
+            if rule.limits:
+                # Redis round trips are blocking socket calls; keep them off the event loop
+                wait = await run_in_threadpool(self._take, rule, scope) if self.buckets.shared else self._take(rule, scope)
+                if wait > 0:
+                    await self._reject(scope, receive, send, 429, "Too many requests, please slow down", math.ceil(wait))
+                    return
+            rule.in_flight += 1
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            if rule is not None:
+                rule.in_flight -= 1
+
+    def _take(self, rule: RouteRule, scope: dict) -> float:
+        """
+        Take a token from each of the rule's buckets, narrowest first (user,
+        ip, route), stopping at the first empty one: a single flooding client
+        then drains only its own bucket, not the route's. Returns the wait, or 0.
+        """
+        ip = client_ip(scope, self.proxy_hops)
+        if ip is None and not self._warned_proxy:
+            self._warned_proxy = True
+            print("Warning: requests arrive through a proxy but TRUSTED_PROXY_HOPS is 0; per-IP rate limits are off")
+        for limit in sorted(rule.limits, key=lambda limit: SCOPE_ORDER[limit.scope]):
+            if limit.scope == "route":
+                key = f"{rule.name}:route"
+            elif limit.scope == "user":
+                userid = token_userid(scope)
+                if userid:
+                    key = f"{rule.name}:user:{userid}"
+                elif ip is not None:
+                    # Anonymous callers are limited by address instead
+                    key = f"{rule.name}:anon:{ip}"
+                else:
+                    continue
+            elif ip is not None:
+                key = f"{rule.name}:ip:{ip}"
+            else:
+                # Every client would share the proxy's bucket; the route bucket still applies
+                continue
+            wait = self.buckets.take(key, limit)
+            if wait > 0:
+                return wait
+        return 0.0
+
+    @staticmethod
+    async def _reject(scope, receive, send, status_code: int, detail: str, retry_after: int) -> None:
+        response = DefaultResponse({"detail": detail}, status_code=status_code, headers={"Retry-After": str(retry_after)})
+        await response(scope, receive, send)
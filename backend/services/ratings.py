@@ -0,0 +1,209 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from database import dialect_insert
+import models
+
+INITIAL_RATING = 1500.0
+# Points at stake per match before the goal-margin multiplier
+K_FACTOR = 20.0
+# Rating points the home side is treated as being worth on top of its rating
+HOME_ADVANTAGE = 100.0
+# Rows per INSERT when a replay writes the rating history back
+REPLAY_INSERT_BATCH = 5000
+
+def margin_multiplier(goal_difference):
+    """Bigger wins move ratings more: x1 up to one goal, x1.5 for two, (11 + n) / 8 beyond (works on scalars and arrays)"""
+    margin = np.abs(goal_difference)
+    return np.where(margin <= 1, 1.0, np.where(margin == 2, 1.5, (11.0 + margin) / 8.0))
+
+def elo_delta(home_rating, away_rating, home_score, away_score):
+    """
+    Rating points the home team gains (the away team loses the same amount).
+    Works element-wise on NumPy arrays as well as on single values.
+    """
+    expected = 1.0 / (1.0 + 10.0 ** ((away_rating - home_rating - HOME_ADVANTAGE) / 400.0))
+    actual = np.where(home_score > away_score, 1.0, np.where(home_score == away_score, 0.5, 0.0))
+    return K_FACTOR * margin_multiplier(home_score - away_score) * (actual - expected)
+
+def _rated_teams(match: Optional[models.Match]) -> Optional[Tuple[int, int]]:
+    if match is None or match.hometeamid is None or match.awayteamid is None or match.hometeamid == match.awayteamid:
+        return None
+    return match.hometeamid, match.awayteamid
+
+def apply_result_rating(db: Session, match: models.Match, result: models.MatchResult) -> Optional[float]:
+    """
+    Move both teams' ratings for a new result and record the change against
+    the result so it can be taken back. Touches the two team rows and one
+    history row whatever the size of the history; the rows are locked in team
+    id order. The result must have been flushed (it needs its id). Does not
+    commit; returns the home team's gain, or None if the match has no two teams.
+    """
+    teams = _rated_teams(match)
+    if teams is None:
+        return None
+    table = models.TeamRating.__table__
+    insert_stmt = dialect_insert(db)
+    db.execute(
+        insert_stmt(table).values([{"teamid": teamid, "rating": INITIAL_RATING, "matchesplayed": 0} for teamid in sorted(teams)])
+        .on_conflict_do_nothing(index_elements=[table.c.teamid])
+    )
+    ratings = {
+        row.teamid: row.rating
+        for row in db.query(models.TeamRating.teamid, models.TeamRating.rating).filter(
+            models.TeamRating.teamid.in_(teams)
+        ).order_by(models.TeamRating.teamid).with_for_update().all()
+    }
+    home, away = teams
+    delta = float(elo_delta(ratings[home], ratings[away], result.homescore, result.awayscore))
+    _shift_ratings(db, home, away, delta, 1)
+    db.add(models.RatingChange(resultid=result.resultid, matchid=match.matchid, hometeamid=home, awayteamid=away, delta=delta))
+    return delta
+
+def revert_result_rating(db: Session, resultid: int) -> bool:
+    """
+    Take a result's rating change back out, e.g. before the result is deleted.
+    Does not commit; returns False if the result never moved any ratings.
+    """
+    change = db.query(models.RatingChange).filter(models.RatingChange.resultid == resultid).with_for_update().first()
+    if change is None:
+        return False
+    _shift_ratings(db, change.hometeamid, change.awayteamid, -change.delta, -1)
+    db.delete(change)
+    db.flush()
+    return True
+
+def revert_ratings(db: Session, *criteria) -> List[int]:
+    """
+    Take back every recorded change matching the RatingChange criteria, e.g.
+    all of a tournament's results before it is deleted (its results then go
+    by ON DELETE CASCADE without passing through revert_result_rating). Each
+    team's shifts are summed and applied in one update. Does not commit;
+    returns the ids of the teams whose ratings moved.
+    """
+    changes = db.query(models.RatingChange).filter(*criteria).with_for_update().all()
+    shifts: Dict[int, Tuple[float, int]] = {}
+    for change in changes:
+        for teamid, delta in ((change.hometeamid, change.delta), (change.awayteamid, -change.delta)):
+            total, matches = shifts.get(teamid, (0.0, 0))
+            shifts[teamid] = (total + delta, matches + 1)
+    for teamid, (total, matches) in sorted(shifts.items()):
+        db.query(models.TeamRating).filter(models.TeamRating.teamid == teamid).update({
+            models.TeamRating.rating: models.TeamRating.rating - total,
+            models.TeamRating.matchesplayed: models.TeamRating.matchesplayed - matches,
+        }, synchronize_session=False)
+    for change in changes:
+        db.delete(change)
+    db.flush()
+    return sorted(shifts)
+
+def update_result_rating(db: Session, match: models.Match, result: models.MatchResult) -> Optional[float]:
+    """
+    Re-rate a corrected result: its old change is taken back and the new score
+    is rated against the teams' current ratings. Later results keep their
+    recorded changes; replay_ratings() recomputes the exact history.
+    """
+    revert_result_rating(db, result.resultid)
+    return apply_result_rating(db, match, result)
+
+def _shift_ratings(db: Session, home: int, away: int, delta: float, matches: int) -> None:
+    # rating = rating + delta in the database so concurrent results add up
+    for teamid, change in sorted(((home, delta), (away, -delta))):
+        db.query(models.TeamRating).filter(models.TeamRating.teamid == teamid).update({
+            models.TeamRating.rating: models.TeamRating.rating + change,
+            models.TeamRating.matchesplayed: models.TeamRating.matchesplayed + matches,
+        }, synchronize_session=False)
+
+def compute_ratings(
+    home: np.ndarray,
+    away: np.ndarray,
+    home_score: np.ndarray,
+    away_score: np.ndarray,
+    team_count: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Replay results in the given (chronological) order. home/away are team
+    indexes in [0, team_count). Returns (per-result home gain, final ratings).
+
+    Elo is sequential per team, but two results that share no team don't
+    depend on each other. Every result is put in the earliest "wave" after the
+    previous results of both its teams, so a wave never contains a team twice
+    and each wave is rated in one vectorized step. The outcome is identical to
+    rating the results one at a time; the number of waves is roughly the most
+    matches any one team played, not the number of results.
+    """
+    count = len(home)
+    wave = np.empty(count, dtype=np.int64)
+    last = [-1] * team_count
+    for i, (h, a) in enumerate(zip(home.tolist(), away.tolist())):
+        w = max(last[h], last[a]) + 1
+        wave[i] = w
+        last[h] = last[a] = w
+
+    ratings = np.full(team_count, INITIAL_RATING)
+    deltas = np.zeros(count)
+    order = np.argsort(wave, kind="stable")
+    bounds = np.searchsorted(wave[order], np.arange(wave.max() + 2)) if count else [0]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        idx = order[start:end]
+        h, a = home[idx], away[idx]
+        delta = elo_delta(ratings[h], ratings[a], home_score[idx], away_score[idx])
+        ratings[h] += delta
+        ratings[a] -= delta
+        deltas[idx] = delta
+    return deltas, ratings
+
+def replay_ratings(db: Session) -> int:
+    """
+    Rebuild every rating and the whole rating history from all results in
+    match date order. Does not commit; returns the number of results rated.
+    """
+    rows = db.query(
+        models.MatchResult.resultid,
+        models.MatchResult.matchid,
+        models.MatchResult.homescore,
+        models.MatchResult.awayscore,
+        models.Match.hometeamid,
+        models.Match.awayteamid,
+    ).join(
+        models.Match, models.Match.matchid == models.MatchResult.matchid
+    ).filter(
+        models.Match.hometeamid.isnot(None),
+        models.Match.awayteamid.isnot(None),
+        models.Match.hometeamid != models.Match.awayteamid,
+    ).order_by(models.Match.matchdate, models.Match.matchid, models.MatchResult.resultid).all()
+
+    teamids = sorted({row.hometeamid for row in rows} | {row.awayteamid for row in rows})
+    index = {teamid: i for i, teamid in enumerate(teamids)}
+    home = np.array([index[row.hometeamid] for row in rows], dtype=np.int64)
+    away = np.array([index[row.awayteamid] for row in rows], dtype=np.int64)
+    home_score = np.array([row.homescore for row in rows], dtype=float)
+    away_score = np.array([row.awayscore for row in rows], dtype=float)
+    deltas, ratings = compute_ratings(home, away, home_score, away_score, len(teamids))
+    played = np.bincount(np.concatenate([home, away]), minlength=len(teamids))
+
+    db.query(models.RatingChange).delete(synchronize_session=False)
+    db.query(models.TeamRating).delete(synchronize_session=False)
+    if teamids:
+        db.execute(insert(models.TeamRating.__table__), [
+            {"teamid": teamid, "rating": float(ratings[i]), "matchesplayed": int(played[i])}
+            for i, teamid in enumerate(teamids)
+        ])
+    changes = [
+        {"resultid": row.resultid, "matchid": row.matchid, "hometeamid": row.hometeamid, "awayteamid": row.awayteamid, "delta": float(delta)}
+        for row, delta in zip(rows, deltas.tolist())
+    ]
+    for start in range(0, len(changes), REPLAY_INSERT_BATCH):
+        db.execute(insert(models.RatingChange.__table__), changes[start:start + REPLAY_INSERT_BATCH])
+    return len(rows)
+
+def team_ratings(db: Session, teamids: Iterable[int]) -> Dict[int, float]:
+    """Current rating of each given team that has one"""
+    ids = list(teamids)
+    if not ids:
+        return {}
+    return {
+        row.teamid: row.rating
+        for row in db.query(models.TeamRating.teamid, models.TeamRating.rating).filter(models.TeamRating.teamid.in_(ids)).all()
+    }
@@ -0,0 +1,302 @@
+import asyncio
+import threading
+import time
+import traceback
+import uuid
+import zlib
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_, text
+from sqlalchemy.orm import Session
+import models
+from database import SessionLocal, dialect_insert, engine
+
+# Seconds between checks for due jobs
+JOB_POLL_INTERVAL = 30.0
+# Pause between two chunks of a run, so a long job never holds the database for long
+JOB_CHUNK_PAUSE = 0.05
+# How long a lease (databases without advisory locks) lasts without being renewed; renewed every chunk
+JOB_LEASE = timedelta(minutes=5)
+# A failed run is retried (from where it stopped) after this long, or at its next scheduled time if sooner
+JOB_RETRY_DELAY = timedelta(minutes=10)
+
+# step(db, cursor, size) -> (rows processed, cursor to continue from or None when the run is complete)
+JobStep = Callable[[Session, Optional[str], int], Tuple[int, Optional[str]]]
+
+class CronSchedule:
+    """
+    A five-field cron expression (minute hour day-of-month month day-of-week,
+    Sunday = 0), evaluated in UTC. Fields take *, numbers, ranges (a-b), steps
+    (*/n, a-b/n) and comma-separated lists. As in cron, when both day fields
+    are restricted a day matching either one is due.
+    """
+
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(part, low, high) for part, (low, high) in zip(parts, self.FIELDS)
+        )
+        self.any_day = parts[2] == "*"
+        self.any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for item in field.split(","):
+            spec, _, step = item.partition("/")
+            if spec == "*":
+                start, end = low, high
+            elif "-" in spec:
+                start, end = (int(value) for value in spec.split("-", 1))
+            else:
+                start = end = int(spec)
+                if step:
+                    end = high
+            if start < low or end > high or start > end:
+                raise ValueError(f"Cron field {field!r} is outside {low}-{high}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def _day_matches(self, day: datetime) -> bool:
+        in_days = day.day in self.days
+        # Python's Monday = 0; cron's Sunday = 0
+        in_weekdays = (day.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def next_after(self, after: datetime) -> datetime:
+        """The first due minute strictly after `after`"""
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 4)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression {self.expression!r} never matches")
+
+class Job:
+    """
+    A periodic maintenance job. A run calls step repeatedly, each chunk of at
+    most chunk_size rows in its own short transaction, until step returns a
+    None cursor. The cursor is saved with every chunk, so a run interrupted
+    by a restart or an error resumes where it stopped instead of starting
+    over; steps must therefore be safe to repeat for the last chunk.
+    """
+
+    def __init__(self, name: str, schedule: str, step: JobStep, chunk_size: int = 500, description: str = ""):
+        self.name = name
+        self.schedule = CronSchedule(schedule)
+        self.step = step
+        self.chunk_size = chunk_size
+        self.description = description
+        # Advisory lock key, stable across processes
+        self.lock_key = zlib.crc32(f"league-job:{name}".encode())
+
+class JobScheduler:
+    """
+    Runs registered jobs on their cron schedules from inside the app. Every
+    worker runs a scheduler; for each due job, only the worker that takes the
+    job's lock runs it (pg_try_advisory_lock on PostgreSQL, a lease on the
+    jobstate row elsewhere), and the others skip it. When and where each job
+    last ran, with its row counts, durations and errors, is kept in jobstate.
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.jobs: Dict[str, Job] = {}
+        self._stopping = threading.Event()
+
+    def register(self, job: Job) -> Job:
+        self.jobs[job.name] = job
+        return job
+
+    def stop(self) -> None:
+        """Stop after the current chunk; an unfinished run resumes from its cursor on the next start"""
+        self._stopping.set()
+
+    def ensure_states(self, db: Session) -> None:
+        """Create the jobstate row of each registered job that has none, due at its next scheduled time"""
+        now = datetime.utcnow()
+        table = models.JobState.__table__
+        stmt = dialect_insert(db)(table).values([
+            {"name": job.name, "nextrunat": job.schedule.next_after(now), "runs": 0, "failures": 0, "chunks": 0, "rows": 0}
+            for job in self.jobs.values()
+        ]).on_conflict_do_nothing(index_elements=[table.c.name])
+        db.execute(stmt)
+        db.commit()
+
+    def request_run(self, db: Session, name: str) -> bool:
+        """Make a job due now (it runs at the next poll on whichever worker gets it); False if it doesn't exist"""
+        updated = db.query(models.JobState).filter(models.JobState.name == name).update(
+            {"nextrunat": datetime.utcnow()}, synchronize_session=False
+        )
+        db.commit()
+        return bool(updated)
+
+    def run_due(self) -> List[str]:
+        """Run every due job this worker can lock, one after another; returns the names of the jobs run"""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            due = [
+                row.name for row in db.query(models.JobState.name).filter(
+                    models.JobState.name.in_(list(self.jobs)),
+                    models.JobState.nextrunat <= now,
+                ).all()
+            ]
+        finally:
+            db.close()
+        ran = []
+        for name in due:
+            if self._stopping.is_set():
+                break
+            if self.run(self.jobs[name]):
+                ran.append(name)
+        return ran
+
+    def run(self, job: Job, force: bool = False) -> bool:
+        """
+        Run (or resume) one job if its lock is free and it is still due once
+        locked; force runs it even if it isn't due. Returns whether it ran.
+        """
+        release = self._lock(job)
+        if release is None:
+            return False
+        db = SessionLocal()
+        try:
+            state = db.query(models.JobState).filter(models.JobState.name == job.name).first()
+            now = datetime.utcnow()
+            # Another worker may have finished this run between our poll and the lock
+            if state is None or not (force or state.nextrunat <= now):
+                return False
+            self._execute(db, job, state)
+            return True
+        finally:
+            db.close()
+            release()
+
+    def _execute(self, db: Session, job: Job, state: models.JobState) -> None:
+        started = time.perf_counter()
+        state.laststartedat = datetime.utcnow()
+        # An unfinished run stays due (a forced one too), so it resumes after a restart;
+        # a failed one waits until the retry time set below
+        state.nextrunat = min(state.nextrunat, state.laststartedat)
+        db.commit()
+        cursor, rows = state.cursor, 0
+        try:
+            while not self._stopping.is_set():
+                count, cursor = job.step(db, cursor, job.chunk_size)
+                rows += count
+                # The chunk's changes and the resume point commit together
+                state.cursor = cursor
+                state.chunks += 1
+                state.rows += count
+                if state.lockedby == self.id:
+                    state.lockeduntil = datetime.utcnow() + JOB_LEASE
+                db.commit()
+                if cursor is None:
+                    break
+                time.sleep(JOB_CHUNK_PAUSE)
+        except Exception as e:
+            db.rollback()
+            now = datetime.utcnow()
+            state.failures += 1
+            state.lasterror = "".join(traceback.format_exception_only(type(e), e)).strip()[:2000]
+            state.lasterrorat = now
+            state.nextrunat = min(now + JOB_RETRY_DELAY, job.schedule.next_after(now))
+            db.commit()
+            print(f"Warning: job {job.name} failed after {rows} rows, will resume: {e}")
+            return
+        if cursor is not None:
+            # Stopped for shutdown; the saved cursor makes the run resume on the next start
+            return
+        now = datetime.utcnow()
+        state.runs += 1
+        state.lastfinishedat = now
+        state.lastduration = time.perf_counter() - started
+        state.lastrows = rows
+        state.nextrunat = job.schedule.next_after(now)
+        db.commit()
+        if rows:
+            print(f"Job {job.name}: {rows} rows in {state.lastduration:.2f}s")
+
+    def _lock(self, job: Job) -> Optional[Callable[[], None]]:
+        """Take the job's lock without waiting; returns its release function, or None if another worker holds it"""
+        if engine.dialect.name == "postgresql":
+            # Session-level advisory lock on a connection held for the run; dies with the connection
+            connection = engine.connect()
+            try:
+                locked = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": job.lock_key}).scalar()
+                connection.commit()
+            except Exception:
+                connection.close()
+                raise
+            if not locked:
+                connection.close()
+                return None
+
+            def release() -> None:
+                try:
+                    connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": job.lock_key})
+                    connection.commit()
+                finally:
+                    connection.close()
+            return release
+
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            taken = db.query(models.JobState).filter(
+                models.JobState.name == job.name,
+                or_(models.JobState.lockedby.is_(None), models.JobState.lockeduntil < now),
+            ).update({"lockedby": self.id, "lockeduntil": now + JOB_LEASE}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        if not taken:
+            return None
+
+        def release() -> None:
+            db = SessionLocal()
+            try:
+                db.query(models.JobState).filter(
+                    models.JobState.name == job.name, models.JobState.lockedby == self.id
+                ).update({"lockedby": None, "lockeduntil": None}, synchronize_session=False)
+                db.commit()
+            finally:
+                db.close()
+        return release
+
+    async def run_forever(self) -> None:
+        """Background task: run due jobs every JOB_POLL_INTERVAL seconds until cancelled"""
+        self._stopping.clear()
+        db = SessionLocal()
+        try:
+            await run_in_threadpool(self.ensure_states, db)
+        except Exception as e:
+            print(f"Warning: could not register jobs: {e}")
+        finally:
+            db.close()
+        while True:
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+            try:
+                await run_in_threadpool(self.run_due)
+            except Exception as e:
+                print(f"Warning: job scheduler poll failed: {e}")
+
+# Shared scheduler for the process; jobs are registered in services/jobs.py
+scheduler = JobScheduler()
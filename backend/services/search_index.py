@@ -0,0 +1,233 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+import models
+from services.text_search import tokenize
+from services.broker import broker
+
+DocKey = Tuple[str, int]
+
+EXACT_SCORE = 2.0
+PREFIX_SCORE = 1.0
+# Cap on completions expanded per prefix so one-letter queries stay cheap
+MAX_COMPLETIONS = 64
+
+class PrefixTrie:
+    """Character trie over index terms; the "" key marks the end of a term"""
+
+    def __init__(self):
+        self.root: Dict[str, dict] = {}
+
+    def insert(self, term: str) -> None:
+        node = self.root
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def remove(self, term: str) -> None:
+        # Walk down remembering the path, then prune empty branches bottom-up
+        path = []
+        node = self.root
+        for ch in term:
+            child = node.get(ch)
+            if child is None:
+                return
+            path.append((node, ch))
+            node = child
+        node.pop("", None)
+        for parent, ch in reversed(path):
+            if parent[ch]:
+                break
+            del parent[ch]
+
+    def complete(self, prefix: str, limit: int = MAX_COMPLETIONS) -> List[str]:
+        """Terms starting with prefix, shortest first, at most limit of them"""
+        node = self.root
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return []
+        terms: List[str] = []
+        # Breadth-first so the closest completions are found before the cap
+        frontier = [(prefix, node)]
+        while frontier and len(terms) < limit:
+            next_frontier = []
+            for text, current in frontier:
+                for ch, child in current.items():
+                    if ch == "":
+                        terms.append(text)
+                        if len(terms) >= limit:
+                            break
+                    else:
+                        next_frontier.append((text + ch, child))
+                if len(terms) >= limit:
+                    break
+            frontier = next_frontier
+        return terms
+
+
+class SearchIndex:
+    """
+    League-wide in-process inverted index over teams, users, tournaments,
+    events and stadiums. Loaded from the database once, then kept current by
+    the create/update/delete handlers calling upsert/remove, so searches never
+    touch the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._docs: Dict[DocKey, Tuple[str, Optional[str], Tuple[str, ...]]] = {}
+        self._postings: Dict[str, Set[DocKey]] = {}
+        self._trie = PrefixTrie()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def ensure_loaded(self, db: Session) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self.load(db)
+
+    def load(self, db: Session) -> None:
+        """(Re)build the whole index from the database: one query per document type"""
+        with self._lock:
+            self._docs.clear()
+            self._postings.clear()
+            self._trie = PrefixTrie()
+            for team in db.query(models.Team.teamid, models.Team.teamname).all():
+                self._add("team", team.teamid, team.teamname, None)
+            for user in db.query(models.User.userid, models.User.firstname, models.User.lastname, models.User.role).filter(models.User.status != "deleted").all():
+                self._add("user", user.userid, user_title(user), user.role)
+            for tournament in db.query(models.Tournament.tournamentid, models.Tournament.name, models.Tournament.seasonyear).all():
+                self._add("tournament", tournament.tournamentid, tournament.name, season_subtitle(tournament.seasonyear))
+            for event in db.query(models.Event.eventid, models.Event.title).all():
+                self._add("event", event.eventid, event.title, None)
+            for stadium in db.query(models.Stadium.stadiumid, models.Stadium.name, models.Stadium.location).all():
+                self._add("stadium", stadium.stadiumid, stadium.name, stadium.location)
+            self._loaded = True
+
+    def upsert(self, kind: str, docid: int, title: Optional[str], subtitle: Optional[str] = None) -> None:
+        """Add or replace a document. A no-op until the index is loaded, since the load will pick it up."""
+        with self._lock:
+            if not self._loaded:
+                return
+            self._remove((kind, docid))
+            self._add(kind, docid, title, subtitle)
+
+    def remove(self, kind: str, docid: int) -> None:
+        with self._lock:
+            if self._loaded:
+                self._remove((kind, docid))
+
+    def _add(self, kind: str, docid: int, title: Optional[str], subtitle: Optional[str]) -> None:
+        terms = tuple(dict.fromkeys(tokenize(title or "")))
+        if not terms:
+            return
+        key = (kind, docid)
+        self._docs[key] = (title, subtitle, terms)
+        for term in terms:
+            keys = self._postings.get(term)
+            if keys is None:
+                keys = self._postings[term] = set()
+                self._trie.insert(term)
+            keys.add(key)
+
+    def _remove(self, key: DocKey) -> None:
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        for term in doc[2]:
+            keys = self._postings.get(term)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._postings[term]
+                self._trie.remove(term)
+
+    def search(self, q: str, kinds: Optional[Iterable[str]] = None, limit: int = 20) -> List[dict]:
+        """
+        Ranked hits for q. Every query token must match a title term exactly or
+        as a prefix; exact matches and shorter completions rank higher.
+        """
+        tokens = tokenize(q)
+        if not tokens:
+            return []
+        allowed = set(kinds) if kinds else None
+        with self._lock:
+            totals: Optional[Dict[DocKey, float]] = None
+            for token in tokens:
+                scores: Dict[DocKey, float] = {}
+                for term in self._trie.complete(token):
+                    score = EXACT_SCORE if term == token else PREFIX_SCORE * len(token) / len(term)
+                    for key in self._postings.get(term, ()):
+                        if score > scores.get(key, 0.0):
+                            scores[key] = score
+                if totals is None:
+                    totals = scores
+                else:
+                    totals = {key: totals[key] + score for key, score in scores.items() if key in totals}
+                if not totals:
+                    return []
+
+            hits = []
+            for (kind, docid), score in totals.items():
+                if allowed is not None and kind not in allowed:
+                    continue
+                title, subtitle, terms = self._docs[(kind, docid)]
+                # Prefer documents whose title is mostly covered by the query
+                score += len(tokens) / (len(terms) + len(tokens))
+                hits.append({"type": kind, "id": docid, "title": title, "subtitle": subtitle, "score": round(score, 4)})
+        hits.sort(key=lambda hit: (-hit["score"], hit["title"] or "", hit["type"], hit["id"]))
+        return hits[:limit]
+
+
+def user_title(user) -> str:
+    return f"{user.firstname or ''} {user.lastname or ''}".strip()
+
+def season_subtitle(seasonyear: Optional[int]) -> Optional[str]:
+    return f"Season {seasonyear}" if seasonyear else None
+
+# Shared index instance for the process
+search_index = SearchIndex()
+
+def _apply_remote(message: dict) -> None:
+    if message["op"] == "remove":
+        search_index.remove(message["kind"], message["id"])
+    else:
+        search_index.upsert(message["kind"], message["id"], message["title"], message.get("subtitle"))
+
+# Other workers' changes are applied to this worker's index too
+broker.subscribe("search", _apply_remote)
+
+# Helpers for the write paths in routers/; each change is also sent to the other workers
+
+def _upsert(kind: str, docid: int, title: Optional[str], subtitle: Optional[str] = None) -> None:
+    search_index.upsert(kind, docid, title, subtitle)
+    broker.publish("search", {"op": "upsert", "kind": kind, "id": docid, "title": title, "subtitle": subtitle})
+
+def unindex(kind: str, docid: int) -> None:
+    search_index.remove(kind, docid)
+    broker.publish("search", {"op": "remove", "kind": kind, "id": docid})
+
+def index_team(team: models.Team) -> None:
+    _upsert("team", team.teamid, team.teamname)
+
+def index_user(user: models.User) -> None:
+    if user.status == "deleted":
+        unindex("user", user.userid)
+    else:
+        _upsert("user", user.userid, user_title(user), user.role)
+
+def index_tournament(tournament: models.Tournament) -> None:
+    _upsert("tournament", tournament.tournamentid, tournament.name, season_subtitle(tournament.seasonyear))
+
+def index_event(event: models.Event) -> None:
+    _upsert("event", event.eventid, event.title)
+
+def index_stadium(stadium: models.Stadium) -> None:
+    _upsert("stadium", stadium.stadiumid, stadium.name, stadium.location)
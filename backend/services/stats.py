@@ -0,0 +1,431 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+from sqlalchemy import case, func, insert as plain_insert, update
+from sqlalchemy.orm import Session, aliased
+from database import dialect_insert
+import models
+from services.group_index import resolve_match_group
+
+STANDINGS_COUNTERS = ("matchesplayed", "wins", "draws", "losses", "goalsfor", "goalsagainst", "points")
+TOURNAMENT_PLAYER_COUNTERS = ("matchesplayed", "goals", "owngoals", "mvpcount", "assists", "yellowcards", "redcards")
+# PlayerStats counters kept as career totals (own goals only exist per tournament)
+CAREER_COUNTERS = ("matchesplayed", "goals", "mvpcount", "assists", "yellowcards", "redcards")
+# Match event types counted straight from the event log; goals and MVP awards are
+# counted from the goal and result rows their events write
+EVENT_COUNTERS = {"assist": "assists", "yellow": "yellowcards", "red": "redcards"}
+
+def ensure_standings(db: Session, group_id: int, team_id: int) -> None:
+    """Create an all-zero standings row for the team unless one already exists (no commit)"""
+    table = models.Standings.__table__
+    insert = dialect_insert(db)
+    stmt = insert(table).values(
+        groupid=group_id, teamid=team_id, **{column: 0 for column in STANDINGS_COUNTERS}
+    ).on_conflict_do_nothing(index_elements=[table.c.groupid, table.c.teamid])
+    db.execute(stmt)
+
+def apply_result_to_standings(db: Session, match: models.Match, home_score: int, away_score: int) -> Optional[int]:
+    """
+    Add a result to both teams' standings with a single
+    INSERT ... ON CONFLICT (groupid, teamid) DO UPDATE SET col = col + excluded.col.
+    The database does the arithmetic on the locked rows, so concurrent results
+    for the same group can't overwrite each other. Rows are written in team id
+    order to keep lock order consistent. Does not commit; returns the group id
+    that was updated, or None if the teams don't share a group. Knockout
+    matches never count towards group standings.
+    """
+    if match.round not in (None, "Group"):
+        return None
+    group_id = resolve_match_group(db, match)
+    if group_id is None:
+        return None
+
+    def deltas(team_id: int, scored: int, conceded: int) -> dict:
+        won, drew = scored > conceded, scored == conceded
+        return {
+            "groupid": group_id,
+            "teamid": team_id,
+            "matchesplayed": 1,
+            "wins": int(won),
+            "draws": int(drew),
+            "losses": int(scored < conceded),
+            "goalsfor": scored,
+            "goalsagainst": conceded,
+            "points": 3 if won else 1 if drew else 0,
+        }
+
+    rows = sorted(
+        [deltas(match.hometeamid, home_score, away_score), deltas(match.awayteamid, away_score, home_score)],
+        key=lambda row: row["teamid"],
+    )
+    table = models.Standings.__table__
+    insert = dialect_insert(db)
+    stmt = insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.groupid, table.c.teamid],
+        set_={column: table.c[column] + stmt.excluded[column] for column in STANDINGS_COUNTERS},
+    )
+    db.execute(stmt)
+    return group_id
+
+def apply_player_goals(db: Session, goals: Iterable, subtract: bool = False, tournamentid: Optional[int] = None) -> None:
+    """
+    Add (or with subtract, remove) goals to the scorers' career totals and to
+    their counters for the match's tournament. goals are objects with playerid
+    and isowngoal; own goals are counted separately and not in a player's
+    goal tally. Does not commit.
+    """
+    changes: Dict[int, Dict[str, int]] = {}
+    for goal in goals:
+        counter = changes.setdefault(goal.playerid, {})
+        column = "owngoals" if goal.isowngoal else "goals"
+        counter[column] = counter.get(column, 0) + 1
+    apply_player_changes(db, tournamentid, changes, subtract=subtract)
+
+def apply_mvp_award(db: Session, tournamentid: Optional[int], playerid: Optional[int], subtract: bool = False) -> None:
+    """Count (or take back) a match MVP award for the player (no commit)"""
+    if playerid is not None:
+        apply_player_changes(db, tournamentid, {playerid: {"mvpcount": 1}}, subtract=subtract)
+
+def apply_match_appearances(db: Session, match: models.Match) -> None:
+    """
+    Credit everyone on the two teams' rosters with an appearance when the
+    match's result is recorded. The appearances are stored, so deleting the
+    result later takes back exactly these, whatever the rosters are by then.
+    Does not commit.
+    """
+    teamids = [teamid for teamid in (match.hometeamid, match.awayteamid) if teamid is not None]
+    if not teamids:
+        return
+    roster = db.query(models.Player.playerid, models.Player.teamid).filter(
+        models.Player.teamid.in_(teamids)
+    ).order_by(models.Player.playerid).all()
+    if not roster:
+        return
+    table = models.MatchAppearance.__table__
+    insert = dialect_insert(db)
+    stmt = insert(table).values([
+        {"matchid": match.matchid, "playerid": row.playerid, "teamid": row.teamid} for row in roster
+    ]).on_conflict_do_nothing(index_elements=[table.c.matchid, table.c.playerid]).returning(table.c.playerid, table.c.teamid)
+    added = db.execute(stmt).all()
+    apply_player_changes(db, match.tournamentid, {row.playerid: {"matchesplayed": 1, "teamid": row.teamid} for row in added})
+
+def remove_match_appearances(db: Session, match: models.Match) -> None:
+    """Take back the appearances credited for a match whose result is deleted (no commit)"""
+    rows = db.query(models.MatchAppearance.playerid).filter(models.MatchAppearance.matchid == match.matchid).all()
+    apply_player_changes(db, match.tournamentid, {row.playerid: {"matchesplayed": 1} for row in rows}, subtract=True)
+    db.query(models.MatchAppearance).filter(models.MatchAppearance.matchid == match.matchid).delete(synchronize_session=False)
+
+def apply_player_changes(db: Session, tournamentid: Optional[int], changes: Dict[int, Dict[str, int]], subtract: bool = False) -> None:
+    """Apply counter changes, {playerid: {counter: n}}, to the tournament counters and the career totals (no commit)"""
+    apply_tournament_player_stats(db, tournamentid, changes, subtract=subtract)
+    apply_career_stats(db, changes, subtract=subtract)
+
+def _counter_update(table, change: Dict[str, int], subtract: bool) -> dict:
+    # col = col + n, or for subtract col = col - n but never below zero
+    if subtract:
+        return {table.c[column]: case((table.c[column] > count, table.c[column] - count), else_=0) for column, count in change}
+    return {table.c[column]: table.c[column] + count for column, count in change}
+
+def _grouped_changes(changes: Dict[int, Dict[str, int]], counters: Iterable[str]) -> Dict[tuple, list]:
+    """Players grouped by identical changes, so e.g. a whole roster's appearance is one UPDATE ... WHERE id IN (...)"""
+    groups = defaultdict(list)
+    for playerid in sorted(changes):
+        change = tuple((column, changes[playerid][column]) for column in counters if changes[playerid].get(column))
+        if change:
+            groups[change].append(playerid)
+    return groups
+
+def player_stats_ids(db: Session, playerids: Iterable[int], create: bool = True) -> Dict[int, int]:
+    """
+    PlayerStats id of each player. The players are locked (SELECT ... FOR
+    UPDATE) in id order; with create, missing stats rows are added in one bulk
+    insert. Does not commit.
+    """
+    players = db.query(models.Player).filter(
+        models.Player.playerid.in_(list(playerids))
+    ).order_by(models.Player.playerid).with_for_update().all()
+    missing = [player for player in players if player.statsid is None]
+    if create and missing:
+        table = models.PlayerStats.__table__
+        statsids = db.execute(
+            plain_insert(table).returning(table.c.statsid, sort_by_parameter_order=True),
+            [{"matchesplayed": 0, "goals": 0, "assists": 0, "yellowcards": 0, "redcards": 0, "mvpcount": 0, "ratingaverage": 0} for _ in missing],
+        ).scalars().all()
+        for player, statsid in zip(missing, statsids):
+            player.statsid = statsid
+        db.flush()
+    return {player.playerid: player.statsid for player in players if player.statsid is not None}
+
+def apply_career_stats(db: Session, changes: Dict[int, Dict[str, int]], subtract: bool = False) -> None:
+    """
+    Add (or with subtract, remove) counter changes to the players' career
+    totals in PlayerStats, creating missing stats rows when adding. The
+    database does the arithmetic, with one UPDATE per distinct change.
+    Does not commit.
+    """
+    groups = _grouped_changes(changes, CAREER_COUNTERS)
+    if not groups:
+        return
+    statsids = player_stats_ids(db, {playerid for playerids in groups.values() for playerid in playerids}, create=not subtract)
+    table = models.PlayerStats.__table__
+    for change, playerids in groups.items():
+        ids = [statsids[playerid] for playerid in playerids if playerid in statsids]
+        if ids:
+            db.execute(update(table).where(table.c.statsid.in_(ids)).values(_counter_update(table, change, subtract)))
+
+def apply_tournament_player_stats(db: Session, tournamentid: Optional[int], changes: Dict[int, Dict[str, int]], subtract: bool = False) -> None:
+    """
+    Add (or with subtract, remove) counter changes, {playerid: {counter: n}},
+    to the tournament's player aggregate. A change may also carry the
+    player's "teamid" for the tournament. Adding is one multi-row
+    INSERT ... ON CONFLICT DO UPDATE SET col = col + excluded.col; removing
+    updates the existing rows and never goes below zero. Rows are written in
+    player id order. Does nothing for matches outside a tournament; does not
+    commit.
+    """
+    if tournamentid is None or not changes:
+        return
+    table = models.TournamentPlayerStats.__table__
+    if not subtract:
+        rows = [
+            {
+                "tournamentid": tournamentid,
+                "playerid": playerid,
+                "teamid": changes[playerid].get("teamid"),
+                **{column: changes[playerid].get(column, 0) for column in TOURNAMENT_PLAYER_COUNTERS},
+            }
+            for playerid in sorted(changes)
+        ]
+        insert = dialect_insert(db)
+        stmt = insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.tournamentid, table.c.playerid],
+            set_={
+                "teamid": func.coalesce(stmt.excluded.teamid, table.c.teamid),
+                **{column: table.c[column] + stmt.excluded[column] for column in TOURNAMENT_PLAYER_COUNTERS},
+            },
+        )
+        db.execute(stmt)
+        return
+    for change, playerids in _grouped_changes(changes, TOURNAMENT_PLAYER_COUNTERS).items():
+        db.execute(update(table).where(
+            table.c.tournamentid == tournamentid,
+            table.c.playerid.in_(playerids),
+        ).values(_counter_update(table, change, subtract=True)))
+
+def tournament_leaderboard(db: Session, tournamentid: int, counter: str, limit: int) -> list:
+    """
+    Top `limit` players of a tournament by one counter ("goals", "owngoals" or
+    "mvpcount"), with names and the team they played for in the tournament
+    (their current team if they never appeared). Reads the counter's
+    (tournamentid, counter, playerid) index backwards, so only `limit` rows are
+    touched whatever the number of goals; ties are listed newest player first.
+    """
+    column = models.TournamentPlayerStats.__table__.c[counter]
+    teamid = func.coalesce(models.TournamentPlayerStats.teamid, models.Player.teamid)
+    return db.query(
+        models.TournamentPlayerStats.playerid,
+        models.User.firstname,
+        models.User.lastname,
+        teamid.label("teamid"),
+        models.Team.teamname,
+        column.label(counter),
+    ).join(
+        models.Player, models.Player.playerid == models.TournamentPlayerStats.playerid
+    ).outerjoin(
+        models.User, models.User.userid == models.Player.userid
+    ).outerjoin(
+        models.Team, models.Team.teamid == teamid
+    ).filter(
+        models.TournamentPlayerStats.tournamentid == tournamentid,
+        column > 0,
+    ).order_by(column.desc(), models.TournamentPlayerStats.playerid.desc()).limit(limit).all()
+
+def player_tournament_stats(db: Session, playerid: int) -> list:
+    """A player's counters in every tournament they have any in, newest season first (a range read of the player's index)"""
+    return db.query(
+        models.TournamentPlayerStats.tournamentid,
+        models.Tournament.name.label("tournamentname"),
+        models.Tournament.seasonyear,
+        models.TournamentPlayerStats.teamid,
+        models.Team.teamname,
+        models.TournamentPlayerStats.matchesplayed,
+        models.TournamentPlayerStats.goals,
+        models.TournamentPlayerStats.owngoals,
+        models.TournamentPlayerStats.mvpcount,
+        models.TournamentPlayerStats.assists,
+        models.TournamentPlayerStats.yellowcards,
+        models.TournamentPlayerStats.redcards,
+    ).join(
+        models.Tournament, models.Tournament.tournamentid == models.TournamentPlayerStats.tournamentid
+    ).outerjoin(
+        models.Team, models.Team.teamid == models.TournamentPlayerStats.teamid
+    ).filter(
+        models.TournamentPlayerStats.playerid == playerid
+    ).order_by(
+        models.Tournament.seasonyear.desc(), models.TournamentPlayerStats.tournamentid.desc()
+    ).all()
+
+def counted_events(db: Session, *columns):
+    """Query over the match events that count towards player counters: those of EVENT_COUNTERS' types that were not voided"""
+    void = aliased(models.MatchEvent)
+    return db.query(*columns).filter(
+        models.MatchEvent.eventtype.in_(list(EVENT_COUNTERS)),
+        models.MatchEvent.playerid.isnot(None),
+        ~db.query(void.eventid).filter(void.relatedeventid == models.MatchEvent.eventid).exists(),
+    )
+
+def match_player_changes(db: Session, matchid: int) -> Dict[int, Dict[str, int]]:
+    """Everything one match contributed to its players' counters, {playerid: {counter: n}} (appearances also carry the teamid)"""
+    changes: Dict[int, Dict[str, int]] = {}
+    for appearance in db.query(models.MatchAppearance.playerid, models.MatchAppearance.teamid).filter(models.MatchAppearance.matchid == matchid).all():
+        changes[appearance.playerid] = {"matchesplayed": 1, "teamid": appearance.teamid}
+    for goal in db.query(models.Goal.playerid, models.Goal.isowngoal).filter(models.Goal.matchid == matchid).all():
+        counter = changes.setdefault(goal.playerid, {})
+        column = "owngoals" if goal.isowngoal else "goals"
+        counter[column] = counter.get(column, 0) + 1
+    for result in db.query(models.MatchResult.mvpplayerid).filter(
+        models.MatchResult.matchid == matchid, models.MatchResult.mvpplayerid.isnot(None)
+    ).all():
+        counter = changes.setdefault(result.mvpplayerid, {})
+        counter["mvpcount"] = counter.get("mvpcount", 0) + 1
+    for event in counted_events(db, models.MatchEvent.playerid, models.MatchEvent.eventtype).filter(models.MatchEvent.matchid == matchid).all():
+        counter = changes.setdefault(event.playerid, {})
+        column = EVENT_COUNTERS[event.eventtype]
+        counter[column] = counter.get(column, 0) + 1
+    return changes
+
+def backfill_match_appearances(db: Session, tournamentid: Optional[int] = None) -> int:
+    """
+    Credit appearances for results recorded before appearances were stored,
+    with a single INSERT ... SELECT. History doesn't say who was on a roster
+    back then, so the players currently on each team are used. Matches that
+    already have appearances are left alone. Does not commit; returns the rows
+    added.
+    """
+    appearance = models.MatchAppearance.__table__
+    source = db.query(
+        models.Match.matchid,
+        models.Player.playerid,
+        models.Player.teamid,
+    ).join(
+        models.MatchResult, models.MatchResult.matchid == models.Match.matchid
+    ).join(
+        models.Player, models.Player.teamid.in_([models.Match.hometeamid, models.Match.awayteamid])
+    ).filter(
+        ~db.query(appearance.c.matchid).filter(appearance.c.matchid == models.Match.matchid).exists()
+    ).distinct()
+    if tournamentid is not None:
+        source = source.filter(models.Match.tournamentid == tournamentid)
+    return db.execute(plain_insert(appearance).from_select(["matchid", "playerid", "teamid"], source.statement)).rowcount
+
+def rebuild_tournament_player_stats(db: Session, tournamentid: Optional[int] = None) -> int:
+    """
+    Recount the per-tournament player aggregate from MatchAppearance, Goal,
+    MatchResult and MatchEvent, for one tournament or (tournamentid None) all
+    of them, with four grouped queries and one bulk insert. Does not commit;
+    returns the rows written.
+    """
+    appearances = db.query(
+        models.Match.tournamentid,
+        models.MatchAppearance.playerid,
+        models.MatchAppearance.teamid,
+        func.count().label("matchesplayed"),
+        func.max(models.Match.matchdate).label("lastmatch"),
+    ).join(
+        models.Match, models.Match.matchid == models.MatchAppearance.matchid
+    ).filter(models.Match.tournamentid.isnot(None))
+    goals = db.query(
+        models.Match.tournamentid,
+        models.Goal.playerid,
+        func.sum(case((models.Goal.isowngoal == 0, 1), else_=0)).label("goals"),
+        func.sum(case((models.Goal.isowngoal == 0, 0), else_=1)).label("owngoals"),
+    ).join(
+        models.Match, models.Match.matchid == models.Goal.matchid
+    ).filter(models.Match.tournamentid.isnot(None))
+    mvps = db.query(
+        models.Match.tournamentid,
+        models.MatchResult.mvpplayerid.label("playerid"),
+        func.count().label("mvpcount"),
+    ).join(
+        models.Match, models.Match.matchid == models.MatchResult.matchid
+    ).filter(models.Match.tournamentid.isnot(None), models.MatchResult.mvpplayerid.isnot(None))
+    events = counted_events(
+        db,
+        models.Match.tournamentid,
+        models.MatchEvent.playerid,
+        models.MatchEvent.eventtype,
+        func.count().label("count"),
+    ).join(
+        models.Match, models.Match.matchid == models.MatchEvent.matchid
+    ).filter(models.Match.tournamentid.isnot(None))
+    stale = db.query(models.TournamentPlayerStats)
+    if tournamentid is not None:
+        appearances = appearances.filter(models.Match.tournamentid == tournamentid)
+        goals = goals.filter(models.Match.tournamentid == tournamentid)
+        mvps = mvps.filter(models.Match.tournamentid == tournamentid)
+        events = events.filter(models.Match.tournamentid == tournamentid)
+        stale = stale.filter(models.TournamentPlayerStats.tournamentid == tournamentid)
+
+    rows: Dict[tuple, dict] = {}
+    def row(tid: int, playerid: int) -> dict:
+        return rows.setdefault((tid, playerid), {"tournamentid": tid, "playerid": playerid, "teamid": None, **{column: 0 for column in TOURNAMENT_PLAYER_COUNTERS}})
+    # Ordered by last appearance, so the team a player last played for wins
+    for entry in appearances.group_by(
+        models.Match.tournamentid, models.MatchAppearance.playerid, models.MatchAppearance.teamid
+    ).order_by(func.max(models.Match.matchdate)).all():
+        counters = row(entry.tournamentid, entry.playerid)
+        counters["matchesplayed"] += entry.matchesplayed
+        counters["teamid"] = entry.teamid if entry.teamid is not None else counters["teamid"]
+    for entry in goals.group_by(models.Match.tournamentid, models.Goal.playerid).all():
+        row(entry.tournamentid, entry.playerid).update(goals=entry.goals, owngoals=entry.owngoals)
+    for entry in mvps.group_by(models.Match.tournamentid, models.MatchResult.mvpplayerid).all():
+        row(entry.tournamentid, entry.playerid)["mvpcount"] = entry.mvpcount
+    for entry in events.group_by(models.Match.tournamentid, models.MatchEvent.playerid, models.MatchEvent.eventtype).all():
+        row(entry.tournamentid, entry.playerid)[EVENT_COUNTERS[entry.eventtype]] = entry.count
+
+    stale.delete(synchronize_session=False)
+    if rows:
+        db.execute(plain_insert(models.TournamentPlayerStats.__table__), list(rows.values()))
+    return len(rows)
+
+def rebuild_career_stats(db: Session) -> int:
+    """
+    Recount every player's career totals in PlayerStats (appearances, goals,
+    MVP awards, assists and cards) from all matches, tournament or not, with
+    four grouped queries and one bulk UPDATE. The rating average is left
+    alone. Does not commit; returns the number of players with any totals.
+    """
+    totals: Dict[int, Dict[str, int]] = defaultdict(lambda: {column: 0 for column in CAREER_COUNTERS})
+    for entry in db.query(models.MatchAppearance.playerid, func.count()).group_by(models.MatchAppearance.playerid).all():
+        totals[entry[0]]["matchesplayed"] = entry[1]
+    for entry in db.query(models.Goal.playerid, func.count()).filter(models.Goal.isowngoal == 0).group_by(models.Goal.playerid).all():
+        totals[entry[0]]["goals"] = entry[1]
+    for entry in db.query(models.MatchResult.mvpplayerid, func.count()).filter(
+        models.MatchResult.mvpplayerid.isnot(None)
+    ).group_by(models.MatchResult.mvpplayerid).all():
+        totals[entry[0]]["mvpcount"] = entry[1]
+    for entry in counted_events(db, models.MatchEvent.playerid, models.MatchEvent.eventtype, func.count()).group_by(
+        models.MatchEvent.playerid, models.MatchEvent.eventtype
+    ).all():
+        totals[entry[0]][EVENT_COUNTERS[entry[1]]] = entry[2]
+
+    db.query(models.PlayerStats).update({column: 0 for column in CAREER_COUNTERS}, synchronize_session=False)
+    statsids = player_stats_ids(db, totals)
+    if statsids:
+        db.execute(update(models.PlayerStats), [
+            {"statsid": statsids[playerid], **totals[playerid]} for playerid in sorted(statsids)
+        ])
+    return len(statsids)
+
+def backfill_player_stats(db: Session) -> Dict[str, int]:
+    """
+    Build the per-tournament and career player statistics from history:
+    missing appearances, then every tournament's counters, then career totals.
+    Does not commit.
+    """
+    return {
+        "appearances": backfill_match_appearances(db),
+        "tournament_rows": rebuild_tournament_player_stats(db),
+        "players": rebuild_career_stats(db),
+    }
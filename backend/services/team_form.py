@@ -0,0 +1,160 @@
+from typing import Dict, Optional
+from sqlalchemy import Boolean, case, func, literal, literal_column
+from sqlalchemy.orm import Session, aliased
+import models
+
+def team_results(db: Session, teamid: int, opponentid: Optional[int] = None):
+    """
+    Subquery with one row per decided match of the team, seen from its side
+    (ishome, opponentid, goalsfor, goalsagainst). It is a UNION ALL of the home
+    and away matches rather than one OR filter, so each half can use its
+    (team, matchdate) index.
+    """
+    sides = []
+    for is_home, team_column, opponent_column, scored, conceded in (
+        (True, models.Match.hometeamid, models.Match.awayteamid, models.MatchResult.homescore, models.MatchResult.awayscore),
+        (False, models.Match.awayteamid, models.Match.hometeamid, models.MatchResult.awayscore, models.MatchResult.homescore),
+    ):
+        side = db.query(
+            models.Match.matchid.label("matchid"),
+            models.Match.matchdate.label("matchdate"),
+            models.Match.tournamentid.label("tournamentid"),
+            models.Match.round.label("round"),
+            literal(is_home, Boolean).label("ishome"),
+            opponent_column.label("opponentid"),
+            scored.label("goalsfor"),
+            conceded.label("goalsagainst"),
+        ).join(
+            models.MatchResult, models.MatchResult.matchid == models.Match.matchid
+        ).filter(team_column == teamid)
+        if opponentid is not None:
+            side = side.filter(opponent_column == opponentid)
+        sides.append(side)
+    return sides[0].union_all(sides[1]).subquery("team_results")
+
+def _outcome(results):
+    return case(
+        (results.c.goalsfor > results.c.goalsagainst, "W"),
+        (results.c.goalsfor == results.c.goalsagainst, "D"),
+        else_="L",
+    )
+
+def team_form(db: Session, teamid: int, limit: int = 5) -> Dict:
+    """
+    Last `limit` results, the current streak and the longest runs of a team,
+    in two queries.
+
+    Runs use the gaps-and-islands trick: numbering matches newest first
+    overall and again within each outcome, the difference of the two numbers
+    stays constant along a run of the same outcome. Grouping by it gives every
+    run with its length; the run containing the newest match is the current
+    one. The same is done for unbeaten runs (wins and draws together).
+    """
+    results = team_results(db, teamid)
+    outcome = _outcome(results)
+    unbeaten = case((outcome == "L", 0), else_=1)
+    newest_first = (results.c.matchdate.desc(), results.c.matchid.desc())
+    recency = func.row_number().over(order_by=newest_first)
+    ranked = db.query(
+        results,
+        outcome.label("result"),
+        unbeaten.label("unbeaten"),
+        recency.label("recency"),
+        (recency - func.row_number().over(partition_by=outcome, order_by=newest_first)).label("run"),
+        (recency - func.row_number().over(partition_by=unbeaten, order_by=newest_first)).label("unbeatenrun"),
+    ).subquery("ranked")
+
+    opponent = aliased(models.Team)
+    recent = db.query(
+        ranked.c.matchid,
+        ranked.c.matchdate,
+        ranked.c.tournamentid,
+        ranked.c.round,
+        ranked.c.ishome,
+        ranked.c.opponentid,
+        func.coalesce(opponent.teamname, "TBD").label("opponentname"),
+        ranked.c.goalsfor,
+        ranked.c.goalsagainst,
+        ranked.c.result,
+    ).outerjoin(
+        opponent, opponent.teamid == ranked.c.opponentid
+    ).filter(ranked.c.recency <= limit).order_by(ranked.c.recency).all()
+
+    # Every run of one outcome, and every unbeaten run, in one round trip
+    outcome_runs = db.query(
+        ranked.c.result.label("kind"),
+        func.count().label("length"),
+        func.min(ranked.c.recency).label("newest"),
+    ).group_by(ranked.c.result, ranked.c.run)
+    unbeaten_runs = db.query(
+        literal_column("'U'").label("kind"),
+        func.count().label("length"),
+        func.min(ranked.c.recency).label("newest"),
+    ).filter(ranked.c.unbeaten == 1).group_by(ranked.c.unbeatenrun)
+    runs = outcome_runs.union_all(unbeaten_runs).all()
+
+    longest = {"W": 0, "D": 0, "L": 0, "U": 0}
+    current_streak = None
+    current_unbeaten = 0
+    matches = 0
+    for run in runs:
+        longest[run.kind] = max(longest[run.kind], run.length)
+        if run.kind == "U":
+            if run.newest == 1:
+                current_unbeaten = run.length
+            continue
+        matches += run.length
+        if run.newest == 1:
+            current_streak = {"result": run.kind, "length": run.length}
+
+    return {
+        "teamid": teamid,
+        "matches": matches,
+        "form": "".join(row.result for row in recent),
+        "recent": recent,
+        "current_streak": current_streak,
+        "current_unbeaten_run": current_unbeaten,
+        "longest_win_streak": longest["W"],
+        "longest_unbeaten_run": longest["U"],
+        "longest_losing_streak": longest["L"],
+    }
+
+def head_to_head(db: Session, teamid: int, opponentid: int, limit: int = 10) -> Dict:
+    """
+    Record of teamid against opponentid plus their last `limit` meetings, in
+    one query: the totals are window aggregates over all meetings, computed
+    before the outer query keeps only the newest rows.
+    """
+    results = team_results(db, teamid, opponentid)
+    outcome = _outcome(results)
+    ranked = db.query(
+        results,
+        outcome.label("result"),
+        func.row_number().over(order_by=(results.c.matchdate.desc(), results.c.matchid.desc())).label("recency"),
+        func.count().over().label("played"),
+        func.sum(case((outcome == "W", 1), else_=0)).over().label("wins"),
+        func.sum(case((outcome == "D", 1), else_=0)).over().label("draws"),
+        func.sum(case((outcome == "L", 1), else_=0)).over().label("losses"),
+        func.sum(results.c.goalsfor).over().label("totalgoalsfor"),
+        func.sum(results.c.goalsagainst).over().label("totalgoalsagainst"),
+    ).subquery("ranked")
+    opponent = aliased(models.Team)
+    rows = db.query(
+        ranked,
+        func.coalesce(opponent.teamname, "TBD").label("opponentname"),
+    ).outerjoin(
+        opponent, opponent.teamid == ranked.c.opponentid
+    ).filter(ranked.c.recency <= limit).order_by(ranked.c.recency).all()
+
+    first = rows[0] if rows else None
+    return {
+        "teamid": teamid,
+        "opponentid": opponentid,
+        "played": first.played if first else 0,
+        "wins": first.wins if first else 0,
+        "draws": first.draws if first else 0,
+        "losses": first.losses if first else 0,
+        "goalsfor": first.totalgoalsfor if first else 0,
+        "goalsagainst": first.totalgoalsagainst if first else 0,
+        "meetings": rows,
+    }
@@ -0,0 +1,36 @@
+from typing import Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database import dialect_insert
+import models
+
+def bump_team_versions(db: Session, *teamids) -> None:
+    """
+    Increment the change version of each given team (None ids are ignored).
+    Runs inside the caller's transaction, so the bump commits or rolls back
+    together with the change that caused it. Teams are bumped in id order so
+    concurrent writers always lock rows in the same order.
+    """
+    ids = sorted({tid for tid in teamids if tid is not None})
+    if not ids:
+        return
+    table = models.TeamVersion.__table__
+    insert = dialect_insert(db)
+    stmt = insert(table).values([{"teamid": tid, "version": 1} for tid in ids])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.teamid],
+        set_={"version": table.c.version + 1, "updatedat": func.current_timestamp()},
+    )
+    db.execute(stmt)
+
+def get_team_version(db: Session, teamid: int) -> Optional[int]:
+    """
+    Current change version of a team: 0 if it has never changed, None if the
+    team does not exist. A single primary-key read.
+    """
+    row = db.query(models.TeamVersion.version).select_from(models.Team).outerjoin(
+        models.TeamVersion, models.TeamVersion.teamid == models.Team.teamid
+    ).filter(models.Team.teamid == teamid).first()
+    if row is None:
+        return None
+    return row.version or 0
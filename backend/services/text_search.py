@@ -0,0 +1,26 @@
+import re
+import unicodedata
+from typing import FrozenSet, List
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def normalize(text: str) -> str:
+    """Casefold and strip accents so "José" and "jose" index the same way"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+def tokenize(text: str) -> List[str]:
+    """Split text into normalized word tokens"""
+    return _TOKEN_RE.findall(normalize(text))
+
+def trigrams(token: str) -> FrozenSet[str]:
+    """Trigrams of a single token, padded like pg_trgm (two spaces before, one after)"""
+    padded = f"  {token} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def trigram_similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard similarity of two trigram sets, the same measure as pg_trgm's similarity()"""
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for match results.
+Posts many results for the same group in parallel and checks that the final
+standings and player goal tallies match what was sent (no lost updates).
+Needs a running server and an admin or organizer account (see create_admin_user.py).
+"""
+
+import random
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import combinations
+from typing import Dict, Any
+
+# Configuration
+BASE_URL = "http://localhost:8000/api"
+ADMIN_EMAIL = "admin@zcleague.com"
+ADMIN_PASSWORD = "admin123"
+TEAM_COUNT = 4
+RESULT_COUNT = 60
+WORKERS = 16
+
+def make_request(method: str, endpoint: str, token: str = None, data: Dict[Any, Any] = None) -> requests.Response:
+    """Make an authenticated request to the API"""
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return requests.request(method.upper(), f"{BASE_URL}{endpoint}", headers=headers, json=data)
+
+def expect(response: requests.Response, status: int, what: str) -> Dict[Any, Any]:
+    if response.status_code != status:
+        raise RuntimeError(f"{what} failed: {response.status_code} {response.text}")
+    return response.json() if response.content else {}
+
+def find_scorer(token: str):
+    """Any existing player with a stats row, so goal tallies can be checked too"""
+    for player in make_request("GET", "/players?limit=50", token=token).json():
+        if player.get("statsid"):
+            return player
+    return None
+
+def player_goals(token: str, statsid: int) -> int:
+    return expect(make_request("GET", f"/playerstats/{statsid}", token=token), 200, "Get player stats")["goals"]
+
+def test_concurrent_results():
+    """Post RESULT_COUNT results across WORKERS threads and verify the totals"""
+    print("⚙️  Testing concurrent match result posting")
+    print("=" * 50)
+
+    login = expect(make_request("POST", "/auth/login", data={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD}), 200, "Login")
+    token = login["access_token"]
+
+    # 1. Set up a tournament with one group and TEAM_COUNT teams
+    print("\n1. Creating tournament, group and teams...")
+    suffix = datetime.now().strftime("%H%M%S")
+    tournament = expect(make_request("POST", "/tournaments", token, {"name": f"Stress Cup {suffix}"}), 201, "Create tournament")
+    group = expect(make_request("POST", "/tournament-groups", token, {"tournamentid": tournament["tournamentid"], "groupname": "Stress"}), 201, "Create group")
+    team_ids = []
+    for i in range(TEAM_COUNT):
+        team = expect(make_request("POST", "/teams", token, {"teamname": f"Stress Team {suffix}-{i}"}), 201, "Create team")
+        expect(make_request("POST", "/group-teams", token, {"groupid": group["groupid"], "teamid": team["teamid"]}), 201, "Add team to group")
+        team_ids.append(team["teamid"])
+    print(f"   ✅ Group {group['groupid']} with teams {team_ids}")
+
+    scorer = find_scorer(token)
+    goals_before = player_goals(token, scorer["statsid"]) if scorer else 0
+
+    # 2. Create the matches and the results we are going to post
+    print(f"\n2. Creating {RESULT_COUNT} matches...")
+    pairings = list(combinations(team_ids, 2))
+    start = datetime.now() - timedelta(days=RESULT_COUNT)
+    payloads = []
+    for i in range(RESULT_COUNT):
+        home, away = pairings[i % len(pairings)]
+        match = expect(make_request("POST", "/matches", token, {
+            "tournamentid": tournament["tournamentid"],
+            "hometeamid": home,
+            "awayteamid": away,
+            "matchdate": (start + timedelta(days=i)).isoformat(),
+        }), 201, "Create match")
+        home_score, away_score = random.randint(0, 4), random.randint(0, 4)
+        scorers = [{"playerid": scorer["playerid"], "minute": 10 + n} for n in range(home_score)] if scorer else []
+        payloads.append((home, away, {
+            "matchid": match["matchid"],
+            "homescore": home_score,
+            "awayscore": away_score,
+            "home_goal_scorers": scorers,
+        }))
+
+    # 3. Post every result at once
+    print(f"\n3. Posting {RESULT_COUNT} results with {WORKERS} workers...")
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        statuses = list(pool.map(lambda item: make_request("POST", "/match-results", token, item[2]).status_code, payloads))
+    failed = [status for status in statuses if status != 201]
+    if failed:
+        print(f"   ❌ {len(failed)} requests failed: {sorted(set(failed))}")
+    else:
+        print(f"   ✅ All {RESULT_COUNT} results accepted")
+
+    # 4. Compare the standings with the totals computed locally
+    print("\n4. Checking standings totals...")
+    expected = {tid: {"matchesplayed": 0, "wins": 0, "draws": 0, "losses": 0, "goalsfor": 0, "goalsagainst": 0, "points": 0} for tid in team_ids}
+    for home, away, payload in payloads:
+        for team, scored, conceded in ((home, payload["homescore"], payload["awayscore"]), (away, payload["awayscore"], payload["homescore"])):
+            row = expected[team]
+            row["matchesplayed"] += 1
+            row["goalsfor"] += scored
+            row["goalsagainst"] += conceded
+            if scored > conceded:
+                row["wins"] += 1
+                row["points"] += 3
+            elif scored == conceded:
+                row["draws"] += 1
+                row["points"] += 1
+            else:
+                row["losses"] += 1
+
+    standings = make_request("GET", f"/standings?groupid={group['groupid']}", token).json()
+    all_ok = not failed
+    if len(standings) != TEAM_COUNT:
+        print(f"   ❌ Expected {TEAM_COUNT} standings rows, got {len(standings)}")
+        all_ok = False
+    for row in standings:
+        actual = {field: row[field] for field in expected[row["teamid"]]}
+        if actual == expected[row["teamid"]]:
+            print(f"   ✅ Team {row['teamid']}: {actual['points']} pts from {actual['matchesplayed']} matches")
+        else:
+            print(f"   ❌ Team {row['teamid']}: expected {expected[row['teamid']]}, got {actual}")
+            all_ok = False
+
+    if scorer:
+        scored = sum(payload["homescore"] for _, _, payload in payloads)
+        goals_after = player_goals(token, scorer["statsid"])
+        if goals_after - goals_before == scored:
+            print(f"   ✅ Player {scorer['playerid']} gained exactly {scored} goals")
+        else:
+            print(f"   ❌ Player {scorer['playerid']} gained {goals_after - goals_before} goals, expected {scored}")
+            all_ok = False
+
+        # Delete the goals again in parallel; the tally has to come back to where it started
+        goal_ids = [goal["goalid"] for _, _, payload in payloads for goal in make_request("GET", f"/goals/match/{payload['matchid']}", token).json()]
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            list(pool.map(lambda goal_id: make_request("DELETE", f"/goals/{goal_id}", token), goal_ids))
+        if player_goals(token, scorer["statsid"]) == goals_before:
+            print(f"   ✅ Deleting {len(goal_ids)} goals in parallel restored the tally")
+        else:
+            print("   ❌ Player tally did not return to its starting value after deleting the goals")
+            all_ok = False
+
+    # 5. Clean up (matches, results, group and standings cascade with the tournament)
+    print("\n5. Cleaning up...")
+    make_request("DELETE", f"/tournaments/{tournament['tournamentid']}", token)
+    for team_id in team_ids:
+        make_request("DELETE", f"/teams/{team_id}", token)
+
+    print("\n" + "=" * 50)
+    print("🎉 No lost updates!" if all_ok else "❌ Concurrency test found lost or failed updates")
+
+if __name__ == "__main__":
+    test_concurrent_results()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Multi-worker test for live match flushes.
+Runs two LiveHubs on one LocalBus (two workers sharing a Redis, in one
+process), pushes a goal on one and checks that flush_everywhere on the other
+writes it and counts the confirmation. Uses the configured database; the
+teams, players and match it creates are removed at the end.
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+import models
+import services.live as live
+from database import SessionLocal, init_db
+from schemas.match_event import MatchEventCreate
+from services.broker import LocalBroker, LocalBus
+from services.live import LiveHub
+
+def message_types(broker: LocalBroker):
+    return [message["type"] for channel, message in broker.published if channel == "live"]
+
+def test_live_flush():
+    """Flush a goal pushed on worker B from worker A and verify the acknowledgements"""
+    print("📡 Testing live flushes across workers")
+    print("=" * 50)
+
+    init_db()
+    db = SessionLocal()
+    all_ok = True
+    suffix = datetime.now().strftime("%H%M%S")
+    teams, players, match = [], [], None
+    try:
+        # 1. A live match between two teams with one player each
+        print("\n1. Creating a live match...")
+        for i in range(2):
+            team = models.Team(teamname=f"Live Flush {suffix}-{i}")
+            db.add(team)
+            db.flush()
+            player = models.Player(teamid=team.teamid, position="Forward")
+            db.add(player)
+            teams.append(team)
+            players.append(player)
+        match = models.Match(hometeamid=teams[0].teamid, awayteamid=teams[1].teamid, matchdate=datetime.now(), round="Friendly", status="Live")
+        db.add(match)
+        db.commit()
+        print(f"   ✅ Match {match.matchid}")
+
+        # 2. Two workers on one bus; B gets a goal that only it holds
+        print("\n2. Pushing a goal on worker B...")
+        bus = LocalBus()
+        broker_a, broker_b = LocalBroker(bus), LocalBroker(bus)
+        hub_a, hub_b = LiveHub(broker_a), LiveHub(broker_b)
+        hub_a.state(db, match.matchid)
+        hub_b.state(db, match.matchid)
+        hub_b.push(db, match.matchid, [MatchEventCreate(eventtype="goal", playerid=players[0].playerid)], minute=10)
+        pending = len(hub_b._matches[match.matchid].pending)
+        if pending == 1 and hub_a.score(match.matchid) == (1, 0):
+            print("   ✅ Worker A sees the goal before it is written")
+        else:
+            print(f"   ❌ Expected one pending goal on B and 1-0 on A, got {pending} and {hub_a.score(match.matchid)}")
+            all_ok = False
+
+        # 3. Flush everywhere from A: B writes its goal and acknowledges
+        print("\n3. Flushing from worker A...")
+        flushed = hub_a.flush_everywhere(match.matchid)
+        db.expire_all()
+        goals = db.query(models.Goal).filter(models.Goal.matchid == match.matchid).count()
+        if flushed and goals == 1 and "flush_done" in message_types(broker_b):
+            print("   ✅ B wrote the goal and confirmed")
+        else:
+            print(f"   ❌ flush_everywhere returned {flushed} with {goals} goals written; B sent {message_types(broker_b)}")
+            all_ok = False
+
+        # 4. A worker on the bus that never answers makes flush_everywhere give up
+        print("\n4. Flushing with a worker that doesn't answer...")
+        silent = LocalBroker(bus)
+        wait, live.LIVE_FLUSH_WAIT = live.LIVE_FLUSH_WAIT, 0.2
+        try:
+            flushed = hub_a.flush_everywhere(match.matchid)
+        finally:
+            live.LIVE_FLUSH_WAIT = wait
+            bus.brokers.remove(silent)
+        if not flushed:
+            print("   ✅ Returned False after waiting for the missing confirmation")
+        else:
+            print("   ❌ Returned True although one worker never confirmed")
+            all_ok = False
+    finally:
+        # 5. Clean up
+        print("\n5. Cleaning up...")
+        db.rollback()
+        if match is not None and match.matchid is not None:
+            db.query(models.Goal).filter(models.Goal.matchid == match.matchid).delete(synchronize_session=False)
+            db.query(models.MatchEvent).filter(models.MatchEvent.matchid == match.matchid).delete(synchronize_session=False)
+            db.query(models.Match).filter(models.Match.matchid == match.matchid).delete(synchronize_session=False)
+        playerids = [player.playerid for player in players if player.playerid is not None]
+        # The flushed goal gave its scorer a stats row
+        statsids = [row.statsid for row in db.query(models.Player.statsid).filter(models.Player.playerid.in_(playerids)).all() if row.statsid]
+        db.query(models.Player).filter(models.Player.playerid.in_(playerids)).delete(synchronize_session=False)
+        db.query(models.PlayerStats).filter(models.PlayerStats.statsid.in_(statsids)).delete(synchronize_session=False)
+        for team in teams:
+            if team.teamid is not None:
+                db.query(models.Team).filter(models.Team.teamid == team.teamid).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+    print("\n" + "=" * 50)
+    print("🎉 Workers flush and acknowledge each other!" if all_ok else "❌ Live flush test failed")
+
+if __name__ == "__main__":
+    test_live_flush()
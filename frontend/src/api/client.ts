@@ -75,8 +75,9 @@ async function request<T>(path: string, init?: RequestInit, useCache: boolean =
 
 	try {
 		const res = await fetch(url, {
-			headers: { ...headers, ...(init?.headers || {}) },
 			...init,
+			// After ...init so per-call headers add to the defaults instead of replacing them
+			headers: { ...headers, ...(init?.headers || {}) },
 		});
 		
 		if (res.ok) {
@@ -153,6 +154,29 @@ async function request<T>(path: string, init?: RequestInit, useCache: boolean =
 	}
 }
 
+// POST for writes that must not be applied twice (results, goals, fixtures).
+// Every attempt carries the same Idempotency-Key, so when a flaky connection drops
+// the response and we retry, the server replays the first response instead of
+// counting the write again.
+async function idempotentPost<T>(path: string, data: any, attempts: number = 3): Promise<T> {
+	const key = crypto.randomUUID();
+	for (let attempt = 1; ; attempt++) {
+		try {
+			return await request<T>(path, {
+				method: 'POST',
+				body: JSON.stringify(data),
+				headers: { 'Idempotency-Key': key }
+			}, false);
+		} catch (error) {
+			// fetch rejects with a TypeError when no response arrived at all
+			if (!(error instanceof TypeError) || attempt >= attempts) {
+				throw error;
+			}
+			await new Promise(resolve => setTimeout(resolve, 500 * attempt));
+		}
+	}
+}
+
 export const api = {
 	// Authentication
 	login: (email: string, password: string) => 
@@ -209,6 +233,9 @@ export const api = {
 	listStadiums: () => request<any[]>(`/stadiums`),
 	listTeams: () => request<any[]>(`/teams`),
 	getTeam: (teamid: number) => request<any>(`/teams/${teamid}`),
+	// Version probe is never cached so polling sees bumps; fetch the bundle only when it moves
+	getTeamVersion: (teamid: number) => request<{ teamid: number; version: number }>(`/teams/${teamid}/version`, undefined, false),
+	getTeamBundle: (teamid: number) => request<any>(`/teams/${teamid}/bundle`, undefined, false),
 	createTeam: (data: any) => request<any>('/teams', {
 		method: 'POST',
 		body: JSON.stringify(data)
@@ -276,10 +303,7 @@ export const api = {
 		return request<any[]>(`/matches${suffix}`);
 	},
 	getMatch: (matchid: number) => request<any>(`/matches/${matchid}`, undefined, false),
-	createMatch: (data: any) => request<any>('/matches', {
-		method: 'POST',
-		body: JSON.stringify(data)
-	}, false),
+	createMatch: (data: any) => idempotentPost<any>('/matches', data),
 	updateMatch: (matchid: number, data: any) => request<any>(`/matches/${matchid}`, {
 		method: 'PATCH',
 		body: JSON.stringify(data)
@@ -291,10 +315,7 @@ export const api = {
 	
 	// Match Results
 	listMatchResults: () => request<any[]>(`/match-results`),
-	createMatchResult: (data: any) => request<any>('/match-results', {
-		method: 'POST',
-		body: JSON.stringify(data)
-	}, false),
+	createMatchResult: (data: any) => idempotentPost<any>('/match-results', data),
 	updateMatchResult: (resultid: number, data: any) => request<any>(`/match-results/${resultid}`, {
 		method: 'PATCH',
 		body: JSON.stringify(data)
@@ -370,10 +391,7 @@ export const api = {
 
 	// Goals API
 	listMatchGoals: (matchId: number) => request<any[]>(`/goals/match/${matchId}`),
-	createGoal: (data: any) => request<any>('/goals/', {
-		method: 'POST',
-		body: JSON.stringify(data)
-	}, false),
+	createGoal: (data: any) => idempotentPost<any>('/goals/', data),
 	deleteGoal: (goalId: number) => request<any>(`/goals/${goalId}`, {
 		method: 'DELETE'
 	}, false),
@@ -2581,6 +2581,7 @@ const MatchForm: React.FC<{
               onChange={(e) => setForm({ ...form, round: e.target.value })}
             >
               <option value="Group">Group</option>
+              <option value="Round of 16">Round of 16</option>
               <option value="Quarter">Quarter</option>
               <option value="Semi">Semi</option>
               <option value="Final">Final</option>